@@ -0,0 +1,93 @@
+"""
+HTTP 条件请求支持（ETag / Last-Modified）
+路由先用廉价查询算出校验值，命中客户端缓存时直接返回 304，
+跳过加载关系和序列化响应体
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+# 响应结构变化时递增，使旧的 ETag 全部失效
+ETAG_VERSION = "1"
+
+
+def make_etag(*parts) -> str:
+    """根据校验值生成弱 ETag"""
+    raw = "|".join(str(part) for part in (ETAG_VERSION, *parts))
+    digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """将数据库中的 UTC 时间转换为 HTTP 日期格式"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+class ConditionalRequest:
+    """
+    条件 GET 依赖
+
+    用法:
+        conditional: Annotated[ConditionalRequest, Depends()]
+        ...
+        not_modified = conditional.evaluate(task_id, updated_at, last_modified=updated_at)
+        if not_modified is not None:
+            return not_modified
+    """
+
+    def __init__(self, request: Request, response: Response):
+        self.if_none_match = request.headers.get("if-none-match")
+        self.if_modified_since = request.headers.get("if-modified-since")
+        self.response = response
+        # 直接返回 Response 对象的路由需要自行带上这些头
+        self.headers: dict[str, str] = {}
+
+    def evaluate(self, *parts, last_modified: datetime | None = None) -> Response | None:
+        """
+        计算校验值并写入响应头；客户端缓存仍有效时返回 304 响应，否则返回 None
+        """
+        headers = {
+            "ETag": make_etag(*parts),
+            # 带认证的响应只允许客户端私有缓存，且每次使用前必须重新校验
+            "Cache-Control": "private, no-cache",
+        }
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified)
+
+        self.headers = headers
+        for key, value in headers.items():
+            self.response.headers[key] = value
+
+        if self._is_fresh(headers["ETag"], last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return None
+
+    def _is_fresh(self, etag: str, last_modified: datetime | None) -> bool:
+        # If-None-Match 优先于 If-Modified-Since（RFC 9110 13.2.2）
+        if self.if_none_match is not None:
+            if self.if_none_match.strip() == "*":
+                return True
+            candidates = {_strip_weak(tag) for tag in self.if_none_match.split(",")}
+            return _strip_weak(etag) in candidates
+
+        if self.if_modified_since is None or last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(self.if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # HTTP 日期只精确到秒
+        return last_modified.replace(microsecond=0) <= since
@@ -1,16 +1,18 @@
 from typing import Annotated
 import logging
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_session
+from app.db.session import read_session, sticky_key, write_session
 from app.models.user import User
 from app.schemas.auth import TokenPayload
+from app.services import idempotency_service
+from app.services.idempotency_service import IdempotentRequest
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -18,15 +20,19 @@ logger = logging.getLogger(__name__)
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-async def get_db() -> AsyncSession:
-    async for session in get_session():
+async def get_db(request: Request) -> AsyncSession:
+    """主库会话，提交写入后该用户的读请求短时间内也走主库"""
+    async with write_session(sticky_key(request.headers.get("Authorization"))) as session:
         yield session
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer_scheme)],
-    session: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
+async def get_read_db(request: Request) -> AsyncSession:
+    """只读会话，优先使用健康的只读副本"""
+    async with read_session(sticky_key(request.headers.get("Authorization"))) as session:
+        yield session
+
+
+async def _authenticate(credentials: HTTPAuthorizationCredentials | None, session: AsyncSession) -> User:
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
@@ -53,6 +59,24 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer_scheme)],
+    session: Annotated[AsyncSession, Depends(get_db)],
+) -> User:
+    return await _authenticate(credentials, session)
+
+
+async def get_current_read_user(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer_scheme)],
+    session: Annotated[AsyncSession, Depends(get_read_db)],
+) -> User:
+    """
+    只读路由使用：从只读会话查询当前用户，与路由共用同一个读连接，不再占用主库连接；
+    用户刚写入时 get_read_db 本身会回退主库
+    """
+    return await _authenticate(credentials, session)
+
+
 async def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
@@ -70,3 +94,35 @@ async def get_current_admin_user(
             detail="Not enough permissions"
         )
     return current_user
+
+
+async def get_current_active_read_user(
+    current_user: Annotated[User, Depends(get_current_read_user)],
+) -> User:
+    return await get_current_active_user(current_user)
+
+
+async def get_current_admin_read_user(
+    current_user: Annotated[User, Depends(get_current_active_read_user)],
+) -> User:
+    return await get_current_admin_user(current_user)
+
+
+async def get_idempotent_request(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db)],
+) -> IdempotentRequest:
+    """处理 Idempotency-Key 请求头，路由未保存响应就结束（抛出异常）时释放占位"""
+    idempotent = await idempotency_service.begin(
+        session,
+        current_user.id,
+        request.headers.get(idempotency_service.HEADER),
+        request.method,
+        request.url.path,
+        await request.body(),
+    )
+    try:
+        yield idempotent
+    finally:
+        await idempotent.release()
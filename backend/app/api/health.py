@@ -0,0 +1,74 @@
+"""
+就绪检查
+/healthz 只表示进程存活；/readyz 在预热完成、数据库可用、连接池有余量且定时任务
+调度器、赏金结算任务仍在运行时才返回 200，负载均衡据此决定是否向该 worker 转发流量
+"""
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.session import engine, replica_router
+from app.services.settlement_service import settlement_state
+from app.services.task_cleanup_service import SchedulerState, scheduler_state
+
+router = APIRouter()
+
+
+async def _ping_database() -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _check_database() -> dict:
+    # 超时覆盖取连接和执行查询：连接池耗尽或数据库无响应时建连同样会挂起
+    try:
+        await asyncio.wait_for(_ping_database(), timeout=settings.readyz_db_timeout_seconds)
+        return {"ok": True}
+    except Exception as exc:
+        return {"ok": False, "error": str(exc) or type(exc).__name__}
+
+
+def _check_pool() -> dict:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"ok": True}
+    capacity = pool.size() + settings.db_max_overflow
+    headroom = capacity - pool.checkedout()
+    return {
+        "ok": headroom >= settings.readyz_min_pool_headroom,
+        "checked_out": pool.checkedout(),
+        "capacity": capacity,
+        "headroom": headroom,
+    }
+
+
+def _check_scheduler(state: SchedulerState) -> dict:
+    return {
+        "ok": state.is_alive(),
+        "last_run_at": state.last_run_at.isoformat() if state.last_run_at else None,
+        "last_error": state.last_error,
+    }
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readiness_check(request: Request) -> JSONResponse:
+    checks = {
+        "warmup": {"ok": getattr(request.app.state, "warmed_up", False)},
+        "database": await _check_database(),
+        "pool": _check_pool(),
+        "scheduler": _check_scheduler(scheduler_state),
+        "settlement_worker": _check_scheduler(settlement_state),
+    }
+    if replica_router.has_replicas:
+        # 副本不可用时读请求回退主库，只报告不影响就绪
+        checks["replicas"] = {"ok": True, "healthy": replica_router.healthy_count(), "total": len(replica_router.engines)}
+
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks},
+    )
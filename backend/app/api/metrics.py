@@ -0,0 +1,87 @@
+"""
+/metrics 指标导出
+连接池、WebSocket 连接数和列表缓存的指标在抓取时通过回调读取
+"""
+from fastapi import APIRouter, Response
+
+from app.core.metrics import registry
+from app.db.session import engine, pool_stats, replica_router
+from app.services.chat_service import manager
+from app.services.credit_service import task_stats_cache
+from app.services.idempotency_service import response_cache as idempotency_cache
+from app.services.task_cache import task_list_cache
+from app.services.user_summary_service import summary_cache as user_summary_cache
+from app.utils.map_service import amap_service
+
+router = APIRouter()
+
+
+def _engines():
+    yield "primary", engine
+    for index, replica in enumerate(replica_router.engines):
+        yield f"replica{index}", replica
+
+
+def _pool_connections():
+    values = {}
+    for name, current in _engines():
+        snapshot = pool_stats.snapshot(current.pool)
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in snapshot:
+                values[(name, state)] = snapshot[state]
+    return values
+
+
+def _pool_size():
+    values = {}
+    for name, current in _engines():
+        snapshot = pool_stats.snapshot(current.pool)
+        if "size" in snapshot:
+            values[(name,)] = snapshot["size"]
+    return values
+
+
+def _websocket_connections():
+    return {(): sum(len(connections) for connections in manager.active_connections.values())}
+
+
+def _caches():
+    return (task_list_cache, amap_service.geocode_cache, idempotency_cache, user_summary_cache, task_stats_cache)
+
+
+def _cache_requests():
+    values = {}
+    for cache in _caches():
+        stats = cache.stats()
+        values[(cache.name, "hit")] = stats["hits"]
+        values[(cache.name, "miss")] = stats["misses"]
+    return values
+
+
+registry.gauge(
+    "db_pool_connections", "连接池中各状态的连接数", ("engine", "state"), callback=_pool_connections
+)
+registry.gauge("db_pool_size", "连接池容量", ("engine",), callback=_pool_size)
+registry.counter(
+    "db_pool_checkout_timeouts_total", "获取连接超时次数",
+    callback=lambda: {(): pool_stats.snapshot()["timeouts"]},
+)
+registry.gauge(
+    "websocket_connections", "当前 WebSocket 连接数", callback=_websocket_connections
+)
+registry.gauge(
+    "websocket_rooms", "当前有 WebSocket 连接的任务聊天室数",
+    callback=lambda: {(): len(manager.active_connections)},
+)
+registry.counter(
+    "cache_requests_total", "进程内缓存的命中情况", ("cache", "result"), callback=_cache_requests
+)
+registry.gauge(
+    "cache_entries", "进程内缓存的条目数", ("cache",),
+    callback=lambda: {(cache.name,): len(cache) for cache in _caches()},
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -53,16 +53,16 @@ async def websocket_endpoint(
 @router.get("/history/{task_id}", response_model=ResponseModel[List[MessageRead]])
 async def get_history(
     task_id: int,
-    current_user: Annotated[User, Depends(deps.get_current_user)],
-    db: Annotated[AsyncSession, Depends(deps.get_db)]
+    current_user: Annotated[User, Depends(deps.get_current_read_user)],
+    db: Annotated[AsyncSession, Depends(deps.get_read_db)]
 ):
     history = await chat_service.get_history(db, task_id)
     return ResponseModel(data=history)
 
 @router.get("/sessions", response_model=ResponseModel[List[ChatSession]])
 async def get_sessions(
-    current_user: Annotated[User, Depends(deps.get_current_user)],
-    db: Annotated[AsyncSession, Depends(deps.get_db)]
+    current_user: Annotated[User, Depends(deps.get_current_read_user)],
+    db: Annotated[AsyncSession, Depends(deps.get_read_db)]
 ):
     sessions = await chat_service.get_sessions(db, current_user.id)
     return ResponseModel(data=sessions)
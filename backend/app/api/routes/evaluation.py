@@ -1,5 +1,5 @@
 from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.user import User
@@ -21,15 +21,17 @@ async def submit_evaluation(
 @router.get("/user/{user_id}", response_model=ResponseModel[UserEvaluationSummary])
 async def get_user_evaluations(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(deps.get_db)]
+    db: Annotated[AsyncSession, Depends(deps.get_read_db)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="上一页返回的 nextCursor"),
 ):
-    summary = await evaluation_service.get_user_evaluations(db, user_id)
+    summary = await evaluation_service.get_user_evaluations(db, user_id, limit, cursor)
     return ResponseModel(data=summary)
 
 @router.get("/task/{task_id}", response_model=ResponseModel[List[EvaluationRead]])
 async def get_task_evaluations(
     task_id: int,
-    db: Annotated[AsyncSession, Depends(deps.get_db)]
+    db: Annotated[AsyncSession, Depends(deps.get_read_db)]
 ):
     evaluations = await evaluation_service.get_task_evaluations(db, task_id)
     return ResponseModel(data=evaluations)
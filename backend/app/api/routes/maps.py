@@ -3,11 +3,12 @@
 提供地理编码、逆地理编码等服务
 """
 from typing import Annotated
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.schemas.response import ResponseModel
+from app.services import place_service
 from app.services.task_service import geocode_location
 from app.utils.map_service import amap_service
 
@@ -17,7 +18,6 @@ router = APIRouter(prefix="/maps", tags=["maps"])
 
 @router.get("/geocode")
 async def geocode_address(
-    request: Request,
     address: str = Query(..., description="要编码的地址"),
     session: Annotated[AsyncSession, Depends(deps.get_db)] = None,
 ):
@@ -41,26 +41,21 @@ async def geocode_address(
             'level': result.get('level', '地名')
         }
         
-        request_id = getattr(request.state, 'request_id', None)
         return ResponseModel(
             success=True,
             message="地理编码成功",
             data=formatted_result,
-            request_id=request_id
         )
     else:
-        request_id = getattr(request.state, 'request_id', None)
         return ResponseModel(
             success=False,
             message="地理编码失败",
             data=None,
-            request_id=request_id
         )
 
 
 @router.get("/reverse-geocode")
 async def reverse_geocode(
-    request: Request,
     lng: float = Query(..., description="经度"),
     lat: float = Query(..., description="纬度"),
     session: Annotated[AsyncSession, Depends(deps.get_db)] = None,
@@ -70,18 +65,35 @@ async def reverse_geocode(
     """
     result = await amap_service.regeocode(lng, lat)
     if result:
-        request_id = getattr(request.state, 'request_id', None)
         return ResponseModel(
             success=True,
             message="逆地理编码成功",
             data=result,
-            request_id=request_id
         )
     else:
-        request_id = getattr(request.state, 'request_id', None)
         return ResponseModel(
             success=False,
             message="逆地理编码失败",
             data=None,
-            request_id=request_id
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/places/autocomplete")
+async def autocomplete_places(
+    q: str = Query(..., min_length=1, description="地点名称关键字"),
+    limit: int = Query(10, ge=1, le=50),
+    session: Annotated[AsyncSession, Depends(deps.get_read_db)] = None,
+):
+    """
+    地点联想：从地点字典中按前缀/包含匹配，不调用地图服务
+    """
+    await place_service.place_index.refresh(session)
+    places = place_service.place_index.autocomplete(q, limit)
+    return ResponseModel(
+        success=True,
+        message="地点联想成功",
+        data=[
+            {'id': place.id, 'name': place.name, 'lat': place.lat, 'lng': place.lng}
+            for place in places
+        ],
+    )
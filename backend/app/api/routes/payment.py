@@ -1,10 +1,15 @@
+from datetime import date
 from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
 from app.models.user import User
-from app.schemas.payment import WalletRead, RechargeRequest, TransactionRead, PaymentRequest
+from app.schemas.payment import (
+    WalletRead, RechargeRequest, TransactionMonthlyTotalRead, TransactionPage, PaymentRequest, SettleRequest
+)
 from app.schemas.response import ResponseModel, OperationResponse
+from app.services import settlement_service
+from app.services.idempotency_service import IdempotentRequest
 from app.services.payment_service import payment_service
 
 router = APIRouter(prefix="/payment", tags=["payment"])
@@ -21,34 +26,57 @@ async def get_balance(
 async def recharge(
     recharge_in: RechargeRequest,
     current_user: Annotated[User, Depends(deps.get_current_user)],
-    db: Annotated[AsyncSession, Depends(deps.get_db)]
+    db: Annotated[AsyncSession, Depends(deps.get_db)],
+    idempotent: Annotated[IdempotentRequest, Depends(deps.get_idempotent_request)],
 ):
+    if idempotent.replay is not None:
+        return idempotent.replay
     wallet = await payment_service.recharge(db, current_user.id, recharge_in)
-    return ResponseModel(data=wallet)
+    return await idempotent.save(ResponseModel[WalletRead](data=wallet))
 
-@router.get("/transactions", response_model=ResponseModel[List[TransactionRead]])
+@router.get("/transactions", response_model=ResponseModel[TransactionPage])
 async def get_transactions(
-    current_user: Annotated[User, Depends(deps.get_current_user)],
-    db: Annotated[AsyncSession, Depends(deps.get_db)]
+    current_user: Annotated[User, Depends(deps.get_current_read_user)],
+    db: Annotated[AsyncSession, Depends(deps.get_read_db)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="上一页返回的 nextCursor"),
 ):
-    transactions = await payment_service.get_transactions(db, current_user.id)
-    return ResponseModel(data=transactions)
+    transactions, next_cursor = await payment_service.get_transactions(db, current_user.id, limit, cursor)
+    return ResponseModel(data=TransactionPage(items=transactions, next_cursor=next_cursor))
+
+@router.get("/transactions/monthly", response_model=ResponseModel[List[TransactionMonthlyTotalRead]])
+async def get_monthly_totals(
+    current_user: Annotated[User, Depends(deps.get_current_read_user)],
+    db: Annotated[AsyncSession, Depends(deps.get_read_db)],
+    since: date | None = Query(None, description="只返回该日期所在月份及之后的汇总"),
+):
+    """按月、按流水类型汇总的金额和笔数"""
+    totals = await payment_service.get_monthly_totals(db, current_user.id, since)
+    return ResponseModel(data=totals)
 
 @router.post("/pay", response_model=OperationResponse)
 async def pay_reward(
     payment_in: PaymentRequest,
     current_user: Annotated[User, Depends(deps.get_current_user)],
-    db: Annotated[AsyncSession, Depends(deps.get_db)]
+    db: Annotated[AsyncSession, Depends(deps.get_db)],
+    idempotent: Annotated[IdempotentRequest, Depends(deps.get_idempotent_request)],
 ):
+    if idempotent.replay is not None:
+        return idempotent.replay
     success = await payment_service.pay_reward(db, current_user.id, payment_in.task_id, payment_in.amount)
-    return OperationResponse(success=success, message="支付成功" if success else "支付失败")
+    return await idempotent.save(
+        OperationResponse(success=success, message="支付成功" if success else "支付失败")
+    )
 
 @router.post("/settle", response_model=OperationResponse)
 async def settle_reward(
-    payment_in: PaymentRequest,
-    current_user: Annotated[User, Depends(deps.get_current_user)],
+    settle_in: SettleRequest,
+    current_admin: Annotated[User, Depends(deps.get_current_admin_user)],
     db: Annotated[AsyncSession, Depends(deps.get_db)]
 ):
-    # In a real app, this would be restricted to admin or triggered by task completion
-    success = await payment_service.settle_reward(db, current_user.id, payment_in.task_id, payment_in.amount)
-    return OperationResponse(success=success, message="结算成功" if success else "结算失败")
+    # 只登记到结算队列，由结算任务入账，与任务完成时入队的记录共用 task_id 唯一约束
+    queued = await settlement_service.enqueue_task(db, settle_in.task_id)
+    return OperationResponse(
+        success=queued,
+        message="已加入结算队列" if queued else "该任务已结算或已在结算队列中",
+    )
@@ -2,47 +2,41 @@ from typing import Annotated
 from datetime import datetime, timedelta
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
 from app.api import deps
+from app.api.conditional import ConditionalRequest
+from app.core.config import settings
+from app.core.responses import dumps
+from app.db.pagination import decode_cursor, encode_cursor, encode_position
 from app.models.task import Task, TaskStatus, TaskCategory, TaskUrgency
 from app.models.user import User
-from app.schemas.task import TaskCreate, TaskRead, TaskUpdate
-from app.schemas.response import OperationResponse, ResponseModel
-from app.services import task_service
+from app.schemas.task import TaskChanges, TaskCreate, TaskRead, TaskTombstone, TaskUpdate
+from app.schemas.response import OperationResponse, ResponseModel, render_response_body
+from app.services import (
+    place_service, search_service, settlement_service, task_cache, task_read_service, task_service
+)
+from app.services.idempotency_service import IdempotentRequest
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
-@router.get("", response_model=ResponseModel[list[TaskRead]])
-async def list_tasks(
-    request: Request,
-    keyword: str | None = None,
-    status_filter: TaskStatus | None = Query(None, alias="status"),
-    min_reward: float | None = None,
-    max_reward: float | None = None,
-    pickup_location: str | None = None,
-    dropoff_location: str | None = None,
-    time_range: str | None = None,
-    category: TaskCategory | None = None,
-    urgency: TaskUrgency | None = None,
-    sort_by: str = "created_at",
-    sort_order: str = "desc",
-    session: Annotated[AsyncSession, Depends(deps.get_db)] = None,
-):
-    stmt = (
-        select(Task)
-        .options(
-            selectinload(Task.created_by),
-            selectinload(Task.assigned_to),
-        )
-    )
-
+def _build_list_conditions(
+    keyword: str | None,
+    status_filter: TaskStatus | None,
+    min_reward: float | None,
+    max_reward: float | None,
+    pickup_location: str | None,
+    dropoff_location: str | None,
+    time_range: str | None,
+    category: TaskCategory | None,
+    urgency: TaskUrgency | None,
+) -> list:
     conditions = []
     if keyword:
         like = f"%{keyword}%"
@@ -56,10 +50,11 @@ async def list_tasks(
     if max_reward is not None:
         conditions.append(Task.reward_amount <= max_reward)
     # 新增筛选条件
+    # 地点筛选先在内存索引中匹配地点 id，再走整数索引
     if pickup_location:
-        conditions.append(Task.pickup_location_name.ilike(f"%{pickup_location}%"))
+        conditions.append(Task.pickup_place_id.in_(place_service.place_index.match(pickup_location)))
     if dropoff_location:
-        conditions.append(Task.dropoff_location_name.ilike(f"%{dropoff_location}%"))
+        conditions.append(Task.dropoff_place_id.in_(place_service.place_index.match(dropoff_location)))
     if time_range:
         # 计算时间范围
         now = datetime.utcnow()
@@ -80,91 +75,233 @@ async def list_tasks(
         conditions.append(Task.category == category)
     if urgency:
         conditions.append(Task.urgency == urgency)
+    return conditions
 
-    if conditions:
-        stmt = stmt.where(and_(*conditions))
-    
-    # 添加排序
-    if sort_by == "reward_amount":
-        if sort_order == "asc":
-            stmt = stmt.order_by(Task.reward_amount.asc())
-        else:
-            stmt = stmt.order_by(Task.reward_amount.desc())
-    elif sort_by == "created_at":
-        if sort_order == "asc":
-            stmt = stmt.order_by(Task.created_at.asc())
-        else:
-            stmt = stmt.order_by(Task.created_at.desc())
+
+def _build_my_conditions(
+    user_id: int,
+    role: str | None,
+    status_filter: TaskStatus | None,
+) -> list:
+    conditions = []
+    if role == "creator":
+        conditions.append(Task.created_by_id == user_id)
+    elif role == "assignee":
+        conditions.append(Task.assigned_to_id == user_id)
     else:
-        # 默认按创建时间倒序排列
-        stmt = stmt.order_by(Task.created_at.desc())
+        # 默认返回所有相关的
+        conditions.append(
+            or_(
+                Task.created_by_id == user_id,
+                Task.assigned_to_id == user_id
+            )
+        )
 
-    result = await session.execute(stmt)
-    tasks = result.scalars().all()
-    
-    request_id = getattr(request.state, 'request_id', None)
-    return ResponseModel(
-        success=True,
-        message="任务列表获取成功",
-        data=tasks,
-        request_id=request_id
+    if status_filter:
+        conditions.append(Task.status == status_filter)
+    return conditions
+
+
+def _latest(*values: datetime | None) -> datetime | None:
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+@router.get("", response_model=ResponseModel[list[TaskRead]])
+async def list_tasks(
+    conditional: Annotated[ConditionalRequest, Depends()],
+    keyword: str | None = None,
+    status_filter: TaskStatus | None = Query(None, alias="status"),
+    min_reward: float | None = None,
+    max_reward: float | None = None,
+    pickup_location: str | None = None,
+    dropoff_location: str | None = None,
+    time_range: str | None = None,
+    category: TaskCategory | None = None,
+    urgency: TaskUrgency | None = None,
+    sort_by: str | None = Query(None, description="created_at / reward_amount / relevance，有关键词时默认按相关度"),
+    sort_order: str = "desc",
+    session: Annotated[AsyncSession, Depends(deps.get_read_db)] = None,
+):
+    if sort_by is None:
+        sort_by = "relevance" if keyword else "created_at"
+
+    cache_key = task_cache.list_cache_key(
+        keyword, status_filter, min_reward, max_reward,
+        pickup_location, dropoff_location, time_range, category, urgency,
+        sort_by, sort_order,
+    )
+    cached = task_cache.task_list_cache.get(cache_key)
+    if cached is not None:
+        validator, data_json = cached
+    else:
+        # 关键词优先走倒排索引，无法分词的关键词（如单字）退回 LIKE 匹配
+        search = search_service.search_subquery(keyword, status_filter) if keyword else None
+        if pickup_location or dropoff_location:
+            await place_service.place_index.refresh(session)
+        conditions = _build_list_conditions(
+            keyword if search is None else None,
+            status_filter, min_reward, max_reward,
+            pickup_location, dropoff_location, time_range, category, urgency,
+        )
+        validator = await task_read_service.list_validator(session, conditions, search)
+    # 列表不返回 Last-Modified：任务离开筛选结果后最大 updated_at 会变小，
+    # 按时间判断会把已变化的列表误判为未修改，只用 ETag 校验
+    not_modified = conditional.evaluate("tasks", sort_by, sort_order, *validator)
+    if not_modified is not None:
+        return not_modified
+
+    if cached is None:
+        # 单次 JOIN 投影查询，只取 TaskRead 需要的列
+        stmt = task_read_service.list_statement(conditions, search, sort_by, sort_order)
+        data_json = dumps(await task_read_service.fetch_task_rows(session, stmt))
+        task_cache.task_list_cache.set(cache_key, (validator, data_json))
+
+    return Response(
+        content=render_response_body(data_json, "任务列表获取成功"),
+        media_type="application/json",
+        headers={**conditional.headers, "X-Cache": "HIT" if cached is not None else "MISS"},
     )
 
 
 @router.get("/my", response_model=ResponseModel[list[TaskRead]])
 async def list_my_tasks(
-    request: Request,
+    conditional: Annotated[ConditionalRequest, Depends()],
     role: str | None = Query(None, description="角色筛选: 'creator' (我发布的) 或 'assignee' (我接单的)"),
     status_filter: TaskStatus | None = Query(None, alias="status"),
-    current_user: Annotated[User, Depends(deps.get_current_user)] = None,
-    session: Annotated[AsyncSession, Depends(deps.get_db)] = None,
+    current_user: Annotated[User, Depends(deps.get_current_read_user)] = None,
+    session: Annotated[AsyncSession, Depends(deps.get_read_db)] = None,
 ):
     """获取与当前用户相关的所有任务"""
+    conditions = _build_my_conditions(current_user.id, role, status_filter)
+
+    validator = await task_read_service.list_validator(session, conditions)
+    # 与任务大厅相同，只用 ETag 校验
+    not_modified = conditional.evaluate("my-tasks", current_user.id, *validator)
+    if not_modified is not None:
+        return not_modified
+
+    stmt = (
+        task_read_service.task_projection()
+        .where(and_(*conditions))
+        .order_by(Task.created_at.desc())
+    )
+    data_json = dumps(await task_read_service.fetch_task_rows(session, stmt))
+
+    return Response(
+        content=render_response_body(data_json, "个人任务列表获取成功"),
+        media_type="application/json",
+        headers=conditional.headers,
+    )
+
+
+@router.get("/changes", response_model=ResponseModel[TaskChanges])
+async def list_task_changes(
+    since: str | None = Query(None, description="上次同步返回的 watermark，为空时返回全量快照"),
+    status_filter: TaskStatus | None = Query(None, alias="status"),
+    category: TaskCategory | None = None,
+    urgency: TaskUrgency | None = None,
+    limit: int = Query(200, ge=1, le=1000),
+    session: Annotated[AsyncSession, Depends(deps.get_read_db)] = None,
+):
+    """
+    增量同步：返回 since 之后新建或修改过的任务
+
+    仍满足筛选条件的任务放在 changed 中，已不满足筛选条件的任务（例如已被接单、
+    已取消）以 tombstone 的形式放在 removed 中。水位线编码 (updated_at, id)，
+    同一时刻修改的任务超过 limit 条时也能逐页推进，且不会重复返回水位线上的任务。
+    updated_at 在 flush 时写入而不是提交时，较早写入的事务可能晚于其他事务提交，
+    因此最后一页的水位线最多推进到 task_changes_safety_window_seconds 之前，
+    窗口内的修改在下次同步时会重复返回，客户端按 id 去重
+    """
+    def matches(task: Task) -> bool:
+        if status_filter and task.status != status_filter:
+            return False
+        if category and task.category != category:
+            return False
+        if urgency and task.urgency != urgency:
+            return False
+        return True
+
     stmt = (
         select(Task)
         .options(
             selectinload(Task.created_by),
             selectinload(Task.assigned_to),
         )
+        .order_by(Task.updated_at.asc(), Task.id.asc())
+        .limit(limit + 1)
     )
-
-    conditions = []
-    if role == "creator":
-        conditions.append(Task.created_by_id == current_user.id)
-    elif role == "assignee":
-        conditions.append(Task.assigned_to_id == current_user.id)
+    if since is None:
+        # 首次同步只需要满足条件的任务，不需要 tombstone
+        conditions = []
+        if status_filter:
+            conditions.append(Task.status == status_filter)
+        if category:
+            conditions.append(Task.category == category)
+        if urgency:
+            conditions.append(Task.urgency == urgency)
+        if conditions:
+            stmt = stmt.where(and_(*conditions))
     else:
-        # 默认返回所有相关的
-        conditions.append(
-            or_(
-                Task.created_by_id == current_user.id,
-                Task.assigned_to_id == current_user.id
-            )
-        )
+        updated_at, task_id = decode_cursor(since)
+        stmt = stmt.where(or_(
+            Task.updated_at > updated_at,
+            and_(Task.updated_at == updated_at, Task.id > task_id),
+        ))
 
-    if status_filter:
-        conditions.append(Task.status == status_filter)
-
-    stmt = stmt.where(and_(*conditions)).order_by(Task.created_at.desc())
-    
     result = await session.execute(stmt)
-    tasks = result.scalars().all()
-    
-    request_id = getattr(request.state, 'request_id', None)
+    tasks = list(result.scalars().all())
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+
+    watermark = since
+    if tasks:
+        watermark = encode_cursor(tasks[-1], "updated_at")
+        horizon = datetime.utcnow() - timedelta(seconds=settings.task_changes_safety_window_seconds)
+        # 翻页途中照常推进，避免窗口内的任务超过 limit 条时停在原地
+        if not has_more and tasks[-1].updated_at > horizon:
+            watermark = encode_position(horizon, 0)
+    changes = TaskChanges(watermark=watermark, has_more=has_more)
+    for task in tasks:
+        if matches(task):
+            changes.changed.append(TaskRead.model_validate(task))
+        else:
+            changes.removed.append(TaskTombstone.model_validate(task))
+
     return ResponseModel(
         success=True,
-        message="个人任务列表获取成功",
-        data=tasks,
-        request_id=request_id
+        message="任务增量同步成功",
+        data=changes,
     )
 
 
 @router.get("/{task_id}", response_model=ResponseModel[TaskRead])
 async def get_task(
-    request: Request,
     task_id: int,
-    session: Annotated[AsyncSession, Depends(deps.get_db)],
+    session: Annotated[AsyncSession, Depends(deps.get_read_db)],
+    conditional: Annotated[ConditionalRequest, Depends()],
 ):
+    # 先只查询校验值，客户端缓存有效时无需加载关系
+    creator = aliased(User)
+    assignee = aliased(User)
+    validator_stmt = (
+        select(Task.updated_at, creator.updated_at, assignee.updated_at)
+        .select_from(Task)
+        .outerjoin(creator, creator.id == Task.created_by_id)
+        .outerjoin(assignee, assignee.id == Task.assigned_to_id)
+        .where(Task.id == task_id)
+    )
+    validator = (await session.execute(validator_stmt)).one_or_none()
+    if validator is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    not_modified = conditional.evaluate(
+        "task", task_id, *validator, last_modified=_latest(*validator)
+    )
+    if not_modified is not None:
+        return not_modified
+
     stmt = (
         select(Task)
         .where(Task.id == task_id)
@@ -178,81 +315,63 @@ async def get_task(
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    request_id = getattr(request.state, 'request_id', None)
     return ResponseModel(
         success=True,
         message="任务详情获取成功",
         data=task,
-        request_id=request_id
     )
 
 
 @router.post("", response_model=ResponseModel[TaskRead], status_code=201)
 async def create_task(
-    request: Request,
     payload: TaskCreate,
     session: Annotated[AsyncSession, Depends(deps.get_db)],
     current_user: Annotated[User, Depends(deps.get_current_active_user)],
+    idempotent: Annotated[IdempotentRequest, Depends(deps.get_idempotent_request)],
 ):
+    # 超时重试的重复请求直接返回首次创建的任务
+    if idempotent.replay is not None:
+        return idempotent.replay
+
     # 如果没有设置抢单截止时间，默认为创建时间后1小时
     task_data = payload.model_dump()
     if task_data.get('grab_expires_at') is None:
         task_data['grab_expires_at'] = datetime.utcnow() + timedelta(hours=1)
     
-    # 如果没有提供经纬度，尝试通过地理编码获取
-    if task_data.get('pickup_location_name') and (task_data.get('pickup_lat') is None or task_data.get('pickup_lng') is None):
-        pickup_geocode = await task_service.geocode_location(task_data.get('pickup_location_name', ''))
-        if pickup_geocode and 'location' in pickup_geocode:
-            try:
-                lng, lat = pickup_geocode['location'].split(',')
-                task_data['pickup_lng'] = float(lng)
-                task_data['pickup_lat'] = float(lat)
-            except (ValueError, IndexError):
-                # 如果地理编码失败，记录警告但继续处理
-                print(f"地理编码失败，取件地点: {task_data.get('pickup_location_name')}")
-    
-    if task_data.get('dropoff_location_name') and (task_data.get('dropoff_lat') is None or task_data.get('dropoff_lng') is None):
-        dropoff_geocode = await task_service.geocode_location(task_data.get('dropoff_location_name', ''))
-        if dropoff_geocode and 'location' in dropoff_geocode:
-            try:
-                lng, lat = dropoff_geocode['location'].split(',')
-                task_data['dropoff_lng'] = float(lng)
-                task_data['dropoff_lat'] = float(lat)
-            except (ValueError, IndexError):
-                # 如果地理编码失败，记录警告但继续处理
-                print(f"地理编码失败，送达地点: {task_data.get('dropoff_location_name')}")
+    # 关联地点字典；没有提供经纬度时优先复用地点坐标，否则通过地理编码获取
+    for prefix in ("pickup", "dropoff"):
+        place_id, lat, lng = await task_service.resolve_location(
+            session,
+            task_data.get(f'{prefix}_location_name'),
+            task_data.get(f'{prefix}_lat'),
+            task_data.get(f'{prefix}_lng'),
+        )
+        task_data[f'{prefix}_place_id'] = place_id
+        task_data[f'{prefix}_lat'] = lat
+        task_data[f'{prefix}_lng'] = lng
     
+    # 直接关联已加载的用户对象并显式给出空值，提交后无需重新查询
     task = Task(
         **task_data,
-        created_by_id=current_user.id,
+        created_by=current_user,
+        assigned_to=None,
+        cancelled_by=None,
     )
     session.add(task)
-    await session.commit()
-    
-    # 重新获取任务以加载关系
-    stmt = (
-        select(Task)
-        .where(Task.id == task.id)
-        .options(
-            selectinload(Task.created_by),
-            selectinload(Task.assigned_to),
-        )
-    )
-    result = await session.execute(stmt)
-    task = result.scalar_one()
+    await task_service.flush_task(session, task)
     
-    request_id = getattr(request.state, 'request_id', None)
-    return ResponseModel(
-        success=True,
-        message="任务创建成功",
-        data=task,
-        request_id=request_id
+    return await idempotent.save(
+        ResponseModel[TaskRead](
+            success=True,
+            message="任务创建成功",
+            data=task,
+        ),
+        status_code=201,
     )
 
 
 @router.post("/{task_id}/accept", response_model=ResponseModel[TaskRead])
 async def accept_task(
-    request: Request,
     task_id: int,
     session: Annotated[AsyncSession, Depends(deps.get_db)],
     current_user: Annotated[User, Depends(deps.get_current_active_user)],
@@ -293,36 +412,21 @@ async def accept_task(
     task.status = TaskStatus.accepted
     
     try:
-        await session.commit()
+        await task_service.commit_task(session, task)
     except Exception as e:
         await session.rollback()
         logger.error(f"接单提交失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"接单失败: {str(e)}")
     
-    # 5. 重新获取以返回（确保关系已加载且对象未过期）
-    stmt = (
-        select(Task)
-        .where(Task.id == task_id)
-        .options(
-            selectinload(Task.created_by),
-            selectinload(Task.assigned_to),
-        )
-    )
-    result = await session.execute(stmt)
-    task = result.scalar_one()
-    
-    request_id = getattr(request.state, 'request_id', None)
     return ResponseModel(
         success=True,
         message="任务接取成功",
         data=task,
-        request_id=request_id
     )
 
 
 @router.post("/{task_id}/cancel", response_model=ResponseModel[TaskRead])
 async def cancel_task(
-    request: Request,
     task_id: int,
     session: Annotated[AsyncSession, Depends(deps.get_db)],
     current_user: Annotated[User, Depends(deps.get_current_active_user)],
@@ -360,34 +464,21 @@ async def cancel_task(
         task.cancelled_by = "assignee"
     
     # 更新信用评分
-    task_service.update_credit_on_completion(task)
-    
-    await session.commit()
+    await task_service.lock_task_users(session, task)
+    task_service.update_credit_on_completion(session, task)
     
-    # 重新获取任务以加载关系
-    stmt = (
-        select(Task)
-        .where(Task.id == task.id)
-        .options(
-            selectinload(Task.created_by),
-            selectinload(Task.assigned_to),
-        )
-    )
-    result = await session.execute(stmt)
-    task = result.scalar_one()
+    # 提交后关系仍处于已加载状态，无需重新查询
+    await task_service.commit_task(session, task)
     
-    request_id = getattr(request.state, 'request_id', None)
     return ResponseModel(
         success=True,
         message=f"任务已成功取消，原状态为 '{old_status}'",
         data=task,
-        request_id=request_id
     )
 
 
 @router.post("/{task_id}/status", response_model=ResponseModel[TaskRead])
 async def update_task_status(
-    request: Request,
     task_id: int,
     payload: TaskUpdate,
     session: Annotated[AsyncSession, Depends(deps.get_db)],
@@ -421,26 +512,18 @@ async def update_task_status(
     
     # 如果任务已完成或已取消，更新信用评分
     if task.status in [TaskStatus.completed, TaskStatus.cancelled]:
-        task_service.update_credit_on_completion(task)
-    
-    await session.commit()
+        await task_service.lock_task_users(session, task)
+        task_service.update_credit_on_completion(session, task)
+
+    # 赏金登记到结算队列，由后台任务批量入账
+    if task.status == TaskStatus.completed:
+        settlement_service.enqueue(session, task)
     
-    # 重新获取任务以加载关系
-    stmt = (
-        select(Task)
-        .where(Task.id == task.id)
-        .options(
-            selectinload(Task.created_by),
-            selectinload(Task.assigned_to),
-        )
-    )
-    result = await session.execute(stmt)
-    task = result.scalar_one()
+    # 提交后关系仍处于已加载状态，无需重新查询
+    await task_service.commit_task(session, task)
     
-    request_id = getattr(request.state, 'request_id', None)
     return ResponseModel(
         success=True,
         message=f"任务状态从 '{old_status}' 更新为 '{payload.status}' 成功",
         data=task,
-        request_id=request_id
     )
\ No newline at end of file
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, Request
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from app.api import deps
+from app.api.conditional import ConditionalRequest
+from app.db.pagination import id_page
+from app.db.session import sticky_key
 from app.models.user import User
-from app.schemas.user import UserRead, UserUpdate
+from app.schemas.credit import CreditEventPage
+from app.schemas.user import UserPage, UserRead, UserSummary, UserSummaryRequest, UserUpdate
 from app.schemas.response import ResponseModel
+from app.services import user_export_service, user_summary_service
 from app.services.credit_service import credit_service
 
 logger = logging.getLogger(__name__)
@@ -13,55 +22,76 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.get("", response_model=ResponseModel[list[UserRead]])
+@router.get("", response_model=ResponseModel[UserPage])
 async def get_users(
+    session: AsyncSession = Depends(deps.get_read_db),
+    current_admin: User = Depends(deps.get_current_admin_read_user),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="上一页返回的 nextCursor"),
+    keyword: str | None = Query(None, description="按邮箱、姓名、手机号模糊搜索"),
+):
+    """按 id 分页获取用户列表（管理员权限），带关键词时在全部用户中搜索"""
+    logger.info(f"管理员 {current_admin.email} 获取用户列表")
+    stmt = select(User)
+    if keyword:
+        like = f"%{keyword}%"
+        stmt = stmt.where(or_(User.email.ilike(like), User.full_name.ilike(like), User.phone.ilike(like)))
+    users, next_cursor = await id_page(session, stmt, User, limit, cursor)
+    return ResponseModel(
+        success=True,
+        message="用户列表获取成功",
+        data=UserPage(items=users, next_cursor=next_cursor),
+    )
+
+
+@router.get("/export")
+async def export_users(
     request: Request,
-    session: AsyncSession = Depends(deps.get_db),
     current_admin: User = Depends(deps.get_current_admin_user),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
 ):
-    """获取所有用户列表（管理员权限）"""
-    logger.info(f"管理员 {current_admin.email} 获取用户列表")
-    try:
-        from sqlalchemy import select
-        stmt = select(User)
-        result = await session.execute(stmt)
-        users = result.scalars().all()
+    """流式导出全部用户（管理员权限），NDJSON 每行一个用户，CSV 首行为列名"""
+    logger.info(f"管理员 {current_admin.email} 导出用户 ({format})")
+    return StreamingResponse(
+        user_export_service.export_users(format, sticky_key(request.headers.get("Authorization"))),
+        media_type=user_export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
 
-        request_id = getattr(request.state, 'request_id', None)
-        return ResponseModel(
-            success=True,
-            message="用户列表获取成功",
-            data=users,
-            request_id=request_id
-        )
-    except Exception as e:
-        logger.error(f"获取用户列表失败: {str(e)}")
-        return ResponseModel(
-            success=False,
-            message=f"获取用户列表失败: {str(e)}",
-            data=None,
-            request_id=getattr(request.state, 'request_id', None)
-        )
+
+@router.post("/summaries", response_model=ResponseModel[list[UserSummary]])
+async def get_user_summaries(
+    payload: UserSummaryRequest,
+    current_user: User = Depends(deps.get_current_read_user),
+    session: AsyncSession = Depends(deps.get_read_db),
+):
+    """批量获取用户资料摘要（信用分、评分、完成数、头像），供任务卡片和聊天列表使用"""
+    summaries = await user_summary_service.get_summaries(session, payload.user_ids)
+    return ResponseModel(data=summaries)
 
 
 @router.get("/me", response_model=ResponseModel[UserRead])
 async def read_current_user(
-    request: Request,
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: User = Depends(deps.get_current_active_read_user),
+    conditional: ConditionalRequest = Depends(),
 ):
     logger.info(f"获取当前用户信息: {current_user.email}")
-    request_id = getattr(request.state, 'request_id', None)
+    not_modified = conditional.evaluate(
+        "user", current_user.id, current_user.updated_at,
+        last_modified=current_user.updated_at,
+    )
+    if not_modified is not None:
+        return not_modified
+
     return ResponseModel(
         success=True,
         message="用户信息获取成功",
         data=current_user,
-        request_id=request_id
     )
 
 
 @router.put("/me", response_model=ResponseModel[UserRead])
 async def update_current_user(
-    request: Request,
     payload: UserUpdate,
     current_user: User = Depends(deps.get_current_active_user),
     session = Depends(deps.get_db),
@@ -73,48 +103,33 @@ async def update_current_user(
 
     await session.commit()
     await session.refresh(current_user)
+    user_summary_service.invalidate(current_user.id)
 
-    request_id = getattr(request.state, 'request_id', None)
     return ResponseModel(
         success=True,
         message="用户信息更新成功",
         data=current_user,
-        request_id=request_id
     )
 
 
 @router.get("/me/credit", response_model=ResponseModel[dict])
 async def get_credit_info(
-    request: Request,
     current_user: User = Depends(deps.get_current_active_user),
     session: AsyncSession = Depends(deps.get_db),
 ):
     """获取用户的信用评分详情"""
     try:
-        # 重新加载用户信息，包含 tasks_taken 和 tasks_created 关系
-        from sqlalchemy import select
-        from sqlalchemy.orm import selectinload
-        
-        stmt = (
-            select(User)
-            .where(User.id == current_user.id)
-            .options(
-                selectinload(User.tasks_taken),
-                selectinload(User.tasks_created)
-            )
-        )
-        result = await session.execute(stmt)
-        user_with_tasks = result.scalar_one()
-        
-        credit_info = await credit_service.assess_user_reliability(user_with_tasks)
+        # 任务统计由数据库分组计数得到，不再加载用户的全部任务
+        credit_info = await credit_service.assess_user_reliability(session, current_user)
 
-        request_id = getattr(request.state, 'request_id', None)
         return ResponseModel(
             success=True,
             message="信用信息获取成功",
             data={
-                "current_score": user_with_tasks.credit_score,
+                "current_score": current_user.credit_score,
                 "score_trend": credit_info['score_trend'],
+                "score_level": credit_info['score_level'],
+                "trend_value": round(current_user.credit_trend or 0.0, 4),
                 "completion_rates": {
                     "publish": credit_info['publish_completion_rate'],
                     "take": credit_info['take_completion_rate']
@@ -123,9 +138,8 @@ async def get_credit_info(
                     "published": credit_info['total_published'],
                     "taken": credit_info['total_taken']
                 },
-                "next_level_requirements": _get_next_level_requirements(user_with_tasks.credit_score)
+                "next_level_requirements": _get_next_level_requirements(current_user.credit_score)
             },
-            request_id=request_id
         )
     except Exception as e:
         import traceback
@@ -135,10 +149,21 @@ async def get_credit_info(
             success=False,
             message=f"获取信用信息失败: {str(e)}",
             data=None,
-            request_id=getattr(request.state, 'request_id', None)
         )
 
 
+@router.get("/me/credit/history", response_model=ResponseModel[CreditEventPage])
+async def get_credit_history(
+    current_user: User = Depends(deps.get_current_active_read_user),
+    session: AsyncSession = Depends(deps.get_read_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="上一页返回的 nextCursor"),
+):
+    """按时间倒序分页获取信用分变动记录"""
+    events, next_cursor = await credit_service.get_credit_history(session, current_user.id, limit, cursor)
+    return ResponseModel(data=CreditEventPage(items=events, next_cursor=next_cursor))
+
+
 def _get_next_level_requirements(current_score: float) -> dict:
     """获取升级到下一级所需的要求"""
     levels = [
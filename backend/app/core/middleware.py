@@ -0,0 +1,65 @@
+"""
+请求上下文中间件
+纯 ASGI 实现：生成请求 ID 并写入 ContextVar、按请求统计 SQL、记录 HTTP 指标。
+替代 @app.middleware("http")，BaseHTTPMiddleware 会为每个请求额外创建任务和内存流
+"""
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.request_context import request_id_var
+from app.core.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+from app.db import query_stats
+
+# 未匹配到路由的请求统一归为一个标签，避免任意路径导致指标基数膨胀
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestContextMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = f"req-{uuid.uuid4()}"
+        scope.setdefault("state", {})["request_id"] = request_id
+        request_id_token = request_id_var.set(request_id)
+        stats_token = query_stats.start(request_id)
+        stats = query_stats.current()
+        status_code = 500
+        start = time.perf_counter()
+        http_requests_in_flight.inc()
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                if settings.debug:
+                    headers.update(stats.headers())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            query_stats.finish(stats_token)
+            request_id_var.reset(request_id_token)
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            http_request_duration_seconds.observe(
+                time.perf_counter() - start, method=method, route=route_path
+            )
+            http_requests_total.inc(method=method, route=route_path, status=str(status_code))
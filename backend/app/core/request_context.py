@@ -0,0 +1,12 @@
+"""
+请求级上下文
+请求 ID 由 RequestContextMiddleware 写入 ContextVar，同一请求内的路由、异常处理和
+日志可直接读取，不再逐个从 request.state 取值
+"""
+from contextvars import ContextVar
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+def get_request_id() -> str | None:
+    return request_id_var.get()
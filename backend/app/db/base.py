@@ -1,3 +1,3 @@
 from app.db.base_class import Base
-from app.models import task, user, chat, evaluation, payment, appeal  # noqa: F401
+from app.models import task, user, chat, evaluation, payment, appeal, search, place, idempotency, settlement, credit, scheduled_job  # noqa: F401
 
@@ -0,0 +1,86 @@
+"""
+数据库迁移
+表结构由 migrations/ 下的 Alembic 迁移管理，启动时按 DB_BOOT_MODE 处理：
+  check   只查询 alembic_version 并与迁移脚本的 head 比较，不一致时拒绝启动
+  migrate 在启动进程内升级到最新版本
+  create  直接按模型建表，不记录版本（测试和临时数据库）
+"""
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.base import Base
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+# 引入迁移之前 create_all 建出的表结构对应的版本
+BASELINE_REVISION = "0001"
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def alembic_config(connection: Connection | None = None) -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    # 在应用内执行时沿用应用的日志配置
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revisions() -> set[str]:
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+def current_revisions(connection: Connection) -> set[str]:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def _upgrade(connection: Connection) -> None:
+    config = alembic_config(connection)
+    if not current_revisions(connection) and inspect(connection).has_table("user"):
+        # 由 create_all 建出的旧库：表已存在但没有版本记录，先标记为基线版本
+        logger.info("检测到未记录迁移版本的数据库，标记为 %s", BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+def _check(connection: Connection) -> None:
+    current = current_revisions(connection)
+    expected = head_revisions()
+    if current != expected:
+        raise SchemaVersionError(
+            f"数据库版本 {sorted(current) or '（未初始化）'} 与迁移脚本 {sorted(expected)} 不一致，"
+            "请先在 backend 目录执行 alembic upgrade head"
+        )
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade)
+
+
+async def check(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        await conn.run_sync(_check)
+
+
+async def prepare_schema(engine: AsyncEngine, mode: str) -> None:
+    if mode == "create":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    elif mode == "migrate":
+        await upgrade(engine)
+    else:
+        await check(engine)
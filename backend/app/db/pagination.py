@@ -0,0 +1,71 @@
+"""
+游标分页
+游标编码上一页最后一条记录的位置，下一页从该位置之后开始读取，
+翻到任意深度都只读取一页的行数：
+  keyset_page  按 (created_at, id) 倒序，配合 (过滤列, created_at) 联合索引
+  id_page      按主键升序，用于没有筛选条件的全表列表
+任务增量同步的水位线同样用 encode_cursor 编码 (updated_at, id)
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_position(value: datetime, row_id: int) -> str:
+    raw = f"{value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+
+def encode_cursor(row, column: str = "created_at") -> str:
+    return encode_position(getattr(row, column), row.id)
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
+async def keyset_page(
+    db: AsyncSession, stmt: Select, model, limit: int, cursor: str | None = None
+) -> tuple[list, str | None]:
+    """按 model.created_at、model.id 倒序返回一页记录和下一页游标，没有下一页时游标为 None"""
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id),
+        ))
+    rows = list((await db.execute(stmt)).scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
+
+
+def _decode_id(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii"))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
+async def id_page(
+    db: AsyncSession, stmt: Select, model, limit: int, cursor: str | None = None
+) -> tuple[list, str | None]:
+    """按 model.id 升序返回一页记录和下一页游标，没有下一页时游标为 None"""
+    stmt = stmt.order_by(model.id).limit(limit + 1)
+    if cursor is not None:
+        stmt = stmt.where(model.id > _decode_id(cursor))
+    rows = list((await db.execute(stmt)).scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, base64.urlsafe_b64encode(str(rows[-1].id).encode("ascii")).decode("ascii")
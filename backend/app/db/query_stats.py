@@ -0,0 +1,94 @@
+"""
+按请求统计 SQL 执行情况
+引擎事件记录每条语句的耗时，累加到当前请求的统计对象中（通过 ContextVar 关联请求），
+超过 slow_query_threshold_ms 的语句写入结构化慢查询日志
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+_MAX_LOGGED_STATEMENT = 2000
+_START_KEY = "query_stats_start"
+
+
+@dataclass
+class QueryStats:
+    request_id: str | None = None
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str | None = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Query-Time-Ms": f"{self.total_seconds * 1000:.2f}",
+            "X-DB-Slowest-Query-Ms": f"{self.slowest_seconds * 1000:.2f}",
+        }
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start(request_id: str | None = None) -> Token:
+    """开始统计当前请求，返回的 token 交给 finish 恢复上下文"""
+    return _current.set(QueryStats(request_id=request_id))
+
+
+def finish(token: Token) -> None:
+    _current.reset(token)
+
+
+def current() -> QueryStats | None:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= settings.slow_query_threshold_ms:
+        # 参数可能包含个人信息，只记录语句本身
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "request_id": stats.request_id if stats is not None else None,
+            "duration_ms": round(elapsed * 1000, 2),
+            "executemany": executemany,
+            "statement": " ".join(statement.split())[:_MAX_LOGGED_STATEMENT],
+        }, ensure_ascii=False))
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed_start(exception_context) -> None:
+    # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_START_KEY):
+        conn.info[_START_KEY].pop()
@@ -1,12 +1,143 @@
+"""
+数据库引擎与会话
+按数据库类型构造引擎：MySQL 使用可配置的连接池并在取用前探活，SQLite 在建立连接时
+开启 WAL 等 PRAGMA；连接池记录获取连接的等待时间。
+读请求可路由到只读副本，副本不可用或用户刚写入时回退到主库。
+"""
+import asyncio
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
 
 from app.core.config import settings
+from app.core.metrics import db_pool_checkout_wait_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """连接池获取连接的等待统计，等待时间包含池未满时新建连接的耗时"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        if not timed_out:
+            db_pool_checkout_wait_seconds.observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def snapshot(self, pool: Pool | None = None) -> dict:
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            data.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return data
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """记录每次从连接池取连接的等待时间和超时次数"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return connection
+
 
-engine = create_async_engine(settings.database_url, echo=settings.echo_sql)
+def _is_sqlite_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL 允许读写并发；synchronous=NORMAL 在 WAL 下仍保证崩溃一致性
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    finally:
+        cursor.close()
+
+
+def build_engine(database_url: str) -> AsyncEngine:
+    url = make_url(database_url)
+    options: dict = {"echo": settings.echo_sql}
+
+    if url.get_backend_name() == "sqlite":
+        if not _is_sqlite_memory(url):
+            options.update(
+                poolclass=InstrumentedQueuePool,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+            )
+        engine = create_async_engine(url, **options)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return engine
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return create_async_engine(url, **options)
+
+
+engine = build_engine(settings.database_url)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -19,3 +150,152 @@ async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
 
+
+def sticky_key(authorization: str | None) -> str | None:
+    """以认证凭据的摘要标识写入者，不在内存中保存原始 token"""
+    if not authorization:
+        return None
+    return hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
+
+
+class ReplicaRouter:
+    """
+    读写分离路由
+    读会话轮询分配到健康的副本，全部不可用时回退主库；用户写入提交后的
+    read_your_writes_seconds 内其读请求固定走主库，避免复制延迟读不到自己的修改。
+    粘滞状态保存在进程内，多 worker 部署时只对同一 worker 上的后续请求生效。
+    """
+
+    def __init__(self, read_urls: list[str]) -> None:
+        self.engines = [build_engine(url) for url in read_urls]
+        self._sessionmakers = [
+            async_sessionmaker(replica, expire_on_commit=False, class_=AsyncSession)
+            for replica in self.engines
+        ]
+        self._healthy = [True] * len(self.engines)
+        self._round_robin = itertools.count()
+        self._checked_at = 0.0
+        self._sticky: dict[str, float] = {}
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self.engines)
+
+    def healthy_count(self) -> int:
+        return sum(self._healthy)
+
+    async def _ping(self, index: int) -> bool:
+        try:
+            async with self.engines[index].connect() as conn:
+                await asyncio.wait_for(
+                    conn.execute(text("SELECT 1")),
+                    timeout=settings.replica_health_check_timeout,
+                )
+            return True
+        except Exception as exc:
+            logger.warning("只读副本 %d 健康检查失败: %s", index, exc)
+            return False
+
+    async def check_health(self, force: bool = False) -> list[bool]:
+        """按 replica_health_check_interval 节流检查副本连通性"""
+        now = time.monotonic()
+        if force or now - self._checked_at >= settings.replica_health_check_interval:
+            self._checked_at = now
+            self._healthy = list(await asyncio.gather(
+                *(self._ping(index) for index in range(len(self.engines)))
+            ))
+        return self._healthy
+
+    def mark_unhealthy(self, index: int) -> None:
+        if self._healthy[index]:
+            logger.warning("只读副本 %d 查询失败，暂时回退主库", index)
+        self._healthy[index] = False
+
+    def mark_written(self, key: str) -> None:
+        now = time.monotonic()
+        self._sticky[key] = now + settings.read_your_writes_seconds
+        if len(self._sticky) > 10_000:
+            self._sticky = {k: until for k, until in self._sticky.items() if until > now}
+
+    def is_sticky(self, key: str | None) -> bool:
+        if key is None:
+            return False
+        until = self._sticky.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            self._sticky.pop(key, None)
+            return False
+        return True
+
+    async def choose(self, key: str | None) -> int | None:
+        """返回本次读请求使用的副本下标，None 表示使用主库"""
+        if not self.engines or self.is_sticky(key):
+            return None
+        healthy = [index for index, ok in enumerate(await self.check_health()) if ok]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def sessionmaker(self, index: int | None) -> async_sessionmaker:
+        return AsyncSessionLocal if index is None else self._sessionmakers[index]
+
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+
+replica_router = ReplicaRouter(settings.database_read_urls)
+
+_STICKY_KEY = "sticky_key"
+_WROTE_FLAG = "wrote"
+_SESSION_INFO_OPTION = "sticky_session_info"
+
+
+@asynccontextmanager
+async def write_session(key: str | None = None) -> AsyncIterator[AsyncSession]:
+    """主库会话，key 标识写入者，提交写入后该写入者的读请求短时间内走主库"""
+    async with AsyncSessionLocal() as session:
+        session.info[_STICKY_KEY] = key
+        yield session
+
+
+@asynccontextmanager
+async def read_session(key: str | None = None) -> AsyncIterator[AsyncSession]:
+    """只读会话，优先使用健康的只读副本"""
+    index = await replica_router.choose(key)
+    async with replica_router.sessionmaker(index)() as session:
+        try:
+            yield session
+        except DBAPIError as exc:
+            # 副本连接失败时在下一次健康检查前不再分配读请求
+            if index is not None and exc.connection_invalidated:
+                replica_router.mark_unhealthy(index)
+            raise
+
+
+@event.listens_for(Session, "after_begin")
+def _track_session_writes(session: Session, transaction, connection) -> None:
+    # 会话的每个事务使用新取出的连接，在连接上记下会话，语句执行时据此找到会话
+    if session.info.get(_STICKY_KEY):
+        connection.execution_options(**{_SESSION_INFO_OPTION: session.info})
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _mark_session_wrote(conn, cursor, statement, parameters, context, executemany) -> None:
+    # flush 之外，会话上执行的 Core insert/update/delete 以及直接在 session.connection()
+    # 上执行的写入都不经过 after_flush，按实际执行的语句判断本事务是否写入
+    info = conn.get_execution_options().get(_SESSION_INFO_OPTION)
+    if info is not None and (context.isinsert or context.isupdate or context.isdelete):
+        info[_WROTE_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _stick_writer_to_primary(session: Session) -> None:
+    if session.info.pop(_WROTE_FLAG, False):
+        replica_router.mark_written(session.info[_STICKY_KEY])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_session_wrote(session: Session) -> None:
+    session.info.pop(_WROTE_FLAG, None)
@@ -0,0 +1,51 @@
+"""
+按方言构造的 upsert 语句
+钱包余额、流水月度汇总等计数类数据用单条 INSERT ... ON CONFLICT / ON DUPLICATE KEY
+完成“不存在则创建，存在则累加”，不需要先查询再决定插入还是更新。
+语句只声明列，取值在执行时以参数传入：编译结果可以缓存，
+传入参数列表时即为一次 executemany
+"""
+from typing import Iterable
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+
+def _insert(dialect: str, model):
+    if dialect == "mysql":
+        return mysql.insert(model)
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def insert_ignore(dialect: str, model):
+    """插入一行，主键或唯一键冲突时不做任何修改"""
+    stmt = _insert(dialect, model)
+    if dialect == "mysql":
+        return stmt.prefix_with("IGNORE")
+    return stmt.on_conflict_do_nothing()
+
+
+def insert_or_increment(
+    dialect: str,
+    model,
+    key: Iterable[str],
+    increments: Iterable[str],
+    overwrites: Iterable[str] = (),
+):
+    """
+    插入一行；key 列对应的行已存在时，increments 中的列在原值上累加本次传入的值，
+    overwrites 中的列直接覆盖
+    """
+    stmt = _insert(dialect, model)
+    new = stmt.inserted if dialect == "mysql" else stmt.excluded
+    changes = {
+        **{column: getattr(model, column) + new[column] for column in increments},
+        **{column: new[column] for column in overwrites},
+    }
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(**changes)
+    return stmt.on_conflict_do_update(
+        index_elements=[getattr(model, column) for column in key],
+        set_=changes,
+    )
@@ -1,5 +1,4 @@
 import asyncio
-import uuid
 from typing import Dict, Any
 
 from contextlib import asynccontextmanager
@@ -9,23 +8,42 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
+from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
 from app.api.router import api_router
 from app.core.config import settings
-from app.db.base import Base
-from app.db.session import engine
+from app.core.middleware import RequestContextMiddleware
+from app.core.responses import FastJSONResponse
+from app.db import migrations
+from app.db.session import engine, replica_router
 from app.schemas.response import ResponseModel, ErrorResponse
-from app.services.task_cleanup_service import start_cleanup_scheduler
+from app.services import settlement_service, warmup_service
+from app.services.task_cleanup_service import scheduler_state, start_cleanup_scheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
+    # 表结构由 Alembic 迁移管理，默认只核对版本号
+    await migrations.prepare_schema(engine, settings.db_boot_mode)
+
     # 启动定时清理任务
-    asyncio.create_task(start_cleanup_scheduler())
+    scheduler_state.task = asyncio.create_task(start_cleanup_scheduler())
+    # 启动任务赏金批量结算
+    settlement_service.settlement_state.task = asyncio.create_task(settlement_service.run_settlement_worker())
+
+    # 预热完成后 /readyz 才会返回就绪
+    app.state.warmed_up = False
+    await warmup_service.warm_up()
+    app.state.warmed_up = True
     yield
+    scheduler_state.task.cancel()
+    settlement_service.settlement_state.task.cancel()
+    await replica_router.dispose()
 
-app = FastAPI(title=settings.project_name, lifespan=lifespan)
+app = FastAPI(
+    title=settings.project_name,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,20 +52,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-@app.middleware("http")
-async def add_request_id(request: Request, call_next):
-    """为每个请求添加请求ID"""
-    request_id = f"req-{uuid.uuid4()}"
-    request.state.request_id = request_id
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
+# 最后添加的中间件在最外层，CORS 预检请求同样会被记录
+app.add_middleware(RequestContextMiddleware)
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     error_response = ErrorResponse.from_http_exception(exc.status_code, exc.detail)
-    error_response.request_id = getattr(request.state, 'request_id', None)
     
     return JSONResponse(
         status_code=exc.status_code,
@@ -56,8 +66,7 @@ async def http_exception_handler(request, exc):
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
-    error_response = ErrorResponse.from_validation_error(exc.errors)
-    error_response.request_id = getattr(request.state, 'request_id', None)
+    error_response = ErrorResponse.from_validation_error(exc.errors())
     
     return JSONResponse(
         status_code=422,
@@ -71,6 +80,7 @@ async def general_exception_handler(request, exc):
     print(f"服务器内部错误: {error_detail}")  # 打印到控制台
     
     error_response = ErrorResponse.from_general_exception()
+    # 未处理异常由最外层的 ServerErrorMiddleware 处理，此时请求上下文已退出，从 scope 中读取
     error_response.request_id = getattr(request.state, 'request_id', None)
     error_response.details = str(exc) if hasattr(exc, 'detail') else "Internal server error"
     
@@ -85,4 +95,6 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
-app.include_router(api_router, prefix=settings.api_prefix)
\ No newline at end of file
+app.include_router(api_router, prefix=settings.api_prefix)
+app.include_router(health_router)
+app.include_router(metrics_router)
\ No newline at end of file
@@ -4,4 +4,5 @@ from .chat import Message  # noqa: F401
 from .evaluation import Evaluation  # noqa: F401
 from .payment import Wallet, Transaction  # noqa: F401
 from .appeal import Appeal  # noqa: F401
-
+from .search import TaskSearchToken  # noqa: F401
+from .place import Place  # noqa: F401
@@ -5,8 +5,8 @@ from app.db.base_class import Base
 
 class Appeal(Base):
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("task.id"), nullable=False)
-    creator_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    task_id = Column(Integer, ForeignKey("task.id"), nullable=False, index=True)
+    creator_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
     reason = Column(Text, nullable=False)
     status = Column(String(20), default="pending")  # 'pending', 'processing', 'resolved', 'rejected'
     admin_reply = Column(Text, nullable=True)
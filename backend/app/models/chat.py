@@ -1,17 +1,22 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text, Boolean
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text, Boolean
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
 class Message(Base):
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("task.id", ondelete="CASCADE"), nullable=False)
-    sender_id = Column(Integer, ForeignKey("user.id"), nullable=False)
-    receiver_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
+    receiver_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
     content = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # 聊天记录按任务查询并按时间排序
+    __table_args__ = (
+        Index("ix_message_task_id_created_at", "task_id", "created_at"),
+    )
+
     task = relationship("Task")
     sender = relationship("User", foreign_keys=[sender_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
+
+from app.db.base_class import Base
+
+
+class CreditEvent(Base):
+    """
+    信用分变动记录，只追加不修改
+    每次变动与 user.credit_score、user.credit_trend 的更新在同一事务中写入
+    """
+    __tablename__ = "credit_event"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    # 实际生效的变化值（已按 0-5 的范围截断）与变动后的信用分
+    delta = Column(Float, nullable=False)
+    score_after = Column(Float, nullable=False)
+    # task_completed_publisher / task_completed_assignee / task_cancelled_publisher /
+    # task_cancelled_assignee / evaluation
+    reason = Column(String(40), nullable=False)
+    task_id = Column(Integer, ForeignKey("task.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # 按用户倒序翻页的变动历史
+        Index("ix_credit_event_user_id_created_at", "user_id", "created_at"),
+    )
@@ -1,11 +1,11 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text, Float
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text, Float
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
 class Evaluation(Base):
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("task.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(Integer, ForeignKey("task.id", ondelete="CASCADE"), nullable=False, index=True)
     evaluator_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     evaluatee_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     score = Column(Float, nullable=False)
@@ -15,3 +15,8 @@ class Evaluation(Base):
     task = relationship("Task")
     evaluator = relationship("User", foreign_keys=[evaluator_id])
     evaluatee = relationship("User", foreign_keys=[evaluatee_id])
+
+    __table_args__ = (
+        # 按被评价人倒序翻页的评价列表
+        Index("ix_evaluation_evaluatee_id_created_at", "evaluatee_id", "created_at"),
+    )
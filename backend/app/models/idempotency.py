@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String, UniqueConstraint
+
+from app.db.base_class import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key 记录，(user_id, key) 唯一
+    首个请求开始处理时写入（status_code 为空），完成后保存响应，重复请求直接重放
+    locked_at 为占位时间，处理进程崩溃留下的占位超过处理超时后可由重试的请求接管
+    """
+    __tablename__ = "idempotency_key"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # 方法、路径和请求体的摘要，同一 key 不能用于不同请求
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_key_user_id_key"),
+    )
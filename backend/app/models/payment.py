@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Float
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, String, Float
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -20,3 +20,33 @@ class Transaction(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     user = relationship("User")
+
+    __table_args__ = (
+        # 按用户倒序翻页的流水查询
+        Index("ix_transaction_user_id_created_at", "user_id", "created_at"),
+    )
+
+
+class TransactionMonthlyTotal(Base):
+    """按用户、自然月（UTC）、流水类型汇总的金额与笔数，与流水在同一事务中累加"""
+    __tablename__ = "transaction_monthly_total"
+
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # 当月 1 日
+    type = Column(String(20), primary_key=True)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class WalletSnapshot(Base):
+    """
+    钱包余额检查点：created_at 早于 checkpoint_at 的流水合计为 balance
+    对账时只需累加检查点之后的流水，last_transaction_id 为已计入的最大流水 id
+    """
+    __tablename__ = "wallet_snapshot"
+
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    balance = Column(Float, nullable=False)
+    checkpoint_at = Column(DateTime, nullable=False)
+    last_transaction_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from app.db.base_class import Base
+
+
+class Place(Base):
+    """地点字典，任务的取件/送达地点引用其 id"""
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(120), nullable=False)  # 首次出现时的原始名称，用于展示
+    normalized_name = Column(String(120), unique=True, index=True, nullable=False)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
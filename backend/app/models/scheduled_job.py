@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String
+
+from app.db.base_class import Base
+
+
+class ScheduledJob(Base):
+    """
+    多个 worker 共享的定时任务调度记录
+    到期后由条件更新推后 next_run_at，只有更新成功的 worker 执行本次任务
+    """
+    __tablename__ = "scheduled_job"
+
+    name = Column(String(64), primary_key=True)
+    next_run_at = Column(DateTime, nullable=False)
+    last_run_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
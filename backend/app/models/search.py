@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Enum as SQLEnum, ForeignKey, Index, Integer, String
+
+from app.db.base_class import Base
+from app.models.task import TaskStatus
+
+
+class TaskSearchToken(Base):
+    """任务标题/描述的倒排索引（二元分词），每个 (token, 任务) 一行"""
+    __tablename__ = "task_search_token"
+
+    token = Column(String(8), primary_key=True)
+    task_id = Column(Integer, ForeignKey("task.id", ondelete="CASCADE"), primary_key=True)
+    weight = Column(Integer, nullable=False)  # 标题中出现记 3 分，描述中出现记 1 分
+    status = Column(SQLEnum(TaskStatus), nullable=False)  # 冗余任务状态，搜索时可直接在索引内筛选
+
+    __table_args__ = (
+        Index("ix_task_search_token_token_status", "token", "status"),
+        Index("ix_task_search_token_task_id", "task_id"),
+    )
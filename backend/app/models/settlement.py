@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
+
+from app.db.base_class import Base
+
+
+class SettlementQueue(Base):
+    """
+    待结算的任务赏金，任务完成时与状态变更在同一事务中写入
+    每个任务最多一行（task_id 唯一），结算后写入 settled_at；
+    单独结算仍失败时累加 attempts，达到上限后不再参与结算，等待人工处理
+    """
+    __tablename__ = "settlement_queue"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey("task.id", ondelete="CASCADE"), nullable=False, unique=True)
+    payee_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    amount = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    settled_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        # 结算任务按 id 顺序扫描未结算的记录
+        Index("ix_settlement_queue_settled_at_id", "settled_at", "id"),
+    )
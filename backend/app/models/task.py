@@ -52,6 +52,14 @@ class Task(Base):
     dropoff_lat: Mapped[Optional[float]] = mapped_column(nullable=True)
     dropoff_lng: Mapped[Optional[float]] = mapped_column(nullable=True)
 
+    # 地点字典引用，地点筛选走整数索引而不是子串扫描
+    pickup_place_id: Mapped[int | None] = mapped_column(
+        ForeignKey("place.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    dropoff_place_id: Mapped[int | None] = mapped_column(
+        ForeignKey("place.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+
     status: Mapped[TaskStatus] = mapped_column(
         SQLEnum(TaskStatus), default=TaskStatus.pending, index=True
     )
@@ -62,20 +70,20 @@ class Task(Base):
         DateTime, default=datetime.utcnow, nullable=False, index=True
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
-    )
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )  # 增量同步水位线
 
     # 添加索引以提高查询性能
     __table_args__ = (
         Index('ix_task_status_created_at', 'status', 'created_at'),
-        Index('ix_task_grab_expires_at', 'grab_expires_at'),
     )
 
+    # “我发布的/我接单的”按这两列筛选
     created_by_id: Mapped[int] = mapped_column(
-        ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True
     )
     assigned_to_id: Mapped[int | None] = mapped_column(
-        ForeignKey("user.id", ondelete="SET NULL"), nullable=True
+        ForeignKey("user.id", ondelete="SET NULL"), nullable=True, index=True
     )
 
     created_by = relationship(
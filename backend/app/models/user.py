@@ -18,7 +18,13 @@ class User(Base):
     verified = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     credit_score = Column(Float, default=3.5)
+    # 信用分变化值的指数加权移动平均，随每条 credit_event 增量更新，正数表示上升
+    credit_trend = Column(Float, default=0.0, server_default="0", nullable=False)
+    # 收到的评价分数合计与条数，随评价在同一事务中累加，平均分不再对评价表求 AVG
+    rating_sum = Column(Float, default=0.0, server_default="0", nullable=False)
+    rating_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     tasks_created = relationship(
         "Task",
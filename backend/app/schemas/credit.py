@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from app.schemas.base import CamelModel
+
+
+class CreditEventRead(CamelModel):
+    id: int
+    delta: float
+    score_after: float
+    reason: str
+    task_id: int | None = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CreditEventPage(CamelModel):
+    """按时间倒序的一页信用分变动记录"""
+    items: list[CreditEventRead] = []
+    next_cursor: str | None = None  # 为空表示没有更多记录，否则作为 cursor 传回获取下一页
@@ -27,3 +27,5 @@ class UserEvaluationSummary(CamelModel):
     average_score: float
     total_evaluations: int
     evaluations: List[EvaluationRead]
+    # 下一页评价的游标，没有更多评价时为 null
+    next_cursor: Optional[str] = None
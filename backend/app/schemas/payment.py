@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 from pydantic import Field
 from app.schemas.base import CamelModel
 
@@ -26,6 +26,25 @@ class TransactionRead(CamelModel):
     class Config:
         from_attributes = True
 
+class TransactionPage(CamelModel):
+    """按时间倒序的一页流水"""
+    items: List[TransactionRead] = []
+    next_cursor: Optional[str] = None  # 为空表示没有更多记录，否则作为 cursor 传回获取下一页
+
+class TransactionMonthlyTotalRead(CamelModel):
+    month: date  # 当月 1 日（UTC）
+    type: str
+    total_amount: float
+    count: int
+
+    class Config:
+        from_attributes = True
+
 class PaymentRequest(CamelModel):
     task_id: int
-    amount: float
+    # 负数金额会让扣款变成入账
+    amount: float = Field(..., gt=0)
+
+class SettleRequest(CamelModel):
+    """管理员补登任务赏金，金额和收款人以任务本身为准"""
+    task_id: int
@@ -1,7 +1,9 @@
-from typing import Generic, TypeVar, Optional, Any, Dict, List
+import json
+from typing import Generic, TypeVar, Optional, Any, Dict, List, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from app.core.request_context import get_request_id
 from app.schemas.base import CamelModel
 
 T = TypeVar('T')
@@ -13,7 +15,31 @@ class ResponseModel(CamelModel, Generic[T]):
     message: str = ""
     data: Optional[T] = None
     code: int = 200
-    request_id: Optional[str] = None  # 添加请求ID，便于追踪
+    # 请求ID，便于追踪；默认取当前请求上下文中的 ID
+    request_id: Optional[str] = Field(default_factory=get_request_id)
+
+
+def render_response_body(
+    data_json: bytes,
+    message: str = "",
+    request_id: Optional[str] = None,
+    success: bool = True,
+    code: int = 200,
+) -> bytes:
+    """
+    将已序列化的 data 拼接为 ResponseModel 的 JSON 结构
+    字段顺序与 ResponseModel 一致，data 部分不再重复校验和序列化
+    """
+    if request_id is None:
+        request_id = get_request_id()
+    return b"".join((
+        b'{"success":', b"true" if success else b"false",
+        b',"message":', json.dumps(message, ensure_ascii=False).encode("utf-8"),
+        b',"data":', data_json,
+        b',"code":', str(code).encode("ascii"),
+        b',"requestId":', json.dumps(request_id).encode("utf-8"),
+        b"}",
+    ))
 
 
 class OperationResponse(CamelModel):
@@ -27,7 +53,7 @@ class OperationResponse(CamelModel):
 
 class ValidationErrorDetail(CamelModel):
     """验证错误详情"""
-    loc: List[str]
+    loc: List[Union[str, int]]
     msg: str
     type: str
     input: Optional[Any] = None
@@ -40,7 +66,7 @@ class ErrorResponse(CamelModel):
     code: int = 400
     error_type: Optional[str] = None
     details: Optional[Any] = None
-    request_id: Optional[str] = None
+    request_id: Optional[str] = Field(default_factory=get_request_id)
 
     @classmethod
     def from_validation_error(cls, errors: List[Dict[str, Any]]) -> 'ErrorResponse':
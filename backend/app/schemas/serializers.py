@@ -0,0 +1,47 @@
+"""
+列表接口的快速序列化
+直接从查询得到的列元组构建与 TaskRead / UserRead 相同结构的字典，
+跳过 ORM 对象构建和 Pydantic 的重复校验
+"""
+from typing import Any, Sequence
+
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.task import TaskRead
+from app.schemas.user import UserRead
+
+_NESTED_TASK_FIELDS = ("created_by", "assigned_to")
+
+USER_READ_FIELDS = tuple(UserRead.model_fields)
+TASK_READ_FIELDS = tuple(
+    name for name in TaskRead.model_fields if name not in _NESTED_TASK_FIELDS
+)
+
+# 与字段一一对应的列，用于 select(*TASK_READ_COLUMNS)
+USER_READ_COLUMNS = tuple(getattr(User, name) for name in USER_READ_FIELDS)
+TASK_READ_COLUMNS = tuple(getattr(Task, name) for name in TASK_READ_FIELDS)
+
+_USER_ID_INDEX = USER_READ_FIELDS.index("id")
+_USER_KEYS = tuple(UserRead.model_fields[name].alias or name for name in USER_READ_FIELDS)
+_TASK_KEYS = tuple(TaskRead.model_fields[name].alias or name for name in TASK_READ_FIELDS)
+_CREATED_BY_KEY = TaskRead.model_fields["created_by"].alias or "created_by"
+_ASSIGNED_TO_KEY = TaskRead.model_fields["assigned_to"].alias or "assigned_to"
+
+
+def user_row(values: Sequence[Any]) -> dict[str, Any] | None:
+    """USER_READ_COLUMNS 顺序的列值 -> UserRead 结构；外连接未命中时返回 None"""
+    if values[_USER_ID_INDEX] is None:
+        return None
+    return dict(zip(_USER_KEYS, values))
+
+
+def task_row(
+    values: Sequence[Any],
+    created_by: dict[str, Any] | None = None,
+    assigned_to: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """TASK_READ_COLUMNS 顺序的列值 -> TaskRead 结构"""
+    row = dict(zip(_TASK_KEYS, values))
+    row[_CREATED_BY_KEY] = created_by
+    row[_ASSIGNED_TO_KEY] = assigned_to
+    return row
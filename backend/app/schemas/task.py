@@ -40,4 +40,19 @@ class TaskRead(TaskBase):
     created_at: datetime
     updated_at: datetime | None = None
     created_by: UserRead | None = None
-    assigned_to: UserRead | None = None
\ No newline at end of file
+    assigned_to: UserRead | None = None
+
+
+class TaskTombstone(CamelModel):
+    """已不再满足筛选条件的任务（客户端应从本地缓存中移除）"""
+    id: int
+    status: TaskStatus
+    updated_at: datetime | None = None
+
+
+class TaskChanges(CamelModel):
+    """增量同步结果"""
+    changed: list[TaskRead] = []
+    removed: list[TaskTombstone] = []
+    watermark: str | None = None  # 不透明游标，下次请求时作为 since 传回
+    has_more: bool = False
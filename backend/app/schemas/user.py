@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import EmailStr
+from pydantic import EmailStr, Field
 
 from app.schemas.base import CamelModel
 
@@ -30,3 +30,23 @@ class UserRead(UserBase):
     created_at: datetime
 
 
+class UserPage(CamelModel):
+    """按 id 升序的一页用户"""
+    items: list[UserRead] = []
+    next_cursor: str | None = None  # 为空表示没有更多记录，否则作为 cursor 传回获取下一页
+
+
+class UserSummaryRequest(CamelModel):
+    user_ids: list[int] = Field(..., min_length=1, max_length=100)
+
+
+class UserSummary(CamelModel):
+    """列表中展示的用户资料摘要"""
+    id: int
+    full_name: str
+    avatar_url: str | None = None
+    credit_score: float
+    rating_average: float
+    rating_count: int
+    completed_published: int
+    completed_taken: int
@@ -1,12 +1,36 @@
 """
 智能信用评分服务
 基于任务类型、复杂度、行为历史等因素动态计算信用评分
+
+信用面板中的任务统计按角色各执行一次 COUNT(*) ... GROUP BY status，
+结果按用户缓存；任务新建、删除或状态、接单人变化提交后，相关用户的缓存失效，
+这些变化同时改变信用分和完成数，用户资料摘要的缓存一并失效
 """
 
+from itertools import chain
 from typing import Dict, Optional
 from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.pagination import keyset_page
+from app.models.credit import CreditEvent
 from app.models.user import User
 from app.models.task import Task, TaskStatus, TaskCategory, TaskUrgency
+from app.services import user_summary_service
+
+_SESSION_KEY = "credit_stats_users"
+
+# 多进程部署时其他 worker 的写入无法通知到本进程，TTL 限定了最长的陈旧时间
+task_stats_cache = LRUCache(
+    maxsize=settings.credit_stats_cache_size,
+    ttl=settings.credit_stats_cache_ttl_seconds,
+    name="credit_stats",
+)
 
 
 class CreditScoringService:
@@ -34,26 +58,37 @@ class CreditScoringService:
         
         return base_scores.get(f'task_{action}_{user_role}', 0.0)
 
-    async def assess_user_reliability(self, user: User) -> Dict[str, any]:
+    async def task_status_counts(self, db: AsyncSession, user_id: int) -> Dict[str, Dict[str, int]]:
+        """用户作为发布者和接单者的任务按状态计数，结果带缓存"""
+        counts = task_stats_cache.get(user_id)
+        if counts is not None:
+            return counts
+
+        counts = {}
+        for role, column in (('published', Task.created_by_id), ('taken', Task.assigned_to_id)):
+            result = await db.execute(
+                select(Task.status, func.count()).where(column == user_id).group_by(Task.status)
+            )
+            counts[role] = {TaskStatus(status).value: count for status, count in result.all()}
+        task_stats_cache.set(user_id, counts)
+        return counts
+
+    async def assess_user_reliability(self, db: AsyncSession, user: User) -> Dict[str, any]:
         """
         评估用户可靠性
 
         Returns:
             包含各种统计信息的字典
         """
-        from app.models.task import TaskStatus
-        
-        # 获取用户的所有任务
-        published_tasks = getattr(user, 'tasks_created', [])
-        taken_tasks = getattr(user, 'tasks_taken', [])
-        
+        counts = await self.task_status_counts(db, user.id)
+
         # 计算完成率
-        published_completed = sum(1 for t in published_tasks if t.status == TaskStatus.completed)
-        published_total = len(published_tasks)
+        published_completed = counts['published'].get(TaskStatus.completed.value, 0)
+        published_total = sum(counts['published'].values())
         publish_completion_rate = published_completed / published_total if published_total > 0 else 0
 
-        taken_completed = sum(1 for t in taken_tasks if t.status == TaskStatus.completed)
-        taken_total = len(taken_tasks)
+        taken_completed = counts['taken'].get(TaskStatus.completed.value, 0)
+        taken_total = sum(counts['taken'].values())
         take_completion_rate = taken_completed / taken_total if taken_total > 0 else 0
 
         return {
@@ -63,14 +98,23 @@ class CreditScoringService:
             'total_taken': taken_total,
             'current_score': user.credit_score,
             'score_trend': self._calculate_score_trend(user),
+            'score_level': self._calculate_score_level(user),
         }
 
     def _calculate_score_trend(self, user: User) -> str:
         """
-        计算用户评分趋势
-        这里可以基于历史数据计算是上升、下降还是稳定
+        根据信用分变化值的指数加权平均判断趋势，
+        该值随每次变动增量更新，读取时不需要回放历史记录
         """
-        # 简化实现，实际应该基于历史记录
+        trend = user.credit_trend or 0.0
+        if trend > settings.credit_trend_threshold:
+            return 'rising'     # 上升
+        elif trend < -settings.credit_trend_threshold:
+            return 'falling'    # 下降
+        return 'stable'         # 稳定
+
+    def _calculate_score_level(self, user: User) -> str:
+        """按当前信用分划分的等级"""
         if user.credit_score >= 4.0:
             return 'excellent'  # 优秀
         elif user.credit_score >= 3.0:
@@ -80,6 +124,13 @@ class CreditScoringService:
         else:
             return 'poor'       # 较差
 
+    async def get_credit_history(
+        self, db: AsyncSession, user_id: int, limit: int = 20, cursor: str | None = None
+    ) -> tuple[list[CreditEvent], str | None]:
+        """按时间倒序返回一页信用分变动记录和下一页游标"""
+        stmt = select(CreditEvent).where(CreditEvent.user_id == user_id)
+        return await keyset_page(db, stmt, CreditEvent, limit, cursor)
+
     def can_accept_task(self, user: User, task: Task) -> Dict[str, any]:
         """
         判断用户是否有资格接取任务
@@ -115,6 +166,34 @@ class CreditScoringService:
         }
 
 
+@event.listens_for(Session, "after_flush")
+def _collect_task_users(session: Session, flush_context) -> None:
+    # after_flush 中 new/dirty/deleted 仍是 flush 前的状态，属性历史仍可读取
+    users = session.info.setdefault(_SESSION_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Task):
+            continue
+        state = inspect(obj)
+        status = state.attrs.status.history
+        assignee = state.attrs.assigned_to_id.history
+        if obj in session.dirty and not (status.has_changes() or assignee.has_changes()):
+            continue
+        users.add(obj.created_by_id)
+        # 更换或清空接单人时，原接单人的统计同样变化
+        users.update(assignee.sum())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_task_stats(session: Session) -> None:
+    for user_id in session.info.pop(_SESSION_KEY, ()):
+        if user_id is not None:
+            task_stats_cache.invalidate(user_id)
+            user_summary_service.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_task_users(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
 
 
 # 全局服务实例
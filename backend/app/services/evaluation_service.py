@@ -1,8 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import selectinload
+from app.core.config import settings
+from app.db.pagination import keyset_page
+from app.models.credit import CreditEvent
 from app.models.evaluation import Evaluation
 from app.models.user import User
 from app.schemas.evaluation import EvaluationCreate, UserEvaluationSummary
+from app.services import user_summary_service
 
 class EvaluationService:
     async def submit_evaluation(self, db: AsyncSession, evaluation_in: EvaluationCreate, evaluator_id: int):
@@ -14,46 +19,77 @@ class EvaluationService:
             comment=evaluation_in.comment
         )
         db.add(db_evaluation)
+        # 评价与被评价人的评分累计在同一事务中提交
+        await self.add_rating(db, evaluation_in.evaluatee_id, evaluation_in.score, evaluation_in.task_id)
         await db.commit()
-        await db.refresh(db_evaluation)
-        
-        # Update user's credit score or average rating if needed
-        await self.update_user_rating(db, evaluation_in.evaluatee_id)
-        
+        user_summary_service.invalidate(evaluation_in.evaluatee_id)
+        await db.refresh(db_evaluation, ["evaluator"])
         return db_evaluation
 
-    async def update_user_rating(self, db: AsyncSession, user_id: int):
-        stmt = select(func.avg(Evaluation.score)).where(Evaluation.evaluatee_id == user_id)
-        result = await db.execute(stmt)
-        avg_score = result.scalar()
-        
-        if avg_score:
-            user_stmt = select(User).where(User.id == user_id)
-            user_result = await db.execute(user_stmt)
-            user = user_result.scalar_one_or_none()
-            if user:
-                user.credit_score = float(avg_score)
-                db.add(user)
-                await db.commit()
-
-    async def get_user_evaluations(self, db: AsyncSession, user_id: int):
-        stmt = select(Evaluation).where(Evaluation.evaluatee_id == user_id)
-        result = await db.execute(stmt)
-        evaluations = result.scalars().all()
-        
-        avg_stmt = select(func.avg(Evaluation.score)).where(Evaluation.evaluatee_id == user_id)
-        avg_result = await db.execute(avg_stmt)
-        avg_score = avg_result.scalar() or 0.0
-        
+    async def add_rating(self, db: AsyncSession, user_id: int, score: float, task_id: int | None = None):
+        """
+        在数据库中原子累加评分合计与条数，平均分同步写入信用分，并追加一条信用分变动记录。
+        MySQL 按书写顺序依次赋值，趋势和信用分必须排在前面，以便读取累加前的值
+        """
+        # 信用分列允许为空，按 0 参与计算
+        current_score = func.coalesce(User.credit_score, 0.0)
+        # 锁定用户行，变动记录中的变化值与更新基于同一个旧信用分；用户不存在时不处理
+        row = (await db.execute(
+            select(current_score).where(User.id == user_id).with_for_update()
+        )).first()
+        if row is None:
+            return
+        old_score = row[0]
+
+        alpha = settings.credit_trend_alpha
+        average = (User.rating_sum + score) / (User.rating_count + 1)
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .ordered_values(
+                (User.credit_trend, alpha * (average - current_score) + (1 - alpha) * User.credit_trend),
+                (User.credit_score, average),
+                (User.rating_sum, User.rating_sum + score),
+                (User.rating_count, User.rating_count + 1),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # 评分由 SQL 直接修改，会话中缓存的用户对象可能已过期，查询时覆盖
+        user = (await db.execute(
+            select(User).where(User.id == user_id).execution_options(populate_existing=True)
+        )).scalar_one()
+        db.add(CreditEvent(
+            user_id=user_id,
+            delta=user.credit_score - old_score,
+            score_after=user.credit_score,
+            reason='evaluation',
+            task_id=task_id,
+        ))
+
+    async def get_user_evaluations(
+        self, db: AsyncSession, user_id: int, limit: int = 20, cursor: str | None = None
+    ):
+        """平均分和总数直接读取用户上的累计值，评价列表按时间倒序分页"""
+        result = await db.execute(select(User.rating_sum, User.rating_count).where(User.id == user_id))
+        rating_sum, rating_count = result.one_or_none() or (0.0, 0)
+
+        stmt = (
+            select(Evaluation)
+            .where(Evaluation.evaluatee_id == user_id)
+            .options(selectinload(Evaluation.evaluator))
+        )
+        evaluations, next_cursor = await keyset_page(db, stmt, Evaluation, limit, cursor)
+
         return UserEvaluationSummary(
             user_id=user_id,
-            average_score=float(avg_score),
-            total_evaluations=len(evaluations),
-            evaluations=evaluations
+            average_score=rating_sum / rating_count if rating_count else 0.0,
+            total_evaluations=rating_count,
+            evaluations=evaluations,
+            next_cursor=next_cursor,
         )
 
     async def get_task_evaluations(self, db: AsyncSession, task_id: int):
-        stmt = select(Evaluation).where(Evaluation.task_id == task_id)
+        stmt = select(Evaluation).where(Evaluation.task_id == task_id).options(selectinload(Evaluation.evaluator))
         result = await db.execute(stmt)
         return result.scalars().all()
 
@@ -0,0 +1,228 @@
+"""
+Idempotency-Key 幂等请求
+前端超时后会自动重试，充值、支付和发布任务等写请求带上 Idempotency-Key 头后，
+同一用户相同 key 的重复请求不再执行，直接重放首个请求的响应：
+  1. 首个请求先写入 (user_id, key) 占位记录并提交，唯一约束保证并发的重复请求只有一个能占位
+  2. 处理成功后把状态码和响应体写入占位记录，与业务写入在同一事务中提交；
+     处理失败则删除占位记录，允许客户端重试。
+     处理进程崩溃或被杀死时来不及删除占位，业务写入也未提交，占位超过处理超时后由重试的请求接管；
+     原请求处理时间过长、占位已被接管时，保存失败并回滚业务写入，保证只有一方生效
+  3. 已完成的响应同时写入进程内 TTL 缓存，重放时多数不必查询数据库
+"""
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    body: bytes
+
+    def to_response(self) -> Response:
+        return Response(
+            self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+
+response_cache = LRUCache(
+    maxsize=settings.idempotency_cache_size,
+    ttl=settings.idempotency_key_ttl_seconds,
+    name="idempotency",
+)
+
+
+def request_hash(method: str, path: str, body: bytes) -> str:
+    digest = hashlib.sha256(f"{method} {path}\n".encode("utf-8"))
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _expired_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.idempotency_key_ttl_seconds)
+
+
+def _lock_time() -> datetime:
+    # 按秒取整：MySQL 的 DATETIME 不保存微秒，条件更新按该值比较
+    return datetime.utcnow().replace(microsecond=0)
+
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.idempotency_processing_timeout_seconds)
+
+
+class IdempotentRequest:
+    """
+    一次带 Idempotency-Key 的请求；没有该请求头时 key 为 None，save 只序列化响应并提交
+    replay 不为空时路由应直接返回它；路由的业务写入不自行提交，由 save 一并提交
+    """
+
+    def __init__(self, session: AsyncSession, user_id: int, key: str | None, request_hash: str):
+        self.session = session
+        self.user_id = user_id
+        self.key = key
+        self.request_hash = request_hash
+        self.replay: Response | None = None
+        self.completed = False
+        self.locked_at: datetime | None = None
+
+    def _owned(self):
+        """只修改本请求持有的占位，占位已被接管时不覆盖对方的记录"""
+        return (
+            IdempotencyKey.user_id == self.user_id,
+            IdempotencyKey.key == self.key,
+            IdempotencyKey.locked_at == self.locked_at,
+        )
+
+    async def save(self, content: BaseModel, status_code: int = 200) -> Response:
+        """按响应模型序列化响应，与业务写入在同一事务中保存并提交，返回给路由直接使用"""
+        body = dumps(content.model_dump(mode="json", by_alias=True))
+        if self.key is not None:
+            result = await self.session.execute(
+                update(IdempotencyKey)
+                .where(*self._owned(), IdempotencyKey.status_code.is_(None))
+                .values(status_code=status_code, response_body=body)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                # 占位已被超时后重试的请求接管，本请求的业务写入不能再提交
+                await self.session.rollback()
+                logger.warning("幂等占位已被接管，放弃本次写入: user=%s key=%s", self.user_id, self.key)
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="相同的请求已由重试处理")
+        await self.session.commit()
+        if self.key is not None:
+            response_cache.set(
+                (self.user_id, self.key), StoredResponse(self.request_hash, status_code, body)
+            )
+        self.completed = True
+        return Response(body, status_code=status_code, media_type="application/json")
+
+    async def release(self) -> None:
+        """请求未完成时删除占位记录"""
+        if self.key is None or self.completed or self.replay is not None:
+            return
+        await self.session.rollback()
+        await self.session.execute(
+            delete(IdempotencyKey).where(*self._owned(), IdempotencyKey.status_code.is_(None))
+        )
+        await self.session.commit()
+
+
+def _check_hash(stored_hash: str, current_hash: str) -> None:
+    if stored_hash != current_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{HEADER} 已用于另一个不同的请求",
+        )
+
+
+async def begin(
+    session: AsyncSession,
+    user_id: int,
+    key: str | None,
+    method: str,
+    path: str,
+    body: bytes,
+) -> IdempotentRequest:
+    current_hash = request_hash(method, path, body)
+    request = IdempotentRequest(session, user_id, key, current_hash)
+    if key is None:
+        return request
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{HEADER} 长度应为 1-{MAX_KEY_LENGTH} 个字符",
+        )
+
+    cached = response_cache.get((user_id, key))
+    if cached is not None:
+        _check_hash(cached.request_hash, current_hash)
+        request.replay = cached.to_response()
+        return request
+
+    result = await session.execute(
+        select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    )
+    record = result.scalar_one_or_none()
+    if record is not None and record.created_at < _expired_before():
+        await session.delete(record)
+        await session.flush()
+        record = None
+
+    if record is None:
+        request.locked_at = _lock_time()
+        session.add(IdempotencyKey(
+            user_id=user_id, key=key, request_hash=current_hash, locked_at=request.locked_at
+        ))
+        try:
+            await session.commit()
+        except IntegrityError:
+            # 并发的重复请求已先一步占位
+            await session.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="相同的请求正在处理中")
+        return request
+
+    _check_hash(record.request_hash, current_hash)
+    if record.status_code is None:
+        if await _take_over(session, record, request):
+            return request
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="相同的请求正在处理中")
+    stored = StoredResponse(record.request_hash, record.status_code, record.response_body)
+    response_cache.set((user_id, key), stored)
+    request.replay = stored.to_response()
+    return request
+
+
+async def _take_over(session: AsyncSession, record: IdempotencyKey, request: IdempotentRequest) -> bool:
+    """
+    占位超过处理超时仍未完成时由本请求接管，返回是否接管成功
+    条件更新只有一个并发请求能成功，原处理进程之后即使恢复也不会覆盖接管后的结果
+    """
+    # 早于本字段加入时写入的占位没有 locked_at，按创建时间计算
+    locked_at = record.locked_at or record.created_at
+    if locked_at >= _stale_before():
+        return False
+    request.locked_at = _lock_time()
+    current = (
+        IdempotencyKey.locked_at == record.locked_at
+        if record.locked_at is not None
+        else IdempotencyKey.locked_at.is_(None)
+    )
+    result = await session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == record.id, IdempotencyKey.status_code.is_(None), current)
+        .values(locked_at=request.locked_at)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def purge_expired_keys(session: AsyncSession) -> int:
+    result = await session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.created_at < _expired_before())
+    )
+    await session.commit()
+    return result.rowcount
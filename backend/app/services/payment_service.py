@@ -1,48 +1,139 @@
+"""
+钱包与流水
+余额变动全部是单条原子 SQL，不在 Python 中读-改-写：
+  扣款  UPDATE wallet SET balance = balance - :a WHERE user_id = :u AND balance >= :a
+  入账  INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE balance = balance + :a
+余额检查由数据库在持有行锁时完成，并发扣款不会超扣，也不会丢失更新；
+余额变动与流水在同一事务中，由调用方提交（幂等请求把保存的响应写入同一事务）；
+流水的月度汇总表在同一次 flush 中累加，汇总接口直接读取汇总表，不再对流水求和
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable
+
+from sqlalchemy import event, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from app.models.payment import Wallet, Transaction
-from app.models.task import Task
+from app.db.pagination import keyset_page
+from app.db.upsert import insert_ignore, insert_or_increment
+from app.models.payment import Wallet, Transaction, TransactionMonthlyTotal
 from app.schemas.payment import RechargeRequest
 
+
+def _dialect(db: AsyncSession | Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def _wallet_query(user_id: int):
+    # 余额由 SQL 直接修改，会话中缓存的钱包对象可能已过期，查询时覆盖
+    return select(Wallet).where(Wallet.user_id == user_id).execution_options(populate_existing=True)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def wallet_credit(dialect: str):
+    """入账语句，参数为 user_id、balance（入账金额）、updated_at"""
+    return insert_or_increment(dialect, Wallet, ("user_id",), ("balance",), ("updated_at",))
+
+
+def monthly_totals_upsert(dialect: str):
+    return insert_or_increment(
+        dialect, TransactionMonthlyTotal, ("user_id", "month", "type"), ("total_amount", "count")
+    )
+
+
+def monthly_totals(entries: Iterable[tuple[int, datetime, str, float]]) -> list[dict]:
+    """把 (用户, 时间, 类型, 金额) 形式的流水合并为月度汇总的累加参数"""
+    totals: dict[tuple[int, date, str], list] = defaultdict(lambda: [0.0, 0])
+    for user_id, created_at, type_, amount in entries:
+        bucket = totals[(user_id, month_start(created_at), type_)]
+        bucket[0] += amount
+        bucket[1] += 1
+    return [
+        {"user_id": user_id, "month": month, "type": type_, "total_amount": amount, "count": count}
+        for (user_id, month, type_), (amount, count) in totals.items()
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _roll_up_transactions(session: Session, flush_context) -> None:
+    """新写入的流水按 (用户, 月份, 类型) 累加到月度汇总表，与流水处于同一事务"""
+    params = monthly_totals(
+        (obj.user_id, obj.created_at or datetime.utcnow(), obj.type, obj.amount)
+        for obj in session.new
+        if isinstance(obj, Transaction)
+    )
+    if params:
+        connection = session.connection()
+        connection.execute(monthly_totals_upsert(connection.dialect.name), params)
+
+
 class PaymentService:
+    async def _credit(self, db: AsyncSession, user_id: int, amount: float, transaction: Transaction) -> None:
+        await db.execute(
+            wallet_credit(_dialect(db)),
+            {"user_id": user_id, "balance": amount, "updated_at": datetime.utcnow()},
+        )
+        db.add(transaction)
+        await db.flush()
+
     async def get_balance(self, db: AsyncSession, user_id: int):
-        stmt = select(Wallet).where(Wallet.user_id == user_id)
-        result = await db.execute(stmt)
-        wallet = result.scalar_one_or_none()
+        wallet = (await db.execute(_wallet_query(user_id))).scalar_one_or_none()
         if not wallet:
-            wallet = Wallet(user_id=user_id, balance=0.0)
-            db.add(wallet)
+            # 并发的首次查询各自插入时只有一条生效，不会因主键冲突报错
+            await db.execute(
+                insert_ignore(_dialect(db), Wallet),
+                {"user_id": user_id, "balance": 0.0, "updated_at": datetime.utcnow()},
+            )
             await db.commit()
-            await db.refresh(wallet)
+            wallet = (await db.execute(_wallet_query(user_id))).scalar_one()
         return wallet
 
     async def recharge(self, db: AsyncSession, user_id: int, recharge_in: RechargeRequest):
-        wallet = await self.get_balance(db, user_id)
-        wallet.balance += recharge_in.amount
-        
+        """入账并返回入账后的钱包，随调用方的事务一起提交"""
         transaction = Transaction(
             user_id=user_id,
             amount=recharge_in.amount,
             type='deposit',
             description='账户充值'
         )
-        db.add(transaction)
-        await db.commit()
-        await db.refresh(wallet)
-        return wallet
+        await self._credit(db, user_id, recharge_in.amount, transaction)
+        return (await db.execute(_wallet_query(user_id))).scalar_one()
+
+    async def get_transactions(
+        self, db: AsyncSession, user_id: int, limit: int = 20, cursor: str | None = None
+    ) -> tuple[list[Transaction], str | None]:
+        """按时间倒序返回一页流水和下一页游标，游标之后的记录走 (user_id, created_at) 索引定位"""
+        stmt = select(Transaction).where(Transaction.user_id == user_id)
+        return await keyset_page(db, stmt, Transaction, limit, cursor)
 
-    async def get_transactions(self, db: AsyncSession, user_id: int):
-        stmt = select(Transaction).where(Transaction.user_id == user_id).order_by(Transaction.created_at.desc())
+    async def get_monthly_totals(self, db: AsyncSession, user_id: int, since: date | None = None):
+        stmt = (
+            select(TransactionMonthlyTotal)
+            .where(TransactionMonthlyTotal.user_id == user_id)
+            .order_by(TransactionMonthlyTotal.month.desc(), TransactionMonthlyTotal.type)
+        )
+        if since is not None:
+            stmt = stmt.where(TransactionMonthlyTotal.month >= month_start(since))
         result = await db.execute(stmt)
         return result.scalars().all()
 
     async def pay_reward(self, db: AsyncSession, user_id: int, task_id: int, amount: float):
-        wallet = await self.get_balance(db, user_id)
-        if wallet.balance < amount:
+        """扣款并记录流水，余额不足时回滚并抛出 400；成功时随调用方的事务一起提交"""
+        # 钱包不存在时同样更新不到行，与余额不足一并处理
+        result = await db.execute(
+            update(Wallet)
+            .where(Wallet.user_id == user_id, Wallet.balance >= amount)
+            .values(balance=Wallet.balance - amount, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            await db.rollback()
             raise HTTPException(status_code=400, detail="余额不足")
-        
-        wallet.balance -= amount
+
         transaction = Transaction(
             user_id=user_id,
             amount=-amount,
@@ -51,21 +142,7 @@ class PaymentService:
             description=f'支付任务赏金: 任务#{task_id}'
         )
         db.add(transaction)
-        await db.commit()
-        return True
-
-    async def settle_reward(self, db: AsyncSession, user_id: int, task_id: int, amount: float):
-        wallet = await self.get_balance(db, user_id)
-        wallet.balance += amount
-        transaction = Transaction(
-            user_id=user_id,
-            amount=amount,
-            type='reward',
-            related_id=task_id,
-            description=f'获得任务赏金: 任务#{task_id}'
-        )
-        db.add(transaction)
-        await db.commit()
+        await db.flush()
         return True
 
 payment_service = PaymentService()
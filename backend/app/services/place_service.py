@@ -0,0 +1,192 @@
+"""
+地点字典服务
+任务的取件/送达地点归一化后写入 place 表，进程内维护地点名称的前缀和三元组（trigram）
+索引，地点筛选先在内存中匹配出地点 id，再用整数索引过滤任务；同一索引也支撑地点联想。
+索引按进程维护，其他 worker 新建的地点和补充的坐标通过节流的增量 refresh 同步，
+最长延迟 refresh_interval 秒
+"""
+import bisect
+import time
+import unicodedata
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.place import Place
+
+GRAM_SIZE = 3
+
+
+def normalize(name: str) -> str:
+    """全角转半角、小写并合并空白"""
+    return " ".join(unicodedata.normalize("NFKC", name).lower().split())
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+@dataclass(frozen=True)
+class PlaceEntry:
+    id: int
+    name: str
+    normalized_name: str
+    lat: float | None = None
+    lng: float | None = None
+
+
+class PlaceIndex:
+    """
+    地点名称的内存索引
+    place 表中的名称创建后不再修改，只会为缺少坐标的地点补充坐标：
+    refresh 按 id 增量加载新地点，并重新读取索引中仍缺坐标、数据库中已补齐的地点
+    """
+
+    def __init__(self, refresh_interval: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self._entries: dict[int, PlaceEntry] = {}
+        self._by_name: dict[str, int] = {}
+        self._sorted: list[tuple[str, int]] = []
+        self._grams: dict[str, set[int]] = {}
+        self._missing_coords: set[int] = set()
+        self._last_id = 0
+        self._refreshed_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: PlaceEntry) -> None:
+        """
+        写入或覆盖一个地点
+        本进程新建的地点可能随事务回滚，只有 refresh 从数据库读到的记录才推进 _last_id，
+        之后的 refresh 会用数据库中的记录覆盖这里的条目
+        """
+        existing = self._entries.get(entry.id)
+        self._entries[entry.id] = entry
+        if entry.lat is None or entry.lng is None:
+            self._missing_coords.add(entry.id)
+        else:
+            self._missing_coords.discard(entry.id)
+        if existing is not None:
+            if existing.normalized_name == entry.normalized_name:
+                return
+            self._remove_name(existing)
+        self._by_name[entry.normalized_name] = entry.id
+        bisect.insort(self._sorted, (entry.normalized_name, entry.id))
+        for gram in _grams(entry.normalized_name):
+            self._grams.setdefault(gram, set()).add(entry.id)
+
+    def _remove_name(self, entry: PlaceEntry) -> None:
+        if self._by_name.get(entry.normalized_name) == entry.id:
+            del self._by_name[entry.normalized_name]
+        position = bisect.bisect_left(self._sorted, (entry.normalized_name, entry.id))
+        if position < len(self._sorted) and self._sorted[position] == (entry.normalized_name, entry.id):
+            del self._sorted[position]
+        for gram in _grams(entry.normalized_name):
+            self._grams.get(gram, set()).discard(entry.id)
+
+    def get(self, place_id: int) -> PlaceEntry | None:
+        return self._entries.get(place_id)
+
+    def lookup(self, name: str) -> PlaceEntry | None:
+        place_id = self._by_name.get(normalize(name))
+        return self._entries.get(place_id) if place_id is not None else None
+
+    async def refresh(self, session: AsyncSession, force: bool = False) -> None:
+        """加载其他进程新增的地点和补充的坐标，非强制刷新时按 refresh_interval 节流"""
+        now = time.monotonic()
+        if not force and now - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = now
+        columns = (Place.id, Place.name, Place.normalized_name, Place.lat, Place.lng)
+        if self._missing_coords:
+            result = await session.execute(
+                select(*columns).where(Place.id.in_(sorted(self._missing_coords)), Place.lat.is_not(None))
+            )
+            for row in result.all():
+                self.add(PlaceEntry(*row))
+        result = await session.execute(
+            select(*columns).where(Place.id > self._last_id).order_by(Place.id)
+        )
+        for row in result.all():
+            self.add(PlaceEntry(*row))
+            self._last_id = row.id
+
+    def _prefix_ids(self, query: str) -> list[int]:
+        start = bisect.bisect_left(self._sorted, (query,))
+        ids = []
+        for name, place_id in self._sorted[start:]:
+            if not name.startswith(query):
+                break
+            ids.append(place_id)
+        return ids
+
+    def match(self, query: str) -> set[int]:
+        """名称包含 query 的地点 id"""
+        query = normalize(query)
+        if not query:
+            return set()
+        if len(query) < GRAM_SIZE:
+            # 短查询无法使用三元组，地点字典规模很小，直接扫描
+            return {
+                place_id for place_id, entry in self._entries.items()
+                if query in entry.normalized_name
+            }
+        candidates = None
+        for gram in _grams(query):
+            ids = self._grams.get(gram)
+            if not ids:
+                return set()
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        # 三元组全部命中不代表连续出现，需要校验子串
+        return {
+            place_id for place_id in candidates
+            if query in self._entries[place_id].normalized_name
+        }
+
+    def autocomplete(self, query: str, limit: int = 10) -> list[PlaceEntry]:
+        """前缀匹配优先，其次是包含 query 的地点，同组内名称越短越靠前"""
+        query = normalize(query)
+        if not query:
+            return []
+        prefix_ids = self._prefix_ids(query)
+        seen = set(prefix_ids)
+        others = [place_id for place_id in self.match(query) if place_id not in seen]
+        ordered = sorted(prefix_ids, key=lambda i: len(self._entries[i].normalized_name))
+        ordered += sorted(others, key=lambda i: len(self._entries[i].normalized_name))
+        return [self._entries[place_id] for place_id in ordered[:limit]]
+
+
+place_index = PlaceIndex()
+
+
+async def get_or_create_place(
+    session: AsyncSession,
+    name: str,
+    lat: float | None = None,
+    lng: float | None = None,
+) -> PlaceEntry:
+    """按归一化名称查找地点，不存在时创建；已有地点缺少坐标时补充坐标"""
+    normalized = normalize(name)
+    result = await session.execute(select(Place).where(Place.normalized_name == normalized))
+    place = result.scalar_one_or_none()
+    if place is None:
+        try:
+            # 使用 SAVEPOINT，并发创建同名地点时回退到查询
+            async with session.begin_nested():
+                place = Place(name=name.strip(), normalized_name=normalized, lat=lat, lng=lng)
+                session.add(place)
+        except IntegrityError:
+            result = await session.execute(select(Place).where(Place.normalized_name == normalized))
+            place = result.scalar_one()
+    if place.lat is None and lat is not None and lng is not None:
+        place.lat = lat
+        place.lng = lng
+
+    entry = PlaceEntry(place.id, place.name, place.normalized_name, place.lat, place.lng)
+    place_index.add(entry)
+    return entry
@@ -0,0 +1,180 @@
+"""
+钱包对账
+核对 wallet.balance 是否等于该用户全部流水的合计。每个钱包维护一个余额检查点
+（wallet_snapshot），对账时只累加检查点之后的流水，并把检查点推进到
+“当前时间 - 滞后时间”，下一次对账需要扫描的流水只有两次对账之间新增的部分。
+
+钱包按 user_id 分批（keyset）读取，每批一次聚合查询、一次检查点 upsert，
+内存占用只与批大小有关，与钱包总数和流水总量无关。
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import (
+    reconciliation_duration_seconds,
+    reconciliation_mismatches_total,
+    reconciliation_wallets_total,
+)
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import insert_or_increment
+from app.models.payment import Transaction, Wallet, WalletSnapshot
+
+logger = logging.getLogger(__name__)
+
+# 金额为两位小数的浮点数，累加误差远小于 1 分
+TOLERANCE = 0.005
+EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass
+class Mismatch:
+    user_id: int
+    wallet_balance: float
+    ledger_balance: float
+
+
+@dataclass
+class ReconciliationReport:
+    wallets: int = 0
+    transactions_scanned: int = 0
+    mismatches: list[Mismatch] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def _checkpoint_upsert(dialect: str):
+    return insert_or_increment(
+        dialect, WalletSnapshot, ("user_id",), (),
+        ("balance", "checkpoint_at", "last_transaction_id", "updated_at"),
+    )
+
+
+async def _ledger_tails(session: AsyncSession, user_ids: list[int], horizon: datetime) -> dict:
+    """
+    各用户检查点之后的流水：(检查点余额, 检查点之后的合计, 其中早于 horizon 的合计,
+    早于 horizon 的最大流水 id, 扫描的流水条数, 原检查点最大流水 id)
+    """
+    before_horizon = Transaction.created_at < horizon
+    stmt = (
+        select(
+            Wallet.user_id,
+            func.coalesce(WalletSnapshot.balance, 0.0),
+            func.coalesce(func.sum(Transaction.amount), 0.0),
+            func.coalesce(func.sum(case((before_horizon, Transaction.amount), else_=0.0)), 0.0),
+            func.max(case((before_horizon, Transaction.id))),
+            func.count(Transaction.id),
+            WalletSnapshot.last_transaction_id,
+        )
+        .select_from(Wallet)
+        .outerjoin(WalletSnapshot, WalletSnapshot.user_id == Wallet.user_id)
+        # 按 (user_id, created_at) 索引只读取检查点之后的流水
+        .outerjoin(Transaction, and_(
+            Transaction.user_id == Wallet.user_id,
+            Transaction.created_at >= func.coalesce(WalletSnapshot.checkpoint_at, EPOCH),
+        ))
+        .where(Wallet.user_id.in_(user_ids))
+        .group_by(Wallet.user_id, WalletSnapshot.balance, WalletSnapshot.last_transaction_id)
+    )
+    return {row[0]: row[1:] for row in (await session.execute(stmt)).all()}
+
+
+async def reconcile_chunk(
+    session: AsyncSession, after_user_id: int, chunk_size: int, horizon: datetime
+) -> tuple[list[int], int, list[Mismatch]]:
+    """核对 user_id 大于 after_user_id 的一批钱包，返回 (本批 user_id, 扫描的流水数, 不一致的钱包)"""
+    wallets = (await session.execute(
+        select(Wallet.user_id, Wallet.balance)
+        .where(Wallet.user_id > after_user_id)
+        .order_by(Wallet.user_id)
+        .limit(chunk_size)
+    )).all()
+    if not wallets:
+        return [], 0, []
+    user_ids = [user_id for user_id, _ in wallets]
+    tails = await _ledger_tails(session, user_ids, horizon)
+
+    scanned = 0
+    mismatches: list[Mismatch] = []
+    checkpoints: list[dict] = []
+    now = datetime.utcnow()
+    for user_id, wallet_balance in wallets:
+        snapshot_balance, tail_total, settled_total, settled_max_id, count, last_id = tails[user_id]
+        scanned += count
+        ledger_balance = snapshot_balance + tail_total
+        if abs((wallet_balance or 0.0) - ledger_balance) > TOLERANCE:
+            mismatches.append(Mismatch(user_id, wallet_balance or 0.0, ledger_balance))
+            # 不一致的钱包保留原检查点，修正前每次对账都会再次报告
+            continue
+        checkpoints.append({
+            "user_id": user_id,
+            "balance": snapshot_balance + settled_total,
+            "checkpoint_at": horizon,
+            "last_transaction_id": settled_max_id if settled_max_id is not None else last_id,
+            "updated_at": now,
+        })
+
+    if checkpoints:
+        await session.execute(_checkpoint_upsert(session.get_bind().dialect.name), checkpoints)
+    await session.commit()
+    return user_ids, scanned, mismatches
+
+
+async def reconcile_all(chunk_size: int | None = None, lag_seconds: float | None = None) -> ReconciliationReport:
+    chunk_size = chunk_size or settings.reconciliation_chunk_size
+    if lag_seconds is None:
+        lag_seconds = settings.reconciliation_checkpoint_lag_seconds
+    # 检查点滞后于当前时间，避免把仍在进行中的事务之前的时间段封存
+    horizon = datetime.utcnow() - timedelta(seconds=lag_seconds)
+    report = ReconciliationReport()
+    start = time.perf_counter()
+    after_user_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            user_ids, scanned, mismatches = await reconcile_chunk(session, after_user_id, chunk_size, horizon)
+        if not user_ids:
+            break
+        after_user_id = user_ids[-1]
+        report.wallets += len(user_ids)
+        report.transactions_scanned += scanned
+        report.mismatches.extend(await _confirm(mismatches, horizon))
+
+    report.seconds = round(time.perf_counter() - start, 3)
+    reconciliation_wallets_total.inc(report.wallets)
+    reconciliation_mismatches_total.inc(len(report.mismatches))
+    reconciliation_duration_seconds.observe(report.seconds)
+    for mismatch in report.mismatches:
+        logger.error(
+            "钱包余额与流水不一致: user_id=%s wallet=%.2f ledger=%.2f",
+            mismatch.user_id, mismatch.wallet_balance, mismatch.ledger_balance,
+        )
+    logger.info(
+        "钱包对账完成: %d 个钱包，扫描 %d 条流水，%d 个不一致，耗时 %.3f 秒",
+        report.wallets, report.transactions_scanned, len(report.mismatches), report.seconds,
+    )
+    return report
+
+
+async def _confirm(mismatches: list[Mismatch], horizon: datetime) -> list[Mismatch]:
+    """
+    钱包和流水分别查询，期间恰好有支付提交时会出现假阳性，
+    对不一致的钱包单独重新核对一次
+    """
+    confirmed = []
+    for mismatch in mismatches:
+        async with AsyncSessionLocal() as session:
+            _, _, again = await reconcile_chunk(session, mismatch.user_id - 1, 1, horizon)
+        confirmed.extend(again)
+    return confirmed
+
+
+if __name__ == "__main__":
+    # 手动执行一次全量对账
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(reconcile_all())
+    raise SystemExit(1 if result.mismatches else 0)
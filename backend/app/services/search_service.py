@@ -0,0 +1,124 @@
+"""
+任务全文搜索
+标题和描述按二元分词（bigram）写入 task_search_token 倒排索引，关键词查询变成
+token 列上的等值查找并按命中权重排序，不再对 Text 列做前导通配符的全表扫描。
+索引通过 Session 事件在创建任务、状态变化时与任务写入同一事务增量维护。
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from sqlalchemy import Subquery, delete, event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.models.search import TaskSearchToken
+from app.models.task import Task, TaskStatus
+
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+MAX_QUERY_TOKENS = 32
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _runs(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return _WORD_RE.findall(unicodedata.normalize("NFKC", text).lower())
+
+
+def _bigrams(run: str) -> list[str]:
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(title: str | None, description: str | None) -> Counter:
+    """返回 token -> 权重，标题中的 token 权重更高"""
+    weights: Counter = Counter()
+    for run in _runs(title):
+        for token in _bigrams(run):
+            weights[token] += TITLE_WEIGHT
+    for run in _runs(description):
+        for token in _bigrams(run):
+            weights[token] += DESCRIPTION_WEIGHT
+    return weights
+
+
+def query_tokens(keyword: str | None) -> list[str] | None:
+    """
+    关键词 -> 去重后的查询 token
+    含单字的关键词无法用二元索引表达，返回 None 由调用方退回 LIKE 匹配
+    """
+    runs = _runs(keyword)
+    if not runs or any(len(run) < 2 for run in runs):
+        return None
+    tokens = dict.fromkeys(token for run in runs for token in _bigrams(run))
+    return list(tokens)[:MAX_QUERY_TOKENS]
+
+
+def search_subquery(keyword: str | None, status: TaskStatus | None = None) -> Subquery | None:
+    """
+    返回 (task_id, score) 子查询：包含全部查询 token 的任务及其相关度得分
+    """
+    tokens = query_tokens(keyword)
+    if tokens is None:
+        return None
+
+    stmt = select(
+        TaskSearchToken.task_id,
+        func.sum(TaskSearchToken.weight).label("score"),
+    ).where(TaskSearchToken.token.in_(tokens))
+    if status is not None:
+        stmt = stmt.where(TaskSearchToken.status == status)
+    return (
+        stmt.group_by(TaskSearchToken.task_id)
+        .having(func.count() == len(tokens))
+        .subquery("task_search")
+    )
+
+
+def _token_rows(task_id: int, title: str | None, description: str | None, status) -> list[dict]:
+    return [
+        {"token": token, "task_id": task_id, "weight": weight, "status": status}
+        for token, weight in tokenize(title, description).items()
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_index(session: Session, flush_context) -> None:
+    # after_flush 中 new/dirty 及属性历史仍是 flush 前的状态，新任务的 id 已分配
+    rows: list[dict] = []
+    reindex_ids: list[int] = []
+    status_changes: list[tuple[int, TaskStatus]] = []
+
+    for obj in session.new:
+        if isinstance(obj, Task):
+            rows.extend(_token_rows(obj.id, obj.title, obj.description, obj.status))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Task):
+            continue
+        attrs = inspect(obj).attrs
+        if attrs.title.history.has_changes() or attrs.description.history.has_changes():
+            reindex_ids.append(obj.id)
+            rows.extend(_token_rows(obj.id, obj.title, obj.description, obj.status))
+        elif attrs.status.history.has_changes():
+            status_changes.append((obj.id, obj.status))
+
+    reindex_ids.extend(obj.id for obj in session.deleted if isinstance(obj, Task))
+
+    if not (rows or reindex_ids or status_changes):
+        return
+
+    connection = session.connection()
+    if reindex_ids:
+        connection.execute(delete(TaskSearchToken).where(TaskSearchToken.task_id.in_(reindex_ids)))
+    for task_id, status in status_changes:
+        connection.execute(
+            update(TaskSearchToken)
+            .where(TaskSearchToken.task_id == task_id)
+            .values(status=status)
+        )
+    if rows:
+        connection.execute(insert(TaskSearchToken), rows)
@@ -0,0 +1,214 @@
+"""
+任务赏金批量结算
+任务完成时只在同一事务中写入一条 settlement_queue 记录，由后台任务按批结算：
+每批在一个事务内认领队列记录、批量写入流水、按收款人合并后更新钱包，
+高峰期数百个任务完成时不再为每个任务单独读钱包、写流水、提交一次
+
+恰好一次：
+  - task_id 唯一，同一任务只会入队一次；管理员补登（enqueue_task）同样只写入队列
+  - 认领使用 UPDATE ... WHERE settled_at IS NULL，更新行数与本批条数不一致
+    （其他 worker 已认领）时整批回滚，认领、流水和钱包更新同时提交或同时回滚
+  - 整批出错时逐条重试；单条仍失败的记录累加 attempts，达到 settlement_max_attempts
+    后搁置，worker 不会反复卡在队首的同一批记录上
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import (
+    settlement_batch_duration_seconds,
+    settlement_batches_total,
+    settlement_item_failures_total,
+    settlement_items_total,
+    settlement_lag_seconds,
+)
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import insert_ignore
+from app.models.payment import Transaction
+from app.models.settlement import SettlementQueue
+from app.models.task import Task, TaskStatus
+from app.services.payment_service import monthly_totals, monthly_totals_upsert, wallet_credit
+from app.services.task_cleanup_service import SchedulerState
+
+logger = logging.getLogger(__name__)
+
+settlement_state = SchedulerState()
+
+
+def enqueue(session: AsyncSession, task: Task) -> None:
+    """任务完成时登记待结算的赏金，随任务状态一起提交"""
+    if task.assigned_to_id is None or not task.reward_amount or task.reward_amount <= 0:
+        return
+    session.add(SettlementQueue(task_id=task.id, payee_id=task.assigned_to_id, amount=task.reward_amount))
+
+
+async def enqueue_task(session: AsyncSession, task_id: int) -> bool:
+    """
+    为已完成但没有登记结算的任务补登赏金，返回是否新登记
+    已在队列中（包括已结算）或在引入队列之前已直接入账的任务不会重复登记
+    """
+    task = await session.get(Task, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if task.status != TaskStatus.completed:
+        raise HTTPException(status_code=400, detail="只能结算已完成的任务")
+    if task.assigned_to_id is None or not task.reward_amount or task.reward_amount <= 0:
+        return False
+
+    paid = await session.execute(
+        select(Transaction.id)
+        .where(Transaction.type == 'reward', Transaction.related_id == task_id)
+        .limit(1)
+    )
+    if paid.first() is not None:
+        return False
+
+    # 在连接上执行 Core 插入，才能拿到受影响的行数（冲突时为 0）
+    connection = await session.connection()
+    result = await connection.execute(
+        insert_ignore(connection.dialect.name, SettlementQueue),
+        {"task_id": task.id, "payee_id": task.assigned_to_id, "amount": task.reward_amount},
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def _settle_items(session: AsyncSession, items, start: float) -> int:
+    """在一个事务内认领并结算 items，返回结算的条数；已被其他 worker 认领时回滚并返回 0"""
+    now = datetime.utcnow()
+    claimed = await session.execute(
+        update(SettlementQueue)
+        .where(SettlementQueue.id.in_([item.id for item in items]), SettlementQueue.settled_at.is_(None))
+        .values(settled_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount != len(items):
+        await session.rollback()
+        settlement_batches_total.inc(outcome="conflict")
+        return 0
+
+    # 流水一条多行 INSERT 写入，月度汇总和钱包各一次 executemany，钱包按收款人合并
+    await session.execute(insert(Transaction), [
+        {
+            "user_id": item.payee_id,
+            "amount": item.amount,
+            "type": 'reward',
+            "related_id": item.task_id,
+            "description": f'获得任务赏金: 任务#{item.task_id}',
+            "created_at": now,
+        }
+        for item in items
+    ])
+    dialect = session.get_bind().dialect.name
+    await session.execute(
+        monthly_totals_upsert(dialect),
+        monthly_totals((item.payee_id, now, 'reward', item.amount) for item in items),
+    )
+    per_payee: dict[int, float] = defaultdict(float)
+    for item in items:
+        per_payee[item.payee_id] += item.amount
+    await session.execute(wallet_credit(dialect), [
+        {"user_id": payee_id, "balance": amount, "updated_at": now}
+        for payee_id, amount in per_payee.items()
+    ])
+    await session.commit()
+
+    settlement_batches_total.inc(outcome="ok")
+    settlement_items_total.inc(len(items))
+    settlement_batch_duration_seconds.observe(time.perf_counter() - start)
+    for item in items:
+        settlement_lag_seconds.observe((now - item.created_at).total_seconds())
+    return len(items)
+
+
+async def _record_failure(session: AsyncSession, item, error: Exception) -> None:
+    """记录单条结算失败，达到重试上限后该记录不再被选中"""
+    attempts = item.attempts + 1
+    await session.execute(
+        update(SettlementQueue)
+        .where(SettlementQueue.id == item.id)
+        .values(attempts=attempts, last_error=str(error)[:255])
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    if attempts >= settings.settlement_max_attempts:
+        settlement_item_failures_total.inc(outcome="parked")
+        logger.error("任务#%d 的赏金结算已失败 %d 次，暂停结算等待人工处理: %s", item.task_id, attempts, error)
+    else:
+        settlement_item_failures_total.inc(outcome="retry")
+        logger.warning("任务#%d 的赏金结算失败（第 %d 次）: %s", item.task_id, attempts, error)
+
+
+async def settle_batch(session: AsyncSession, batch_size: int | None = None) -> int:
+    """
+    结算一批待结算记录，返回结算的条数；0 表示队列已空（或本批全部失败，等待下次轮询）
+    整批失败时逐条重试，单条失败的记录累加 attempts，不会让同一批中的其他记录一直无法结算
+    """
+    batch_size = batch_size or settings.settlement_batch_size
+    start = time.perf_counter()
+    result = await session.execute(
+        select(SettlementQueue.id, SettlementQueue.task_id, SettlementQueue.payee_id,
+               SettlementQueue.amount, SettlementQueue.created_at, SettlementQueue.attempts)
+        .where(
+            SettlementQueue.settled_at.is_(None),
+            SettlementQueue.attempts < settings.settlement_max_attempts,
+        )
+        .order_by(SettlementQueue.id)
+        .limit(batch_size)
+        # 多个 worker 时跳过其他 worker 已锁定的行（SQLite 不支持，依靠条件更新）
+        .with_for_update(skip_locked=True)
+    )
+    items = result.all()
+    if not items:
+        await session.rollback()
+        return 0
+
+    try:
+        return await _settle_items(session, items, start)
+    except Exception:
+        await session.rollback()
+        settlement_batches_total.inc(outcome="error")
+        logger.warning("批量结算 %d 条记录失败，改为逐条结算", len(items), exc_info=True)
+
+    settled = 0
+    for item in items:
+        try:
+            settled += await _settle_items(session, [item], time.perf_counter())
+        except Exception as e:
+            await session.rollback()
+            await _record_failure(session, item, e)
+    return settled
+
+
+async def settle_pending() -> int:
+    """结算队列中的全部待结算记录"""
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            settled = await settle_batch(session)
+        if not settled:
+            return total
+        total += settled
+
+
+async def run_settlement_worker(interval_seconds: float | None = None) -> None:
+    interval_seconds = interval_seconds or settings.settlement_poll_interval_seconds
+    while True:
+        settlement_state.last_run_at = datetime.utcnow()
+        try:
+            settled = await settle_pending()
+            if settled:
+                logger.info("已结算 %d 笔任务赏金", settled)
+            settlement_state.last_error = None
+        except Exception as e:
+            settlement_batches_total.inc(outcome="error")
+            settlement_state.last_error = str(e)
+            logger.exception("赏金结算出错")
+        await asyncio.sleep(interval_seconds)
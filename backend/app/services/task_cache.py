@@ -0,0 +1,110 @@
+"""
+任务列表结果缓存
+按规范化后的筛选条件缓存已序列化的 JSON，任务表版本号变化后旧条目自动失效
+"""
+from itertools import chain
+from typing import Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.task import Task
+from app.models.user import User
+
+# 列表响应中嵌套了用户信息，因此用户的修改同样会使缓存失效
+_TRACKED_MODELS = (Task, User)
+_SESSION_FLAG = "task_table_written"
+
+
+class TableVersion:
+    """进程内的表版本号，每次写入提交后递增"""
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def bump(self) -> None:
+        self.value += 1
+
+
+task_table_version = TableVersion()
+
+# 多进程部署时其他 worker 的写入无法通知到本进程，TTL 限定了最长的陈旧时间
+task_list_cache = LRUCache(
+    maxsize=settings.task_list_cache_size,
+    ttl=settings.task_list_cache_ttl_seconds,
+    name="task_list",
+)
+
+
+def list_cache_key(
+    keyword: str | None,
+    status_filter,
+    min_reward: float | None,
+    max_reward: float | None,
+    pickup_location: str | None,
+    dropoff_location: str | None,
+    time_range: str | None,
+    category,
+    urgency,
+    sort_by: str,
+    sort_order: str,
+) -> Hashable:
+    """
+    生成规范化的缓存键，语义相同的请求参数映射到同一个键
+    版本号放在键中，写入后旧条目不会再被命中，由 LRU 逐步淘汰
+    """
+    def clean(value: str | None) -> str | None:
+        value = value.strip() if value else None
+        return value or None
+
+    if sort_by not in ("reward_amount", "created_at", "relevance"):
+        sort_by = "created_at"
+    sort_order = "asc" if sort_order == "asc" else "desc"
+    if time_range not in ("today", "week", "month"):
+        time_range = None
+
+    return (
+        task_table_version.value,
+        clean(keyword),
+        status_filter,
+        min_reward,
+        max_reward,
+        clean(pickup_location),
+        clean(dropoff_location),
+        time_range,
+        category,
+        urgency,
+        sort_by,
+        sort_order,
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_task_writes(session: Session, flush_context) -> None:
+    # after_flush 中 new/dirty/deleted 仍是 flush 前的状态
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _TRACKED_MODELS):
+            session.info[_SESSION_FLAG] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_task_writes(orm_execute_state) -> None:
+    # update(Task)/delete(Task) 这类批量语句不经过 flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in _TRACKED_MODELS:
+            orm_execute_state.session.info[_SESSION_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_task_version(session: Session) -> None:
+    if session.info.pop(_SESSION_FLAG, False):
+        task_table_version.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_task_writes(session: Session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
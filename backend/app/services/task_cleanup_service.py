@@ -1,10 +1,14 @@
 import asyncio
-from datetime import datetime
-from sqlalchemy import select
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.models.scheduled_job import ScheduledJob
 from app.models.task import Task, TaskStatus
 from app.db.session import get_session
+from app.db.upsert import insert_ignore
+from app.services import idempotency_service, reconciliation_service
 
 
 async def cleanup_expired_tasks():
@@ -39,6 +43,75 @@ async def cleanup_expired_tasks():
             await session.close()
 
 
+async def cleanup_idempotency_keys():
+    """删除超过保留时间的 Idempotency-Key 记录"""
+    async for session in get_session():
+        try:
+            purged = await idempotency_service.purge_expired_keys(session)
+            if purged:
+                print(f"已清理 {purged} 条过期的幂等记录")
+        except Exception as e:
+            print(f"清理幂等记录时出错: {e}")
+            await session.rollback()
+        finally:
+            await session.close()
+
+
+RECONCILIATION_JOB = "wallet_reconciliation"
+
+
+async def claim_job(session: AsyncSession, name: str, interval_seconds: float) -> bool:
+    """
+    领取一次到期的定时任务，返回本 worker 是否应执行
+    调度时间保存在数据库中，所有 worker 共用：条件更新只有一个 worker 能把 next_run_at
+    推后一个周期，其余 worker 以及重启后的 worker 在下个周期之前都不会再执行
+    """
+    # 按秒取整：MySQL 的 DATETIME 不保存微秒
+    now = datetime.utcnow().replace(microsecond=0)
+    await session.execute(
+        insert_ignore(session.get_bind().dialect.name, ScheduledJob),
+        {"name": name, "next_run_at": now, "updated_at": now},
+    )
+    result = await session.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.name == name, ScheduledJob.next_run_at <= now)
+        .values(next_run_at=now + timedelta(seconds=interval_seconds), last_run_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def reconcile_wallets():
+    """每 reconciliation_interval_seconds 执行一次全量钱包对账，多个 worker 中只有领取到的一个执行"""
+    async for session in get_session():
+        try:
+            claimed = await claim_job(session, RECONCILIATION_JOB, settings.reconciliation_interval_seconds)
+        finally:
+            await session.close()
+    if not claimed:
+        return
+    try:
+        await reconciliation_service.reconcile_all()
+    except Exception as e:
+        print(f"钱包对账时出错: {e}")
+
+
+class SchedulerState:
+    """定时清理任务的运行状态，供就绪检查判断调度器是否存活"""
+
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.last_run_at: datetime | None = None
+        self.last_error: str | None = None
+
+    def is_alive(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+scheduler_state = SchedulerState()
+
+
 async def start_cleanup_scheduler(interval_seconds: int = 3600):
     """
     启动定时清理任务调度器
@@ -47,9 +120,14 @@ async def start_cleanup_scheduler(interval_seconds: int = 3600):
         interval_seconds: 清理间隔（秒），默认为3600秒（1小时）
     """
     while True:
+        scheduler_state.last_run_at = datetime.utcnow()
         try:
             await cleanup_expired_tasks()
+            await cleanup_idempotency_keys()
+            await reconcile_wallets()
+            scheduler_state.last_error = None
         except Exception as e:
+            scheduler_state.last_error = str(e)
             print(f"执行定时清理任务时出错: {e}")
         
         # 等待指定的时间间隔
@@ -0,0 +1,117 @@
+"""
+任务列表的投影查询
+一次 JOIN 查询只取 TaskRead 需要的列，发布者和接单者各自 JOIN 一次 user 表
+（不会取出 hashed_password 等无关列），同一用户在一次请求中只构建一份摘要。
+列表的校验值查询也在这里，路由和启动预热共用同一组语句
+"""
+from typing import Any
+
+from sqlalchemy import Select, Subquery, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.serializers import (
+    TASK_READ_COLUMNS,
+    USER_READ_FIELDS,
+    task_row,
+    user_row,
+)
+
+_creator = aliased(User, name="creator")
+_assignee = aliased(User, name="assignee")
+
+_TASK_WIDTH = len(TASK_READ_COLUMNS)
+_USER_WIDTH = len(USER_READ_FIELDS)
+_USER_ID_INDEX = USER_READ_FIELDS.index("id")
+
+
+def task_projection() -> Select:
+    """返回投影查询，调用方再追加 where / order_by"""
+    return (
+        select(
+            *TASK_READ_COLUMNS,
+            *(getattr(_creator, name) for name in USER_READ_FIELDS),
+            *(getattr(_assignee, name) for name in USER_READ_FIELDS),
+        )
+        .select_from(Task)
+        .outerjoin(_creator, _creator.id == Task.created_by_id)
+        .outerjoin(_assignee, _assignee.id == Task.assigned_to_id)
+    )
+
+
+def list_statement(
+    conditions: list,
+    search: Subquery | None = None,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+) -> Select:
+    """任务大厅列表的投影查询，search 为全文搜索子查询"""
+    stmt = task_projection()
+    if search is not None:
+        stmt = stmt.join(search, search.c.task_id == Task.id)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+
+    if sort_by == "relevance" and search is not None:
+        return stmt.order_by(search.c.score.desc(), Task.created_at.desc())
+    # 默认按创建时间排序
+    column = Task.reward_amount if sort_by == "reward_amount" else Task.created_at
+    return stmt.order_by(column.asc() if sort_order == "asc" else column.desc())
+
+
+async def list_validator(
+    session: AsyncSession,
+    conditions: list,
+    search: Subquery | None = None,
+) -> tuple:
+    """
+    计算任务列表的校验值：行数、id 之和以及任务和关联用户的最大 updated_at
+    聚合查询只读索引列，不加载关系也不序列化
+    """
+    creator = aliased(User)
+    assignee = aliased(User)
+    stmt = (
+        select(
+            func.count(Task.id),
+            func.sum(Task.id),
+            func.max(Task.updated_at),
+            func.max(creator.updated_at),
+            func.max(assignee.updated_at),
+        )
+        .select_from(Task)
+        .outerjoin(creator, creator.id == Task.created_by_id)
+        .outerjoin(assignee, assignee.id == Task.assigned_to_id)
+    )
+    if search is not None:
+        stmt = stmt.join(search, search.c.task_id == Task.id)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+    result = await session.execute(stmt)
+    return tuple(result.one())
+
+
+async def fetch_task_rows(session: AsyncSession, stmt: Select) -> list[dict[str, Any]]:
+    """执行投影查询并构建 TaskRead 结构的字典列表"""
+    result = await session.execute(stmt)
+    users: dict[int, dict[str, Any]] = {}
+
+    def summary(values) -> dict[str, Any] | None:
+        user_id = values[_USER_ID_INDEX]
+        if user_id is None:
+            return None
+        user = users.get(user_id)
+        if user is None:
+            user = users[user_id] = user_row(values)
+        return user
+
+    creator_end = _TASK_WIDTH + _USER_WIDTH
+    return [
+        task_row(
+            row[:_TASK_WIDTH],
+            summary(row[_TASK_WIDTH:creator_end]),
+            summary(row[creator_end:]),
+        )
+        for row in result.all()
+    ]
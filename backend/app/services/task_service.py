@@ -1,15 +1,22 @@
+import logging
 from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.task import Task, TaskStatus
 from app.models.user import User
+from app.schemas.serializers import TASK_READ_FIELDS
+from app.services import place_service
 from app.services.user_service import update_credit_score
 
 from app.utils.map_service import amap_service
 
+logger = logging.getLogger(__name__)
+
 ALLOWED_TRANSITIONS = {
     TaskStatus.pending: {TaskStatus.accepted, TaskStatus.cancelled},
     TaskStatus.accepted: {TaskStatus.picked, TaskStatus.cancelled},
@@ -19,6 +26,36 @@ ALLOWED_TRANSITIONS = {
 }
 
 
+# 构建 TaskRead 响应需要的任务属性
+_RESPONSE_ATTRIBUTES = frozenset((*TASK_READ_FIELDS, "created_by", "assigned_to"))
+
+
+async def commit_task(session: AsyncSession, task: Task) -> Task:
+    """
+    提交任务写入，返回可直接作为 TaskRead 响应的任务对象
+    会话使用 expire_on_commit=False，提交后已加载的列和关系仍然有效，
+    只对尚未加载的属性补一次查询，不再整条重新 select 并预加载关系
+    """
+    await session.commit()
+    return await _load_response_attributes(session, task)
+
+
+async def flush_task(session: AsyncSession, task: Task) -> Task:
+    """
+    写入任务但不提交，返回可直接作为 TaskRead 响应的任务对象
+    用于幂等请求：任务与保存的响应由 IdempotentRequest.save 在同一事务中提交
+    """
+    await session.flush()
+    return await _load_response_attributes(session, task)
+
+
+async def _load_response_attributes(session: AsyncSession, task: Task) -> Task:
+    unloaded = _RESPONSE_ATTRIBUTES & inspect(task).unloaded
+    if unloaded:
+        await session.refresh(task, attribute_names=list(unloaded))
+    return task
+
+
 def ensure_can_accept(task: Task, user: User) -> None:
     if task.status != TaskStatus.pending:
         raise HTTPException(status_code=400, detail="任务不可接单")
@@ -56,6 +93,41 @@ async def geocode_location(address: str) -> Optional[Dict]:
     return await amap_service.geocode(address)
 
 
+async def resolve_location(
+    session: AsyncSession,
+    name: str,
+    lat: Optional[float],
+    lng: Optional[float],
+) -> Tuple[Optional[int], Optional[float], Optional[float]]:
+    """
+    将地点名称关联到地点字典，并在缺少经纬度时补全坐标
+    地点字典中已有坐标时直接复用，不再调用地理编码接口
+
+    Returns:
+        (地点 id, 纬度, 经度)
+    """
+    if not name:
+        return None, lat, lng
+
+    if lat is None or lng is None:
+        await place_service.place_index.refresh(session)
+        known = place_service.place_index.lookup(name)
+        if known is not None and known.lat is not None and known.lng is not None:
+            lat, lng = known.lat, known.lng
+        else:
+            geocode = await geocode_location(name)
+            if geocode and 'location' in geocode:
+                try:
+                    geo_lng, geo_lat = geocode['location'].split(',')
+                    lat, lng = float(geo_lat), float(geo_lng)
+                except (ValueError, IndexError):
+                    # 如果地理编码失败，记录警告但继续处理
+                    logger.warning("地理编码失败: %s", name)
+
+    place = await place_service.get_or_create_place(session, name, lat, lng)
+    return place.id, lat, lng
+
+
 async def calculate_task_distance(task: Task) -> Optional[Dict]:
     """
     计算任务起点到终点的距离和时间
@@ -75,9 +147,24 @@ async def calculate_task_distance(task: Task) -> Optional[Dict]:
     return None
 
 
-def update_credit_on_completion(task: Task) -> None:
+async def lock_task_users(session: AsyncSession, task: Task) -> None:
+    """
+    锁定任务双方的用户行并刷新会话中的用户对象。
+    信用分在 Python 中读改写，需与评价累加等并发修改串行，基于最新的信用分计算
+    """
+    user_ids = {task.created_by_id, task.assigned_to_id} - {None}
+    await session.execute(
+        select(User)
+        .where(User.id.in_(user_ids))
+        .order_by(User.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def update_credit_on_completion(session: AsyncSession, task: Task) -> None:
     """
-    任务完成后更新双方信用评分（智能评分系统）
+    任务完成后更新双方信用评分（智能评分系统），变动记录随任务状态一起提交
     """
     creator = task.created_by
     assignee = task.assigned_to
@@ -85,18 +172,18 @@ def update_credit_on_completion(task: Task) -> None:
     # 任务正常完成，双方都加分
     if task.status == TaskStatus.completed:
         # 发布者奖励
-        update_credit_score(creator, 0.1)
+        update_credit_score(session, creator, 0.1, 'task_completed_publisher', task.id)
 
         # 接单者奖励
         if assignee:
-            update_credit_score(assignee, 0.2)
+            update_credit_score(session, assignee, 0.2, 'task_completed_assignee', task.id)
 
     # 任务被取消，根据情况扣分
     elif task.status == TaskStatus.cancelled:
         # 如果是接单者取消，扣分
         if assignee and task.cancelled_by == 'assignee':
-            update_credit_score(assignee, -0.3)
+            update_credit_score(session, assignee, -0.3, 'task_cancelled_assignee', task.id)
         # 如果是发布者取消，轻微扣分
         elif task.cancelled_by == 'creator':
-            update_credit_score(creator, -0.1)
+            update_credit_score(session, creator, -0.1, 'task_cancelled_publisher', task.id)
 
@@ -1,24 +1,51 @@
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.models.credit import CreditEvent
 from app.models.user import User
 from app.models.task import Task, TaskStatus
 
 
 
-def update_credit_score(user: User, delta: float) -> None:
+def next_credit_trend(trend: float | None, delta: float) -> float:
+    """按一次信用分变化增量更新指数加权平均，不需要回放历史"""
+    alpha = settings.credit_trend_alpha
+    return alpha * delta + (1 - alpha) * (trend or 0.0)
+
+
+def update_credit_score(
+    session: AsyncSession,
+    user: User,
+    delta: float,
+    reason: str,
+    task_id: int | None = None,
+) -> None:
     """
-    更新用户信用评分
-    
+    更新用户信用评分，并追加一条变动记录，随调用方的事务一起提交
+
     Args:
+        session: 当前事务的会话
         user: 要更新的用户
         delta: 信用分变化值，正数表示增加，负数表示减少
+        reason: 变动原因，写入 credit_event.reason
+        task_id: 关联的任务
     """
-    new_score = user.credit_score + delta
-    
+    old_score = user.credit_score or 0.0
+    new_score = old_score + delta
+
     # 信用分范围控制在0-5之间
     if new_score > 5.0:
         new_score = 5.0
     elif new_score < 0.0:
         new_score = 0.0
-        
+
     user.credit_score = new_score
+    user.credit_trend = next_credit_trend(user.credit_trend, new_score - old_score)
+    session.add(CreditEvent(
+        user_id=user.id,
+        delta=new_score - old_score,
+        score_after=new_score,
+        reason=reason,
+        task_id=task_id,
+    ))
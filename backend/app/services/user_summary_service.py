@@ -0,0 +1,85 @@
+"""
+用户资料摘要
+任务卡片、聊天列表一次请求批量获取多个用户的信用分、评分和完成数。
+按用户缓存摘要，未命中的用户合并为一次查询；完成数由任务表按用户分组计数
+"""
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.schemas.user import UserSummary
+
+# 评价提交、资料修改以及任务完成、取消提交后主动失效；其他进程中的修改依靠 TTL 更新
+summary_cache = LRUCache(
+    maxsize=settings.user_summary_cache_size,
+    ttl=settings.user_summary_cache_ttl_seconds,
+    name="user_summary",
+)
+
+
+def invalidate(user_id: int) -> None:
+    summary_cache.invalidate(user_id)
+
+
+def _completed_counts(column, user_ids: list[int]):
+    return (
+        select(column.label("user_id"), func.count().label("completed"))
+        .where(column.in_(user_ids), Task.status == TaskStatus.completed)
+        .group_by(column)
+        .subquery()
+    )
+
+
+async def _load(db: AsyncSession, user_ids: list[int]) -> list[UserSummary]:
+    published = _completed_counts(Task.created_by_id, user_ids)
+    taken = _completed_counts(Task.assigned_to_id, user_ids)
+    result = await db.execute(
+        select(
+            User.id,
+            User.full_name,
+            User.avatar_url,
+            User.credit_score,
+            User.rating_sum,
+            User.rating_count,
+            func.coalesce(published.c.completed, 0),
+            func.coalesce(taken.c.completed, 0),
+        )
+        .outerjoin(published, published.c.user_id == User.id)
+        .outerjoin(taken, taken.c.user_id == User.id)
+        .where(User.id.in_(user_ids))
+    )
+    return [
+        UserSummary(
+            id=user_id,
+            full_name=full_name,
+            avatar_url=avatar_url,
+            credit_score=credit_score,
+            rating_average=round(rating_sum / rating_count, 2) if rating_count else 0.0,
+            rating_count=rating_count,
+            completed_published=completed_published,
+            completed_taken=completed_taken,
+        )
+        for (user_id, full_name, avatar_url, credit_score, rating_sum, rating_count,
+             completed_published, completed_taken) in result.all()
+    ]
+
+
+async def get_summaries(db: AsyncSession, user_ids: list[int]) -> list[UserSummary]:
+    """按请求顺序返回摘要，重复的 id 只返回一次，不存在的用户直接略过"""
+    user_ids = list(dict.fromkeys(user_ids))
+    summaries: dict[int, UserSummary] = {}
+    missing = []
+    for user_id in user_ids:
+        cached = summary_cache.get(user_id)
+        if cached is None:
+            missing.append(user_id)
+        else:
+            summaries[user_id] = cached
+    if missing:
+        for summary in await _load(db, missing):
+            summary_cache.set(summary.id, summary)
+            summaries[summary.id] = summary
+    return [summaries[user_id] for user_id in user_ids if user_id in summaries]
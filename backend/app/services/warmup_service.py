@@ -0,0 +1,69 @@
+"""
+启动预热
+在 worker 报告就绪之前预先建立数据库连接、加载地点索引，并执行一次热点查询：
+SQLAlchemy 会缓存编译结果，默认的任务大厅结果也直接写入列表缓存，
+第一批请求不必承担建连、编译和冷缓存的开销
+"""
+import logging
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.db.session import AsyncSessionLocal, engine, replica_router
+from app.models.user import User
+from app.services import place_service, task_cache, task_read_service
+
+logger = logging.getLogger(__name__)
+
+
+async def open_connections(target: AsyncEngine, count: int) -> int:
+    """同时持有 count 个连接再归还，保证连接池中确实建立了这么多连接"""
+    connections = []
+    try:
+        for _ in range(count):
+            connection = await target.connect()
+            connections.append(connection)
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            await connection.close()
+    return len(connections)
+
+
+async def warm_default_board() -> int:
+    """执行默认的任务大厅查询（无筛选、按创建时间倒序）并写入列表缓存"""
+    async with AsyncSessionLocal() as session:
+        validator = await task_read_service.list_validator(session, [])
+        stmt = task_read_service.list_statement([], None, "created_at", "desc")
+        rows = await task_read_service.fetch_task_rows(session, stmt)
+    cache_key = task_cache.list_cache_key(
+        None, None, None, None, None, None, None, None, None, "created_at", "desc"
+    )
+    task_cache.task_list_cache.set(cache_key, (validator, dumps(rows)))
+    return len(rows)
+
+
+async def warm_up() -> dict:
+    start = time.perf_counter()
+    summary: dict = {}
+
+    pool_size = getattr(engine.pool, "size", None)
+    count = min(settings.db_warmup_connections, pool_size()) if pool_size else 1
+    summary["connections"] = await open_connections(engine, count)
+    if replica_router.has_replicas:
+        summary["healthy_replicas"] = sum(await replica_router.check_health(force=True))
+
+    async with AsyncSessionLocal() as session:
+        # 创建任务时优先复用地点字典中的坐标，省去地理编码调用
+        await place_service.place_index.refresh(session, force=True)
+        summary["places"] = len(place_service.place_index)
+        # 每个认证请求都会按邮箱查询用户，提前编译该语句
+        await session.execute(select(User).where(User.email == ""))
+
+    summary["board_tasks"] = await warm_default_board()
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info("启动预热完成: %s", summary)
+    return summary
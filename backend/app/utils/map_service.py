@@ -3,9 +3,12 @@
 提供距离计算、路径规划、地理编码等服务
 """
 import os
+import time
 import httpx
 from typing import Dict, List, Optional, Tuple
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.metrics import amap_request_duration_seconds, amap_requests_total
 
 
 class AMapWebService:
@@ -14,6 +17,29 @@ class AMapWebService:
     def __init__(self):
         self.api_key = settings.amap_web_service_key
         self.base_url = "https://restapi.amap.com/v3"
+        # 只缓存接口成功返回的地理编码结果，失败时下次仍会重试
+        self.geocode_cache = LRUCache(
+            maxsize=settings.geocode_cache_size,
+            ttl=settings.geocode_cache_ttl_seconds,
+            name="geocode",
+        )
+    
+    async def _get(self, endpoint: str, params: Dict) -> Dict:
+        """
+        调用高德地图接口并记录耗时和结果
+        网络异常会向上抛出，由调用方决定降级方式
+        """
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"{self.base_url}/{endpoint}", params=params, timeout=10.0)
+                result = response.json()
+            outcome = "ok" if result.get("status") == "1" else "api_error"
+            return result
+        finally:
+            amap_request_duration_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
+            amap_requests_total.inc(endpoint=endpoint, outcome=outcome)
         
     async def get_distance(
         self, 
@@ -38,7 +64,6 @@ class AMapWebService:
         origins_str = "|".join([f"{lng},{lat}" for lng, lat in origins])
         destinations_str = "|".join([f"{lng},{lat}" for lng, lat in destinations])
         
-        url = f"{self.base_url}/distance"
         params = {
             "key": self.api_key,
             "origins": origins_str,
@@ -48,15 +73,13 @@ class AMapWebService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                result = response.json()
-                
-                if result.get("status") == "1" and "results" in result:
-                    return result["results"]
-                else:
-                    print(f"高德地图API距离计算错误: {result.get('info', 'Unknown error')}")
-                    return None
+            result = await self._get("distance", params)
+            
+            if result.get("status") == "1" and "results" in result:
+                return result["results"]
+            else:
+                print(f"高德地图API距离计算错误: {result.get('info', 'Unknown error')}")
+                return None
         except Exception as e:
             print(f"调用高德地图API时发生错误: {str(e)}")
             return None
@@ -75,7 +98,11 @@ class AMapWebService:
             # 如果没有配置API密钥，返回模拟数据
             return self._mock_geocode_result(address)
         
-        url = f"{self.base_url}/geocode/geo"
+        cache_key = " ".join(address.split())
+        cached = self.geocode_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         params = {
             "key": self.api_key,
             "address": address,
@@ -83,15 +110,14 @@ class AMapWebService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                result = response.json()
-                
-                if result.get("status") == "1" and len(result.get("geocodes", [])) > 0:
-                    return result["geocodes"][0]
-                else:
-                    print(f"高德地图API地理编码错误: {result.get('info', 'Unknown error')}")
-                    return None
+            result = await self._get("geocode/geo", params)
+            
+            if result.get("status") == "1" and len(result.get("geocodes", [])) > 0:
+                self.geocode_cache.set(cache_key, result["geocodes"][0])
+                return result["geocodes"][0]
+            else:
+                print(f"高德地图API地理编码错误: {result.get('info', 'Unknown error')}")
+                return None
         except Exception as e:
             print(f"调用高德地图API时发生错误: {str(e)}")
             return None
@@ -111,7 +137,6 @@ class AMapWebService:
             # 如果没有配置API密钥，返回模拟数据
             return self._mock_regeocode_result(lng, lat)
         
-        url = f"{self.base_url}/geocode/regeo"
         params = {
             "key": self.api_key,
             "location": f"{lng},{lat}",
@@ -119,15 +144,13 @@ class AMapWebService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                result = response.json()
-                
-                if result.get("status") == "1" and result.get("regeocode"):
-                    return result["regeocode"]
-                else:
-                    print(f"高德地图API逆地理编码错误: {result.get('info', 'Unknown error')}")
-                    return None
+            result = await self._get("geocode/regeo", params)
+            
+            if result.get("status") == "1" and result.get("regeocode"):
+                return result["regeocode"]
+            else:
+                print(f"高德地图API逆地理编码错误: {result.get('info', 'Unknown error')}")
+                return None
         except Exception as e:
             print(f"调用高德地图API时发生错误: {str(e)}")
             return None
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+钱包对账基准测试
+
+WALLETS 个钱包、每个钱包 PER_WALLET 条流水，对比：
+  逐用户全量: 每个钱包单独执行一次 SUM(amount) 扫描全部流水
+  分批首次:   reconciliation_service.reconcile_chunk 每批一次聚合查询，没有检查点
+  分批增量:   检查点建立后新增 NEW_PER_WALLET 条流水，只累加检查点之后的部分
+
+运行: cd backend && python -m benchmarks.bench_reconciliation [数据库URL]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.base import Base
+from app.db.session import build_engine
+from app.models.payment import Transaction, Wallet
+from app.models.user import User
+from app.services import reconciliation_service
+
+WALLETS = 2_000
+PER_WALLET = 100
+NEW_PER_WALLET = 2
+CHUNK_SIZE = 500
+
+
+async def seed(sessionmaker: async_sessionmaker, per_wallet: int, created_at: datetime) -> None:
+    async with sessionmaker() as session:
+        for start in range(1, WALLETS + 1, 200):
+            user_ids = range(start, min(start + 200, WALLETS + 1))
+            await session.execute(insert(Transaction), [
+                {"user_id": user_id, "amount": 1.0, "type": 'deposit', "created_at": created_at}
+                for user_id in user_ids
+                for _ in range(per_wallet)
+            ])
+        await session.execute(update(Wallet).values(balance=Wallet.balance + per_wallet))
+        await session.commit()
+
+
+async def per_user(sessionmaker: async_sessionmaker) -> int:
+    mismatches = 0
+    async with sessionmaker() as session:
+        wallets = (await session.execute(select(Wallet.user_id, Wallet.balance))).all()
+        for user_id, balance in wallets:
+            ledger = (await session.execute(
+                select(func.coalesce(func.sum(Transaction.amount), 0.0)).where(Transaction.user_id == user_id)
+            )).scalar_one()
+            mismatches += abs(balance - ledger) > reconciliation_service.TOLERANCE
+    return mismatches
+
+
+async def chunked(sessionmaker: async_sessionmaker, horizon: datetime) -> tuple[int, int]:
+    scanned = mismatches = 0
+    after_user_id = 0
+    while True:
+        async with sessionmaker() as session:
+            user_ids, count, found = await reconciliation_service.reconcile_chunk(
+                session, after_user_id, CHUNK_SIZE, horizon
+            )
+        if not user_ids:
+            return scanned, mismatches
+        after_user_id = user_ids[-1]
+        scanned += count
+        mismatches += len(found)
+
+
+async def main() -> None:
+    tmpdir = None
+    if len(sys.argv) > 1:
+        url = sys.argv[1]
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'reconciliation.db')}"
+
+    engine = build_engine(url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.utcnow()
+    async with sessionmaker() as session:
+        await session.execute(insert(User), [
+            {"email": f"audit{i}@example.com", "full_name": f"用户{i}", "hashed_password": "x" * 60,
+             "created_at": now, "updated_at": now}
+            for i in range(1, WALLETS + 1)
+        ])
+        await session.execute(insert(Wallet), [
+            {"user_id": i, "balance": 0.0, "updated_at": now} for i in range(1, WALLETS + 1)
+        ])
+        await session.commit()
+    await seed(sessionmaker, PER_WALLET, now - timedelta(days=1))
+
+    print(f"{WALLETS} 个钱包，每个 {PER_WALLET} 条流水，批大小 {CHUNK_SIZE}")
+    start = time.perf_counter()
+    mismatches = await per_user(sessionmaker)
+    print(f"逐用户全量: {time.perf_counter() - start:7.2f} 秒  不一致 {mismatches}")
+
+    start = time.perf_counter()
+    scanned, mismatches = await chunked(sessionmaker, now)
+    print(f"分批首次:   {time.perf_counter() - start:7.2f} 秒  扫描 {scanned} 条  不一致 {mismatches}")
+
+    await seed(sessionmaker, NEW_PER_WALLET, now + timedelta(minutes=1))
+    start = time.perf_counter()
+    scanned, mismatches = await chunked(sessionmaker, now + timedelta(minutes=2))
+    print(f"分批增量:   {time.perf_counter() - start:7.2f} 秒  扫描 {scanned} 条  不一致 {mismatches}")
+
+    await engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+请求 ID 中间件吞吐基准测试
+
+在只返回 ResponseModel 的简单路由上对比：
+  旧实现: @app.middleware("http")（BaseHTTPMiddleware），路由内从 request.state 取请求 ID
+  新实现: 纯 ASGI 的 RequestContextMiddleware，请求 ID 经 ContextVar 自动填入 ResponseModel
+
+直接驱动 ASGI 应用（不经过网络和 HTTP 客户端），只统计应用和中间件本身的开销。
+
+运行: cd backend && python -m benchmarks.bench_request_middleware
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+
+from app.core.middleware import RequestContextMiddleware
+from app.core.responses import FastJSONResponse
+from app.schemas.response import ResponseModel
+
+REQUESTS = 5_000
+CONCURRENCY = 50
+ROUNDS = 3
+
+
+def legacy_app() -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.middleware("http")
+    async def add_request_id(request: Request, call_next):
+        request_id = f"req-{uuid.uuid4()}"
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return ResponseModel(data="pong", request_id=getattr(request.state, "request_id", None))
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return ResponseModel(data="pong")
+
+    return app
+
+
+async def call(app) -> bytes:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def measure(app) -> float:
+    # 预热，触发路由和模型的惰性初始化
+    assert b"pong" in await call(app)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def bounded():
+        async with semaphore:
+            await call(app)
+
+    best = 0.0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(REQUESTS)))
+        best = max(best, REQUESTS / (time.perf_counter() - start))
+    return best
+
+
+async def main() -> None:
+    legacy = await measure(legacy_app())
+    current = await measure(asgi_app())
+    print(f"BaseHTTPMiddleware: {legacy:8.0f} req/s")
+    print(f"纯 ASGI 中间件:     {current:8.0f} req/s  ({current / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+任务赏金结算基准测试
+
+模拟高峰期 TASKS 个任务在短时间内完成、赏金分给 COURIERS 个接单人，对比：
+  逐笔结算: 每个任务单独入账一次（钱包 upsert + 流水 + 提交），即引入队列之前的结算方式
+  批量结算: 完成时入队，settlement_service.settle_batch 每批一个事务，
+            批量写流水、按收款人合并更新钱包
+
+两种方式结束后校验各接单人余额与流水合计一致，且每个任务恰好一笔流水。
+
+运行: cd backend && python -m benchmarks.bench_settlement [数据库URL]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.base import Base
+from app.db.session import build_engine
+from app.models.payment import Transaction, TransactionMonthlyTotal, Wallet
+from app.models.settlement import SettlementQueue
+from app.models.task import Task, TaskCategory, TaskStatus, TaskUrgency
+from app.models.user import User
+from app.services import settlement_service
+from app.services.payment_service import payment_service
+
+TASKS = 1_000
+COURIERS = 50
+BATCH_SIZE = 200
+
+
+async def seed(sessionmaker: async_sessionmaker) -> list[tuple[int, int, float]]:
+    now = datetime.utcnow()
+    async with sessionmaker() as session:
+        await session.execute(insert(User), [
+            {
+                "email": f"settle-bench{i}@example.com",
+                "full_name": f"用户{i}",
+                "hashed_password": "x" * 60,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(1, COURIERS + 2)
+        ])
+        await session.execute(insert(Task), [
+            {
+                "title": f"帮忙取快递 #{i}",
+                "description": "从菜鸟驿站取件送到宿舍楼下",
+                "reward_amount": round(random.uniform(1, 20), 2),
+                "category": TaskCategory.delivery,
+                "urgency": TaskUrgency.medium,
+                "pickup_location_name": "菜鸟驿站",
+                "dropoff_location_name": "一号宿舍楼",
+                "status": TaskStatus.completed,
+                "created_at": now,
+                "updated_at": now,
+                "created_by_id": 1,
+                "assigned_to_id": random.randint(2, COURIERS + 1),
+            }
+            for i in range(TASKS)
+        ])
+        await session.commit()
+        rows = await session.execute(select(Task.id, Task.assigned_to_id, Task.reward_amount))
+        return [tuple(row) for row in rows]
+
+
+async def reset(sessionmaker: async_sessionmaker) -> None:
+    async with sessionmaker() as session:
+        for model in (Transaction, TransactionMonthlyTotal, Wallet, SettlementQueue):
+            await session.execute(delete(model))
+        await session.commit()
+
+
+async def verify(sessionmaker: async_sessionmaker, tasks: list[tuple[int, int, float]]) -> bool:
+    async with sessionmaker() as session:
+        ledger_rows = (await session.execute(select(func.count(Transaction.id)))).scalar_one()
+        balances = dict((await session.execute(select(Wallet.user_id, Wallet.balance))).all())
+        ledger = dict((await session.execute(
+            select(Transaction.user_id, func.sum(Transaction.amount)).group_by(Transaction.user_id)
+        )).all())
+    expected: dict[int, float] = {}
+    for _, courier_id, amount in tasks:
+        expected[courier_id] = expected.get(courier_id, 0.0) + amount
+    return ledger_rows == len(tasks) and all(
+        abs(balances[user_id] - amount) < 1e-6 and abs(ledger[user_id] - amount) < 1e-6
+        for user_id, amount in expected.items()
+    )
+
+
+async def per_call(sessionmaker: async_sessionmaker, tasks) -> None:
+    for task_id, courier_id, amount in tasks:
+        async with sessionmaker() as session:
+            transaction = Transaction(
+                user_id=courier_id,
+                amount=amount,
+                type='reward',
+                related_id=task_id,
+                description=f'获得任务赏金: 任务#{task_id}',
+            )
+            await payment_service._credit(session, courier_id, amount, transaction)
+            await session.commit()
+
+
+async def batched(sessionmaker: async_sessionmaker, tasks) -> None:
+    async with sessionmaker() as session:
+        await session.execute(insert(SettlementQueue), [
+            {"task_id": task_id, "payee_id": courier_id, "amount": amount, "created_at": datetime.utcnow()}
+            for task_id, courier_id, amount in tasks
+        ])
+        await session.commit()
+    start = time.perf_counter()
+    while True:
+        async with sessionmaker() as session:
+            if not await settlement_service.settle_batch(session, BATCH_SIZE):
+                break
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    tmpdir = None
+    if len(sys.argv) > 1:
+        url = sys.argv[1]
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'settlement.db')}"
+
+    engine = build_engine(url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    tasks = await seed(sessionmaker)
+
+    print(f"{TASKS} 个已完成任务，{COURIERS} 个接单人，批大小 {BATCH_SIZE}")
+    start = time.perf_counter()
+    await per_call(sessionmaker, tasks)
+    elapsed = time.perf_counter() - start
+    print(f"逐笔结算: {TASKS / elapsed:8.0f} 笔/秒  {'正确' if await verify(sessionmaker, tasks) else '错误'}")
+
+    await reset(sessionmaker)
+    elapsed = await batched(sessionmaker, tasks)
+    print(f"批量结算: {TASKS / elapsed:8.0f} 笔/秒  {'正确' if await verify(sessionmaker, tasks) else '错误'}")
+
+    await engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
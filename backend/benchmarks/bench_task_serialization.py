@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+任务列表序列化基准测试
+
+对比两条路径（查询 + 序列化）：
+  旧路径: select(Task) + 两次 selectinload -> ResponseModel[list[TaskRead]]
+          -> 按 response_model 再次校验 -> json.dumps
+  新路径: 一次 JOIN 投影查询 TaskRead 需要的列 -> 列元组直接构建字典 -> orjson
+
+运行: cd backend && python -m benchmarks.bench_task_serialization
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+from app.core.responses import dumps
+from app.db.base import Base
+from app.models.task import Task, TaskCategory, TaskStatus, TaskUrgency
+from app.models.user import User
+from app.schemas.response import ResponseModel
+from app.schemas.task import TaskRead
+from app.services import task_read_service
+
+SIZES = (1_000, 10_000)
+USERS = 200
+ROUNDS = 5
+
+_response_adapter = TypeAdapter(ResponseModel[list[TaskRead]])
+
+
+async def seed(session: AsyncSession, task_count: int) -> None:
+    now = datetime.utcnow()
+    await session.execute(insert(User), [
+        {
+            "email": f"bench{i}@example.com",
+            "full_name": f"用户{i}",
+            "hashed_password": "x" * 60,
+            "role": "student",
+            "verified": False,
+            "is_active": True,
+            "credit_score": 3.5,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, USERS + 1)
+    ])
+    statuses = list(TaskStatus)
+    await session.execute(insert(Task), [
+        {
+            "title": f"帮忙取快递 #{i}",
+            "description": "从菜鸟驿站取件送到宿舍楼下，谢谢！" * 3,
+            "reward_amount": round(random.uniform(1, 50), 2),
+            "category": random.choice(list(TaskCategory)),
+            "urgency": random.choice(list(TaskUrgency)),
+            "pickup_location_name": "菜鸟驿站",
+            "pickup_lat": 39.9,
+            "pickup_lng": 116.4,
+            "dropoff_location_name": f"{i % 20 + 1}号宿舍楼",
+            "status": random.choice(statuses),
+            "created_at": now - timedelta(seconds=i),
+            "updated_at": now - timedelta(seconds=i),
+            "created_by_id": random.randint(1, USERS),
+            "assigned_to_id": random.choice([None, random.randint(1, USERS)]),
+        }
+        for i in range(task_count)
+    ])
+    await session.commit()
+
+
+async def old_path(session: AsyncSession) -> bytes:
+    stmt = (
+        select(Task)
+        .options(selectinload(Task.created_by), selectinload(Task.assigned_to))
+        .order_by(Task.created_at.desc())
+    )
+    tasks = (await session.execute(stmt)).scalars().all()
+    # 路由中构建 ResponseModel，FastAPI 再按 response_model 校验并序列化
+    model = ResponseModel(success=True, message="任务列表获取成功", data=tasks)
+    value = _response_adapter.validate_python(model, from_attributes=True)
+    content = _response_adapter.dump_python(value, mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False).encode("utf-8")
+
+
+async def new_path(session: AsyncSession) -> bytes:
+    stmt = task_read_service.task_projection().order_by(Task.created_at.desc())
+    data = await task_read_service.fetch_task_rows(session, stmt)
+    return dumps({"success": True, "message": "任务列表获取成功", "data": data, "code": 200, "requestId": None})
+
+
+async def measure(session_factory, path) -> tuple[float, bytes]:
+    timings = []
+    body = b""
+    for _ in range(ROUNDS):
+        async with session_factory() as session:
+            start = time.perf_counter()
+            body = await path(session)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings), body
+
+
+async def run(task_count: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_factory() as session:
+        await seed(session, task_count)
+
+    old_time, old_body = await measure(session_factory, old_path)
+    new_time, new_body = await measure(session_factory, new_path)
+    assert json.loads(old_body) == json.loads(new_body), "两条路径的输出不一致"
+
+    print(f"{task_count:>6} 个任务: 旧路径 {old_time * 1000:8.1f} ms | "
+          f"新路径 {new_time * 1000:8.1f} ms | 加速 {old_time / new_time:4.1f}x | "
+          f"响应 {len(new_body) / 1024:.0f} KiB")
+    await engine.dispose()
+
+
+async def main() -> None:
+    random.seed(42)
+    for size in SIZES:
+        await run(size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
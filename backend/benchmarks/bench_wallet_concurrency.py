@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+钱包并发扣款基准测试
+
+同一钱包预存 BALANCE 元，100 个并发请求各自用独立会话扣款 AMOUNT 元（余额只够一半请求），对比：
+  旧实现: 查询钱包 -> Python 中检查余额 -> wallet.balance -= amount -> 提交
+  新实现: PaymentService.pay_reward 的条件 UPDATE（balance >= :a 时才扣减）
+
+正确性要求：成功笔数 = BALANCE / AMOUNT，最终余额 = 预存 - 成功笔数 × AMOUNT，
+且与流水合计一致；其余请求返回余额不足。旧实现的余额检查基于各自读到的旧值，
+会超扣，且后提交的写入覆盖先提交的写入（丢失更新），余额与流水对不上。
+
+运行: cd backend && python -m benchmarks.bench_wallet_concurrency [数据库URL]
+不传 URL 时使用临时 SQLite 文件（WAL，与生产配置相同的连接池）
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.base import Base
+from app.db.session import build_engine
+from app.models.payment import Transaction, Wallet
+from app.models.user import User
+from app.schemas.payment import RechargeRequest
+from app.services.payment_service import payment_service
+
+PAYMENTS = 100
+AMOUNT = 1.0
+BALANCE = 50.0
+
+
+async def legacy_pay(db: AsyncSession, user_id: int, task_id: int, amount: float) -> bool:
+    wallet = (await db.execute(select(Wallet).where(Wallet.user_id == user_id))).scalar_one()
+    if wallet.balance < amount:
+        raise HTTPException(status_code=400, detail="余额不足")
+    wallet.balance -= amount
+    db.add(Transaction(user_id=user_id, amount=-amount, type='payment', related_id=task_id))
+    await db.commit()
+    return True
+
+
+async def run(sessionmaker: async_sessionmaker, user_id: int, pay) -> dict:
+    async with sessionmaker() as session:
+        await session.execute(delete(Transaction).where(Transaction.user_id == user_id))
+        await session.execute(delete(Wallet).where(Wallet.user_id == user_id))
+        await session.commit()
+        await payment_service.recharge(session, user_id, RechargeRequest(amount=BALANCE))
+        await session.commit()
+
+    outcome = {"ok": 0, "insufficient": 0, "error": 0}
+
+    async def one(task_id: int) -> None:
+        async with sessionmaker() as session:
+            try:
+                await pay(session, user_id, task_id, AMOUNT)
+                await session.commit()
+                outcome["ok"] += 1
+            except HTTPException:
+                outcome["insufficient"] += 1
+            except Exception:
+                outcome["error"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(task_id) for task_id in range(1, PAYMENTS + 1)))
+    elapsed = time.perf_counter() - start
+
+    async with sessionmaker() as session:
+        balance = (await session.execute(select(Wallet.balance).where(Wallet.user_id == user_id))).scalar_one()
+        ledger = (await session.execute(
+            select(func.coalesce(func.sum(Transaction.amount), 0)).where(Transaction.user_id == user_id)
+        )).scalar_one()
+    outcome.update(
+        balance=balance,
+        ledger=ledger,
+        per_second=PAYMENTS / elapsed,
+        correct=(
+            outcome["ok"] == int(BALANCE / AMOUNT)
+            and balance == BALANCE - outcome["ok"] * AMOUNT
+            and balance == ledger
+        ),
+    )
+    return outcome
+
+
+async def main() -> None:
+    tmpdir = None
+    if len(sys.argv) > 1:
+        url = sys.argv[1]
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'wallet.db')}"
+
+    engine = build_engine(url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmaker() as session:
+        user = User(email=f"wallet-bench-{time.time_ns()}@example.com", full_name="压测用户", hashed_password="x" * 60)
+        session.add(user)
+        await session.commit()
+        user_id = user.id
+
+    print(f"{PAYMENTS} 个并发扣款，每笔 {AMOUNT} 元，预存 {BALANCE} 元")
+    for name, pay in (("旧实现（读-改-写）", legacy_pay), ("新实现（条件 UPDATE）", payment_service.pay_reward)):
+        result = await run(sessionmaker, user_id, pay)
+        print(
+            f"{name}: 成功 {result['ok']:3d}  余额不足 {result['insufficient']:3d}  报错 {result['error']:3d}  "
+            f"余额 {result['balance']:6.2f}  流水合计 {result['ledger']:6.2f}  "
+            f"{result['per_second']:7.0f} 笔/秒  {'正确' if result['correct'] else '错误'}"
+        )
+
+    await engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
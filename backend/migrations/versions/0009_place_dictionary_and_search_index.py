@@ -0,0 +1,213 @@
+"""place dictionary and search index
+
+补齐基线之后加入的结构：地点字典、任务搜索倒排索引、任务的地点引用和 updated_at 索引、
+用户的 updated_at，并为已有任务回填搜索 token 和地点 id。
+早期的 0001 已经包含这些结构，按库中实际缺少的部分创建，
+此前被标记为 0001 后升级上来、缺少这些表的数据库也由本版本修复
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 12:26:11.890891
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# 与在线维护索引、地点字典时使用同一套分词和名称归一化规则
+from app.services.place_service import normalize
+from app.services.search_service import tokenize
+
+
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+task_table = sa.table(
+    'task',
+    sa.column('id', sa.Integer),
+    sa.column('title', sa.String),
+    sa.column('description', sa.Text),
+    sa.column('status', sa.String),
+    sa.column('pickup_location_name', sa.String),
+    sa.column('pickup_lat', sa.Float),
+    sa.column('pickup_lng', sa.Float),
+    sa.column('dropoff_location_name', sa.String),
+    sa.column('dropoff_lat', sa.Float),
+    sa.column('dropoff_lng', sa.Float),
+    sa.column('pickup_place_id', sa.Integer),
+    sa.column('dropoff_place_id', sa.Integer),
+)
+# 插入地点后要取回自增主键，需要声明主键列
+place_table = sa.Table(
+    'place',
+    sa.MetaData(),
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String),
+    sa.Column('normalized_name', sa.String),
+    sa.Column('lat', sa.Float),
+    sa.Column('lng', sa.Float),
+    sa.Column('created_at', sa.DateTime),
+)
+token_table = sa.table(
+    'task_search_token',
+    sa.column('token', sa.String),
+    sa.column('task_id', sa.Integer),
+    sa.column('weight', sa.Integer),
+    sa.column('status', sa.String),
+)
+
+
+def _backfill_search_tokens(bind) -> None:
+    """为还没有索引行的任务分批建立搜索 token"""
+    indexed = sa.exists().where(token_table.c.task_id == task_table.c.id)
+    last_id = 0
+    while True:
+        tasks = bind.execute(
+            sa.select(task_table.c.id, task_table.c.title, task_table.c.description, task_table.c.status)
+            .where(task_table.c.id > last_id, ~indexed)
+            .order_by(task_table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not tasks:
+            return
+        rows = [
+            {"token": token, "task_id": task.id, "weight": weight, "status": task.status}
+            for task in tasks
+            for token, weight in tokenize(task.title, task.description).items()
+        ]
+        if rows:
+            bind.execute(token_table.insert(), rows)
+        last_id = tasks[-1].id
+
+
+def _backfill_places(bind) -> None:
+    """为还没有关联地点的任务分批建立地点字典并写回地点 id，不改动 updated_at"""
+    places = {
+        row.normalized_name: row.id
+        for row in bind.execute(sa.select(place_table.c.id, place_table.c.normalized_name))
+    }
+
+    def place_id(name: str, lat: float | None, lng: float | None) -> int:
+        key = normalize(name)
+        if key not in places:
+            places[key] = bind.execute(
+                place_table.insert().values(
+                    name=name, normalized_name=key, lat=lat, lng=lng, created_at=datetime.utcnow()
+                )
+            ).inserted_primary_key[0]
+        return places[key]
+
+    last_id = 0
+    while True:
+        tasks = bind.execute(
+            sa.select(task_table)
+            .where(
+                task_table.c.id > last_id,
+                sa.or_(task_table.c.pickup_place_id.is_(None), task_table.c.dropoff_place_id.is_(None)),
+            )
+            .order_by(task_table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not tasks:
+            return
+        for task in tasks:
+            bind.execute(
+                task_table.update()
+                .where(task_table.c.id == task.id)
+                .values(
+                    pickup_place_id=place_id(task.pickup_location_name, task.pickup_lat, task.pickup_lng),
+                    dropoff_place_id=place_id(task.dropoff_location_name, task.dropoff_lat, task.dropoff_lng),
+                )
+            )
+        last_id = tasks[-1].id
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    task_columns = {column['name'] for column in inspector.get_columns('task')}
+    task_indexes = {index['name'] for index in inspector.get_indexes('task')}
+    user_columns = {column['name'] for column in inspector.get_columns('user')}
+
+    if 'place' not in tables:
+        op.create_table('place',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('normalized_name', sa.String(length=120), nullable=False),
+        sa.Column('lat', sa.Float(), nullable=True),
+        sa.Column('lng', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('place', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_place_id'), ['id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_place_normalized_name'), ['normalized_name'], unique=True)
+
+    if 'task_search_token' not in tables:
+        op.create_table('task_search_token',
+        sa.Column('token', sa.String(length=8), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('weight', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'accepted', 'picked', 'delivering', 'confirming', 'completed', 'cancelled', name='taskstatus'), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['task.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('token', 'task_id')
+        )
+        with op.batch_alter_table('task_search_token', schema=None) as batch_op:
+            batch_op.create_index('ix_task_search_token_task_id', ['task_id'], unique=False)
+            batch_op.create_index('ix_task_search_token_token_status', ['token', 'status'], unique=False)
+
+    if 'pickup_place_id' not in task_columns:
+        with op.batch_alter_table('task', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('pickup_place_id', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('dropoff_place_id', sa.Integer(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_task_dropoff_place_id'), ['dropoff_place_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_task_pickup_place_id'), ['pickup_place_id'], unique=False)
+            batch_op.create_foreign_key('fk_task_dropoff_place_id_place', 'place', ['dropoff_place_id'], ['id'], ondelete='SET NULL')
+            batch_op.create_foreign_key('fk_task_pickup_place_id_place', 'place', ['pickup_place_id'], ['id'], ondelete='SET NULL')
+
+    if 'ix_task_updated_at' not in task_indexes:
+        with op.batch_alter_table('task', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_task_updated_at'), ['updated_at'], unique=False)
+
+    if 'updated_at' not in user_columns:
+        # 已有用户以注册时间作为初始值，再改为非空
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        user_table = sa.table('user', sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime))
+        op.execute(user_table.update().values(updated_at=user_table.c.created_at))
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+    _backfill_search_tokens(bind)
+    _backfill_places(bind)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_task_pickup_place_id_place', type_='foreignkey')
+        batch_op.drop_constraint('fk_task_dropoff_place_id_place', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_task_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_task_pickup_place_id'))
+        batch_op.drop_index(batch_op.f('ix_task_dropoff_place_id'))
+        batch_op.drop_column('dropoff_place_id')
+        batch_op.drop_column('pickup_place_id')
+
+    with op.batch_alter_table('task_search_token', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_search_token_token_status')
+        batch_op.drop_index('ix_task_search_token_task_id')
+
+    op.drop_table('task_search_token')
+    with op.batch_alter_table('place', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_place_normalized_name'))
+        batch_op.drop_index(batch_op.f('ix_place_id'))
+
+    op.drop_table('place')
@@ -1,3 +1,7 @@
+import os
+import tempfile
+import uuid
+
 import pytest
 from typing import AsyncGenerator
 from fastapi.testclient import TestClient
@@ -5,41 +9,38 @@ from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# 测试使用临时目录中的 SQLite 数据库，应用本身的引擎（启动预热、就绪检查等）也指向它，
+# 不再改动仓库中的 ./test.db（它同时是默认的开发数据库）。必须在导入应用之前设置
+_test_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_test_db_dir.name}/test.db"
+
+from app.core.config import settings
 from app.main import app
 from app.db.base import Base
 from app.api import deps
 
-# 使用内存 SQLite 数据库进行测试
-# check_same_thread=False 是 SQLite 在多线程环境下的特殊要求
-TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
-
-engine = create_async_engine(
-    TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-
-TestingSessionLocal = async_sessionmaker(
-    engine,
-    expire_on_commit=False,
-    class_=AsyncSession,
-)
-
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
 
 @pytest.fixture(scope="module")
-async def init_db():
+async def engine():
+    # check_same_thread=False 是 SQLite 在多线程环境下的特殊要求
+    engine = create_async_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     async with engine.begin() as conn:
+        # 每个测试模块从空库开始
+        await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
-    # yield
-    # async with engine.begin() as conn:
-    #     await conn.run_sync(Base.metadata.drop_all)
+    yield engine
+    await engine.dispose()
 
 @pytest.fixture
-async def db_session(init_db) -> AsyncGenerator[AsyncSession, None]:
-    async with TestingSessionLocal() as session:
+async def db_session(engine) -> AsyncGenerator[AsyncSession, None]:
+    async with async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as session:
         yield session
 
 @pytest.fixture
@@ -48,8 +49,50 @@ async def client(db_session) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
 
     app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_read_db] = override_get_db
     
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
         yield c
     
     app.dependency_overrides.clear()
+
+
+# 测试中默认发布的取快递任务，各测试按需覆盖字段
+TASK_PAYLOAD = {
+    "title": "帮忙取快递",
+    "description": "菜鸟驿站取件",
+    "pickupLocationName": "菜鸟驿站",
+    "pickupLat": 39.9,
+    "pickupLng": 116.4,
+    "dropoffLocationName": "一号宿舍楼",
+    "dropoffLat": 39.91,
+    "dropoffLng": 116.41,
+    "rewardAmount": 5.0,
+}
+
+@pytest.fixture
+def auth_headers(client):
+    """注册并登录一个新用户，返回带访问令牌的请求头（全名为 "<prefix> user"）"""
+    async def register_and_login(prefix: str) -> dict:
+        user_data = {
+            "email": f"{prefix}_{str(uuid.uuid4())[:8]}@example.com",
+            "password": "password123",
+            "full_name": f"{prefix} user",
+        }
+        resp = await client.post("/api/auth/register", json=user_data)
+        assert resp.status_code == 201, resp.json()
+        login = await client.post("/api/auth/login", json={
+            "email": user_data["email"],
+            "password": user_data["password"]
+        })
+        return {"Authorization": f"Bearer {login.json()['data']['accessToken']}"}
+    return register_and_login
+
+@pytest.fixture
+def create_task(client):
+    """以 TASK_PAYLOAD 为模板发布任务，返回响应中的任务数据"""
+    async def create(headers: dict, **overrides) -> dict:
+        resp = await client.post("/api/tasks", json={**TASK_PAYLOAD, **overrides}, headers=headers)
+        assert resp.status_code == 201, resp.json()
+        return resp.json()["data"]
+    return create
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.user import User
+from app.services import user_export_service
+
+
+async def _admin_headers(client: AsyncClient, auth_headers, db_session: AsyncSession) -> dict:
+    headers = await auth_headers("admin")
+    me = await client.get("/api/users/me", headers=headers)
+    await db_session.execute(update(User).where(User.id == me.json()["data"]["id"]).values(role="admin"))
+    await db_session.commit()
+    return headers
+
+
+@pytest.mark.anyio
+async def test_admin_user_pages_and_streaming_export(
+    client: AsyncClient, db_session: AsyncSession, auth_headers, monkeypatch
+):
+    headers = await _admin_headers(client, auth_headers, db_session)
+    await db_session.execute(
+        update(User).where(User.email.like("admin_%")).values(full_name="=HYPERLINK(\"x\")")
+    )
+    await db_session.commit()
+    total = (await db_session.execute(select(func.count(User.id)))).scalar_one()
+
+    ids = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get("/api/users", params=params, headers=headers)
+        page = resp.json()["data"]
+        ids.extend(user["id"] for user in page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    assert ids == sorted(ids) and len(ids) == total
+
+    resp = await client.get("/api/users", params={"keyword": "HYPERLINK", "limit": 200}, headers=headers)
+    assert [user["fullName"] for user in resp.json()["data"]["items"]] == ['=HYPERLINK("x")']
+
+    # 导出在响应发送时才读取数据库，测试中改用测试库的会话
+    sessionmaker = async_sessionmaker(db_session.bind, expire_on_commit=False, class_=AsyncSession)
+
+    @asynccontextmanager
+    async def read_session(key=None):
+        async with sessionmaker() as session:
+            yield session
+
+    monkeypatch.setattr(user_export_service, "read_session", read_session)
+    monkeypatch.setattr(user_export_service.settings, "user_export_batch_size", 2)
+
+    resp = await client.get("/api/users/export", headers=headers)
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.content.splitlines()]
+    assert [row["id"] for row in rows] == ids
+    assert "hashed_password" not in rows[0]
+
+    resp = await client.get("/api/users/export", params={"format": "csv"}, headers=headers)
+    rows = list(csv.DictReader(io.StringIO(resp.content.decode("utf-8-sig"))))
+    assert [int(row["id"]) for row in rows] == ids
+    names = {row["full_name"] for row in rows}
+    assert "'=HYPERLINK(\"x\")" in names and '=HYPERLINK("x")' not in names
@@ -0,0 +1,57 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.anyio
+async def test_task_detail_not_modified(client: AsyncClient, auth_headers, create_task):
+    publisher = await auth_headers("etag_publisher")
+    acceptor = await auth_headers("etag_acceptor")
+    task_id = (await create_task(publisher))["id"]
+
+    # 首次请求返回完整响应和校验值
+    resp = await client.get(f"/api/tasks/{task_id}")
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+    assert resp.headers["last-modified"]
+
+    # 未变化时返回 304 且没有响应体
+    resp = await client.get(f"/api/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+    # 任务被修改后校验值变化
+    await client.post(f"/api/tasks/{task_id}/accept", headers=acceptor)
+    resp = await client.get(f"/api/tasks/{task_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert resp.json()["data"]["status"] == "accepted"
+
+
+@pytest.mark.anyio
+async def test_task_list_and_current_user_not_modified(client: AsyncClient, auth_headers):
+    headers = await auth_headers("etag_list")
+
+    resp = await client.get("/api/tasks", params={"status": "pending"})
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+    resp = await client.get("/api/tasks", params={"status": "pending"}, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    # 任务离开筛选结果时最大修改时间会变小，列表只用 ETag 校验
+    assert "last-modified" not in resp.headers
+    resp = await client.get(
+        "/api/tasks", params={"status": "pending"},
+        headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"},
+    )
+    assert resp.status_code == 200
+
+    resp = await client.get("/api/users/me", headers=headers)
+    assert resp.status_code == 200
+    last_modified = resp.headers["last-modified"]
+    resp = await client.get("/api/users/me", headers={**headers, "If-Modified-Since": last_modified})
+    assert resp.status_code == 304
+
+    # 修改资料后重新返回完整响应
+    await client.put("/api/users/me", json={"campus": "Campus B"}, headers=headers)
+    resp = await client.get("/api/users/me", headers={**headers, "If-None-Match": resp.headers["etag"]})
+    assert resp.status_code == 200
+    assert resp.json()["data"]["campus"] == "Campus B"
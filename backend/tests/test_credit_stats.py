@@ -0,0 +1,81 @@
+import pytest
+from httpx import AsyncClient
+
+from app.services.credit_service import task_stats_cache
+
+
+@pytest.mark.anyio
+async def test_credit_stats_are_counted_and_invalidated_on_status_change(client: AsyncClient, auth_headers, create_task):
+    publisher = await auth_headers("credit_publisher")
+    courier = await auth_headers("credit_courier")
+
+    async def credit(headers: dict) -> dict:
+        resp = await client.get("/api/users/me/credit", headers=headers)
+        assert resp.json()["success"], resp.json()
+        return resp.json()["data"]
+
+    task_id = (await create_task(publisher, rewardAmount=3.0))["id"]
+    await create_task(publisher, rewardAmount=3.0)
+    data = await credit(publisher)
+    assert data["task_counts"] == {"published": 2, "taken": 0}
+    assert data["completion_rates"]["publish"] == 0
+
+    hits = task_stats_cache.hits
+    await credit(publisher)
+    assert task_stats_cache.hits == hits + 1
+
+    await credit(courier)
+    courier_id = (await client.get("/api/users/me", headers=courier)).json()["data"]["id"]
+
+    async def summary() -> dict:
+        resp = await client.post("/api/users/summaries", json={"userIds": [courier_id]}, headers=courier)
+        return resp.json()["data"][0]
+
+    assert (await summary())["completedTaken"] == 0
+    await client.post(f"/api/tasks/{task_id}/accept", headers=courier)
+    for status in ("picked", "delivering", "confirming", "completed"):
+        await client.post(f"/api/tasks/{task_id}/status", json={"status": status}, headers=courier)
+
+    # 状态变化提交后发布者和接单者的统计都会重新计算
+    data = await credit(publisher)
+    assert data["completion_rates"]["publish"] == 0.5
+    data = await credit(courier)
+    assert data["task_counts"] == {"published": 0, "taken": 1}
+    assert data["completion_rates"]["take"] == 1.0
+    # 用户资料摘要中的完成数和信用分同时失效
+    assert (await summary())["completedTaken"] == 1
+
+
+@pytest.mark.anyio
+async def test_credit_events_and_incremental_trend(client: AsyncClient, auth_headers, create_task):
+    publisher = await auth_headers("trend_publisher")
+    courier = await auth_headers("trend_courier")
+    courier_id = (await client.get("/api/users/me", headers=courier)).json()["data"]["id"]
+
+    task_id = (await create_task(publisher, rewardAmount=3.0))["id"]
+    await client.post(f"/api/tasks/{task_id}/accept", headers=courier)
+    for status in ("picked", "delivering", "confirming", "completed"):
+        await client.post(f"/api/tasks/{task_id}/status", json={"status": status}, headers=courier)
+
+    data = (await client.get("/api/users/me/credit", headers=courier)).json()["data"]
+    assert (data["score_trend"], data["trend_value"]) == ("rising", 0.06)
+
+    # 评价把信用分改为平均分 2.0，同样记录变动并更新趋势
+    await client.post(
+        "/api/evaluation/submit",
+        json={"taskId": task_id, "evaluateeId": courier_id, "score": 2},
+        headers=publisher,
+    )
+    data = (await client.get("/api/users/me/credit", headers=courier)).json()["data"]
+    assert data["score_trend"] == "falling"
+
+    resp = await client.get("/api/users/me/credit/history", params={"limit": 1}, headers=courier)
+    page = resp.json()["data"]
+    assert [(e["reason"], e["scoreAfter"]) for e in page["items"]] == [("evaluation", 2.0)]
+    resp = await client.get(
+        "/api/users/me/credit/history", params={"cursor": page["nextCursor"]}, headers=courier
+    )
+    events = resp.json()["data"]["items"]
+    assert [(e["reason"], e["delta"], e["taskId"]) for e in events] == [
+        ("task_completed_assignee", pytest.approx(0.2), task_id)
+    ]
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import InstrumentedQueuePool, build_engine, pool_stats, replica_router, write_session
+from app.models.place import Place
+
+
+@pytest.mark.anyio
+async def test_sqlite_engine_uses_wal_and_records_pool_waits(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    pool_stats.reset()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, value INTEGER)"))
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() > 0
+
+        # 并发写入时由 busy_timeout 排队等待写锁，不再报 "database is locked"
+        async def write(value: int) -> None:
+            async with engine.begin() as conn:
+                await conn.execute(text("INSERT INTO item (value) VALUES (:value)"), {"value": value})
+
+        await asyncio.gather(*(write(i) for i in range(20)))
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM item"))).scalar() == 20
+
+        stats = pool_stats.snapshot(engine.pool)
+        assert stats["checkouts"] >= 22
+        assert stats["timeouts"] == 0
+        assert stats["checked_out"] == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_replica_router_health_and_read_your_writes(tmp_path):
+    from app.db.session import ReplicaRouter, sticky_key
+
+    router = ReplicaRouter([
+        f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+        f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}",
+    ])
+    try:
+        # 无法连接的副本被健康检查剔除，读请求只分配给可用副本
+        assert await router.check_health(force=True) == [True, False]
+        assert {await router.choose(None) for _ in range(4)} == {0}
+
+        key = sticky_key("Bearer token")
+        router.mark_written(key)
+        assert await router.choose(key) is None
+        assert await router.choose(sticky_key("Bearer other")) == 0
+
+        router.mark_unhealthy(0)
+        assert await router.choose(None) is None
+    finally:
+        await router.dispose()
+
+
+@pytest.mark.anyio
+async def test_core_writes_make_the_writer_sticky(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(replica_router, "_sticky", {})
+    monkeypatch.setattr("app.db.session.AsyncSessionLocal", lambda: AsyncSession(db_session.bind))
+
+    async with write_session("reader") as session:
+        await session.execute(select(Place.id))
+        await session.commit()
+    assert not replica_router.is_sticky("reader")
+
+    # 不经过 flush 的 Core 写入同样在提交后固定走主库
+    async with write_session("core") as session:
+        await session.execute(update(Place).where(Place.id == 0).values(lat=1.0))
+        await session.commit()
+    async with write_session("connection") as session:
+        connection = await session.connection()
+        await connection.execute(insert(Place).values(name="粘滞", normalized_name="粘滞"))
+        await session.commit()
+    async with write_session("flush") as session:
+        session.add(Place(name="粘滞2", normalized_name="粘滞2"))
+        await session.commit()
+    assert all(replica_router.is_sticky(key) for key in ("core", "connection", "flush"))
+
+
+@pytest.mark.anyio
+async def test_authenticated_reads_do_not_use_the_primary(client, auth_headers, monkeypatch):
+    from app.api import deps
+    from app.main import app
+
+    headers = await auth_headers("read_only")
+
+    async def no_primary():
+        raise AssertionError("只读路由不应打开主库会话")
+        yield
+
+    # 只读路由的当前用户也从只读会话查询
+    monkeypatch.setitem(app.dependency_overrides, deps.get_db, no_primary)
+    for path in ("/api/users/me", "/api/tasks/my", "/api/payment/transactions", "/api/chat/sessions"):
+        resp = await client.get(path, headers=headers)
+        assert resp.status_code == 200, path
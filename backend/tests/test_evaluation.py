@@ -0,0 +1,98 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.credit import CreditEvent
+from app.models.user import User
+from app.services import user_summary_service
+
+
+async def _user_id(client: AsyncClient, headers: dict) -> int:
+    return (await client.get("/api/users/me", headers=headers)).json()["data"]["id"]
+
+
+@pytest.mark.anyio
+async def test_rating_aggregates_and_paginated_evaluations(client: AsyncClient, auth_headers):
+    evaluator = await auth_headers("rater")
+    courier = await auth_headers("rated")
+    courier_id = await _user_id(client, courier)
+
+    for task_id, score in enumerate((5, 4, 3), start=1):
+        resp = await client.post(
+            "/api/evaluation/submit",
+            json={"taskId": task_id, "evaluateeId": courier_id, "score": score},
+            headers=evaluator,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["data"]["evaluator"] is not None
+
+    resp = await client.get("/api/users/me", headers=courier)
+    assert resp.json()["data"]["creditScore"] == 4.0
+
+    scores = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get(f"/api/evaluation/user/{courier_id}", params=params)
+        summary = resp.json()["data"]
+        assert (summary["averageScore"], summary["totalEvaluations"]) == (4.0, 3)
+        scores.extend(e["score"] for e in summary["evaluations"])
+        cursor = summary["nextCursor"]
+        if cursor is None:
+            break
+    assert scores == [3.0, 4.0, 5.0]
+
+
+@pytest.mark.anyio
+async def test_user_summaries_are_batched_and_cached(client: AsyncClient, auth_headers):
+    evaluator = await auth_headers("summary_rater")
+    evaluator_id = await _user_id(client, evaluator)
+    courier_id = await _user_id(client, await auth_headers("summary_rated"))
+
+    async def summaries(user_ids: list[int]) -> list[dict]:
+        resp = await client.post("/api/users/summaries", json={"userIds": user_ids}, headers=evaluator)
+        assert resp.status_code == 200
+        return resp.json()["data"]
+
+    result = await summaries([courier_id, evaluator_id, courier_id, 999999])
+    assert [s["id"] for s in result] == [courier_id, evaluator_id]
+    assert (result[0]["ratingCount"], result[0]["completedTaken"]) == (0, 0)
+
+    hits = user_summary_service.summary_cache.hits
+    await summaries([courier_id])
+    assert user_summary_service.summary_cache.hits == hits + 1
+
+    # 提交评价后被评价人的摘要立即失效
+    await client.post(
+        "/api/evaluation/submit",
+        json={"taskId": 1, "evaluateeId": courier_id, "score": 4.5},
+        headers=evaluator,
+    )
+    result = await summaries([courier_id])
+    assert (result[0]["ratingAverage"], result[0]["ratingCount"]) == (4.5, 1)
+
+    resp = await client.post("/api/users/summaries", json={"userIds": list(range(1, 102))}, headers=evaluator)
+    assert resp.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_rating_user_without_credit_score(client: AsyncClient, db_session: AsyncSession, auth_headers):
+    evaluator = await auth_headers("null_rater")
+    courier = await auth_headers("null_rated")
+    courier_id = await _user_id(client, courier)
+    await db_session.execute(update(User).where(User.id == courier_id).values(credit_score=None))
+    await db_session.commit()
+
+    resp = await client.post(
+        "/api/evaluation/submit",
+        json={"taskId": 1, "evaluateeId": courier_id, "score": 4},
+        headers=evaluator,
+    )
+    assert resp.status_code == 200
+    resp = await client.get("/api/users/me", headers=courier)
+    assert resp.json()["data"]["creditScore"] == 4.0
+    event = (await db_session.execute(
+        select(CreditEvent).where(CreditEvent.user_id == courier_id)
+    )).scalar_one()
+    assert (event.delta, event.score_after) == (4.0, 4.0)
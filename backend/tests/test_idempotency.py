@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency import IdempotencyKey
+from app.services.idempotency_service import IdempotentRequest
+from app.services.payment_service import payment_service
+
+
+@pytest.mark.anyio
+async def test_retried_recharge_is_applied_once(client: AsyncClient, auth_headers):
+    auth = await auth_headers("idempotent_recharge")
+    headers = {**auth, "Idempotency-Key": str(uuid.uuid4())}
+
+    first = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+    retried = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+    assert first.status_code == retried.status_code == 200
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert retried.content == first.content
+    assert first.json()["data"]["balance"] == 10.0
+
+    # 同一个 key 不能用于不同的请求
+    resp = await client.post("/api/payment/recharge", json={"amount": 20}, headers=headers)
+    assert resp.status_code == 422
+
+    resp = await client.get("/api/payment/transactions", headers=auth)
+    assert len(resp.json()["data"]["items"]) == 1
+
+    # 失败的请求不保存结果，可以用同一个 key 重试
+    pay_headers = {**headers, "Idempotency-Key": str(uuid.uuid4())}
+    resp = await client.post("/api/payment/pay", json={"taskId": 1, "amount": 50}, headers=pay_headers)
+    assert resp.status_code == 400
+    resp = await client.post("/api/payment/pay", json={"taskId": 1, "amount": 50}, headers=pay_headers)
+    assert resp.status_code == 400
+    assert "Idempotent-Replayed" not in resp.headers
+
+
+@pytest.mark.anyio
+async def test_retried_task_creation_creates_one_task(client: AsyncClient, auth_headers, create_task):
+    headers = {**await auth_headers("idempotent_task"), "Idempotency-Key": str(uuid.uuid4())}
+
+    first = await create_task(headers)
+    retried = await create_task(headers)
+    assert retried["id"] == first["id"]
+
+    resp = await client.get("/api/tasks/my", params={"role": "publisher"}, headers=headers)
+    assert len(resp.json()["data"]) == 1
+
+
+@pytest.mark.anyio
+async def test_abandoned_placeholder_is_taken_over(
+    client: AsyncClient, db_session: AsyncSession, auth_headers, monkeypatch
+):
+    headers = {**await auth_headers("idempotent_crash"), "Idempotency-Key": str(uuid.uuid4())}
+
+    # 模拟处理进程在保存响应之前退出：占位记录留在库中
+    async def crash(*args, **kwargs):
+        raise HTTPException(status_code=500, detail="worker killed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(payment_service, "recharge", crash)
+        patch.setattr(IdempotentRequest, "release", lambda self: asyncio.sleep(0))
+        resp = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+        assert resp.status_code == 500
+
+    resp = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+    assert resp.status_code == 409
+
+    # 超过处理超时后，重试的请求接管占位并正常完成
+    await db_session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == headers["Idempotency-Key"])
+        .values(locked_at=datetime.utcnow() - timedelta(hours=1))
+    )
+    await db_session.commit()
+    resp = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["data"]["balance"] == 10.0
+    retried = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+    assert retried.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.anyio
+async def test_write_is_rolled_back_when_placeholder_was_taken_over(
+    client: AsyncClient, auth_headers, monkeypatch
+):
+    auth = await auth_headers("idempotent_slow")
+    headers = {**auth, "Idempotency-Key": str(uuid.uuid4())}
+    recharge = payment_service.recharge
+
+    async def slow_recharge(db, user_id, recharge_in):
+        wallet = await recharge(db, user_id, recharge_in)
+        # 模拟处理超时期间占位被重试的请求接管
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == headers["Idempotency-Key"])
+            .values(locked_at=datetime.utcnow() + timedelta(seconds=5))
+        )
+        return wallet
+
+    with monkeypatch.context() as patch:
+        patch.setattr(payment_service, "recharge", slow_recharge)
+        resp = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+        assert resp.status_code == 409
+
+    # 充值与响应在同一事务中，保存失败时充值一并回滚
+    resp = await client.get("/api/payment/balance", headers=auth)
+    assert resp.json()["data"]["balance"] == 0.0
@@ -0,0 +1,35 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "耗时", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/a")
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_reports_routes_by_template(client: AsyncClient):
+    await client.get("/api/tasks")
+    await client.get("/api/tasks/999999")
+    resp = await client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    # 路径参数按路由模板聚合
+    assert 'http_requests_total{method="GET",route="/api/tasks",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/api/tasks/{task_id}",status="404"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/tasks",le="+Inf"}' in text
+    assert "http_requests_in_flight 1" in text
+    assert "websocket_connections 0" in text
+    assert 'cache_requests_total{cache="task_list",result="miss"}' in text
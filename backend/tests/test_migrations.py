@@ -0,0 +1,69 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import migrations
+from app.db.base import Base
+
+BASELINE_DB = Path(__file__).resolve().parents[1] / "test.db"
+
+
+@pytest.mark.anyio
+async def test_migrations_match_models(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrations.db'}")
+    try:
+        # 空库未初始化时 check 模式拒绝启动
+        with pytest.raises(migrations.SchemaVersionError):
+            await migrations.prepare_schema(engine, "check")
+
+        await migrations.prepare_schema(engine, "migrate")
+        await migrations.prepare_schema(engine, "check")
+
+        async with engine.connect() as conn:
+            diff = await conn.run_sync(
+                lambda sync_conn: compare_metadata(MigrationContext.configure(sync_conn), Base.metadata)
+            )
+        assert diff == []
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_baseline_database_is_stamped_and_upgraded(tmp_path):
+    # 仓库中的 test.db 是引入迁移之前由 create_all 建出的库：有数据但没有版本记录
+    if not BASELINE_DB.exists():
+        pytest.skip("缺少基线数据库 test.db")
+    with sqlite3.connect(BASELINE_DB) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "alembic_version" in tables:
+        pytest.skip("本地的 test.db 已经执行过迁移，不再是基线结构")
+
+    db_path = tmp_path / "legacy.db"
+    shutil.copyfile(BASELINE_DB, db_path)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    try:
+        await migrations.prepare_schema(engine, "migrate")
+        await migrations.prepare_schema(engine, "check")
+
+        async with engine.connect() as conn:
+            diff = await conn.run_sync(
+                lambda sync_conn: compare_metadata(MigrationContext.configure(sync_conn), Base.metadata)
+            )
+            assert diff == []
+            # 已有任务补建了搜索索引和地点引用
+            unindexed = await conn.execute(text(
+                "SELECT count(*) FROM task WHERE id NOT IN (SELECT task_id FROM task_search_token)"
+            ))
+            assert unindexed.scalar_one() == 0
+            unresolved = await conn.execute(text(
+                "SELECT count(*) FROM task WHERE pickup_place_id IS NULL OR dropoff_place_id IS NULL"
+            ))
+            assert unresolved.scalar_one() == 0
+    finally:
+        await engine.dispose()
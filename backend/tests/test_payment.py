@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.base import Base
+from app.db.session import build_engine
+from app.models.payment import Transaction, Wallet
+from app.models.user import User
+from app.schemas.payment import RechargeRequest
+from app.services.payment_service import payment_service
+
+
+@pytest.mark.anyio
+async def test_recharge_and_pay(client: AsyncClient, auth_headers):
+    headers = await auth_headers("wallet")
+
+    resp = await client.get("/api/payment/balance", headers=headers)
+    assert resp.json()["data"]["balance"] == 0.0
+
+    resp = await client.post("/api/payment/recharge", json={"amount": 10}, headers=headers)
+    assert resp.json()["data"]["balance"] == 10.0
+
+    resp = await client.post("/api/payment/pay", json={"taskId": 1, "amount": 6}, headers=headers)
+    assert resp.status_code == 200
+    resp = await client.post("/api/payment/pay", json={"taskId": 2, "amount": 6}, headers=headers)
+    assert resp.status_code == 400
+    # 负数金额不能把扣款变成入账
+    resp = await client.post("/api/payment/pay", json={"taskId": 3, "amount": -6}, headers=headers)
+    assert resp.status_code == 422
+
+    resp = await client.get("/api/payment/balance", headers=headers)
+    assert resp.json()["data"]["balance"] == 4.0
+    resp = await client.get("/api/payment/transactions", headers=headers)
+    assert sorted(t["amount"] for t in resp.json()["data"]["items"]) == [-6.0, 10.0]
+
+
+@pytest.mark.anyio
+async def test_transaction_pages_and_monthly_totals(client: AsyncClient, auth_headers):
+    headers = await auth_headers("ledger")
+    for amount in (1, 2, 3, 4, 5):
+        await client.post("/api/payment/recharge", json={"amount": amount}, headers=headers)
+    await client.post("/api/payment/pay", json={"taskId": 1, "amount": 6}, headers=headers)
+
+    amounts = []
+    cursor = None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get("/api/payment/transactions", params=params, headers=headers)
+        page = resp.json()["data"]
+        amounts.extend(t["amount"] for t in page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    assert amounts == [-6.0, 5.0, 4.0, 3.0, 2.0, 1.0]
+
+    resp = await client.get("/api/payment/transactions", params={"cursor": "invalid"}, headers=headers)
+    assert resp.status_code == 400
+
+    resp = await client.get("/api/payment/transactions/monthly", headers=headers)
+    totals = {t["type"]: (t["totalAmount"], t["count"]) for t in resp.json()["data"]}
+    assert totals == {"deposit": (15.0, 5), "payment": (-6.0, 1)}
+
+
+@pytest.mark.anyio
+async def test_concurrent_payments_never_overdraw(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'wallet.db'}")
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessionmaker() as session:
+            user = User(email="concurrent@example.com", full_name="concurrent", hashed_password="x")
+            session.add(user)
+            await session.commit()
+
+        async def balance() -> None:
+            async with sessionmaker() as session:
+                await payment_service.get_balance(session, user.id)
+
+        # 并发的首次查询只会创建一个钱包
+        await asyncio.gather(*(balance() for _ in range(10)))
+        async with sessionmaker() as session:
+            await payment_service.recharge(session, user.id, RechargeRequest(amount=10))
+            await session.commit()
+
+        async def pay(task_id: int) -> bool:
+            async with sessionmaker() as session:
+                try:
+                    await payment_service.pay_reward(session, user.id, task_id, 1.0)
+                except HTTPException:
+                    return False
+                await session.commit()
+                return True
+
+        results = await asyncio.gather(*(pay(task_id) for task_id in range(30)))
+        assert results.count(True) == 10
+
+        async with sessionmaker() as session:
+            wallet = (await session.execute(select(Wallet).where(Wallet.user_id == user.id))).scalar_one()
+            ledger = (await session.execute(
+                select(func.sum(Transaction.amount)).where(Transaction.user_id == user.id)
+            )).scalar_one()
+        assert wallet.balance == 0.0
+        assert ledger == 0.0
+    finally:
+        await engine.dispose()
@@ -0,0 +1,75 @@
+import pytest
+import uuid
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.place import Place
+from app.services.place_service import PlaceEntry, PlaceIndex
+
+
+def test_place_index_prefix_and_substring():
+    index = PlaceIndex()
+    for place_id, name in enumerate(["一号宿舍楼", "菜鸟驿站", "东门菜鸟驿站", "图书馆"], start=1):
+        index.add(PlaceEntry(place_id, name, name))
+
+    assert index.match("菜鸟驿站") == {2, 3}
+    assert index.match("宿舍") == {1}
+    assert index.match("驿站宿舍") == set()
+    # 前缀匹配排在包含匹配之前
+    assert [place.id for place in index.autocomplete("菜鸟")] == [2, 3]
+
+    # 同一 id 的名称变化后旧名称不再命中
+    index.add(PlaceEntry(4, "新图书馆", "新图书馆"))
+    assert index.match("新图书") == {4}
+    assert [place.id for place in index.autocomplete("图书馆")] == [4]
+    assert len(index) == 4
+
+
+@pytest.mark.anyio
+async def test_place_index_refresh_picks_up_new_places_and_coordinates(db_session: AsyncSession):
+    index = PlaceIndex()
+    name = f"西门{uuid.uuid4().hex[:6]}"
+    place = Place(name=name, normalized_name=name)
+    db_session.add(place)
+    await db_session.commit()
+
+    # 其他进程新建的地点和随后补充的坐标都在下一次 refresh 时同步
+    await index.refresh(db_session, force=True)
+    assert index.lookup(name).lat is None
+    await db_session.execute(update(Place).where(Place.id == place.id).values(lat=39.7, lng=116.2))
+    await db_session.commit()
+    await index.refresh(db_session, force=True)
+    assert (index.lookup(name).lat, index.lookup(name).lng) == (39.7, 116.2)
+
+
+@pytest.mark.anyio
+async def test_location_filter_and_autocomplete(client: AsyncClient, auth_headers, create_task):
+    headers = await auth_headers("place_publisher")
+    marker = uuid.uuid4().hex[:6]
+
+    async def create(pickup: str, lat: float | None = None, lng: float | None = None) -> dict:
+        return await create_task(
+            headers,
+            title=f"取快递{marker}",
+            pickupLocationName=pickup,
+            pickupLat=lat,
+            pickupLng=lng,
+            dropoffLocationName=f"宿舍{marker}",
+        )
+
+    first = await create(f"北门驿站{marker}", lat=39.9, lng=116.4)
+    # 同名地点（大小写、全角差异）复用已有坐标
+    second = await create(f"北门驿站{marker.upper()}")
+    assert (second["pickupLat"], second["pickupLng"]) == (39.9, 116.4)
+    other = await create(f"南门快递点{marker}", lat=39.8, lng=116.3)
+
+    resp = await client.get("/api/tasks", params={"pickup_location": f"驿站{marker}"})
+    ids = {task["id"] for task in resp.json()["data"]}
+    assert ids == {first["id"], second["id"]}
+    assert other["id"] not in ids
+
+    resp = await client.get("/api/maps/places/autocomplete", params={"q": f"北门驿站{marker}"})
+    places = resp.json()["data"]
+    assert [place["name"] for place in places] == [f"北门驿站{marker}"]
+    assert (places[0]["lat"], places[0]["lng"]) == (39.9, 116.4)
@@ -0,0 +1,29 @@
+import json
+import logging
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+
+
+@pytest.mark.anyio
+async def test_request_query_stats_headers_and_slow_log(client: AsyncClient, monkeypatch, caplog):
+    resp = await client.get("/api/tasks")
+    assert "X-DB-Query-Count" not in resp.headers
+
+    monkeypatch.setattr(settings, "debug", True)
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        resp = await client.get("/api/tasks", params={"keyword": "query_stats"})
+
+    assert resp.status_code == 200
+    count = int(resp.headers["X-DB-Query-Count"])
+    assert count >= 2
+    assert float(resp.headers["X-DB-Query-Time-Ms"]) >= float(resp.headers["X-DB-Slowest-Query-Ms"]) > 0
+
+    # 每条语句都超过阈值 0，慢查询日志与请求 ID 关联
+    entries = [json.loads(record.getMessage()) for record in caplog.records if record.name == "app.slow_query"]
+    assert len(entries) == count
+    assert {entry["request_id"] for entry in entries} == {resp.headers["X-Request-ID"]}
+    assert all(entry["event"] == "slow_query" and entry["statement"] for entry in entries)
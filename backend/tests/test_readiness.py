@@ -0,0 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from app.api import health
+from app.main import app
+from app.services import task_cache, warmup_service
+from app.services.settlement_service import settlement_state
+from app.services.task_cleanup_service import scheduler_state
+
+
+@pytest.mark.anyio
+async def test_readyz_reflects_warmup_and_scheduler(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(app.state, "warmed_up", False, raising=False)
+    resp = await client.get("/readyz")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["warmup"]["ok"] is False
+
+    summary = await warmup_service.warm_up()
+    assert summary["connections"] >= 1
+    # 默认任务大厅已写入列表缓存，首个请求直接命中
+    resp = await client.get("/api/tasks")
+    assert resp.headers["X-Cache"] == "HIT"
+
+    scheduler = asyncio.create_task(asyncio.sleep(60))
+    monkeypatch.setattr(scheduler_state, "task", scheduler)
+    monkeypatch.setattr(settlement_state, "task", scheduler)
+    monkeypatch.setattr(app.state, "warmed_up", True)
+    try:
+        resp = await client.get("/readyz")
+        body = resp.json()
+        assert resp.status_code == 200, body
+        assert body["checks"]["database"]["ok"] is True
+    finally:
+        scheduler.cancel()
+
+    # 调度器退出后不再就绪
+    await asyncio.gather(scheduler, return_exceptions=True)
+    resp = await client.get("/readyz")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["scheduler"]["ok"] is False
+
+
+@pytest.mark.anyio
+async def test_database_check_times_out_while_connecting(monkeypatch):
+    @asynccontextmanager
+    async def hanging_connect():
+        await asyncio.sleep(60)
+        yield
+
+    # 连接池耗尽时取连接会一直等待，检查应在超时后失败而不是挂起
+    monkeypatch.setattr(health, "engine", SimpleNamespace(connect=hanging_connect))
+    monkeypatch.setattr(health.settings, "readyz_db_timeout_seconds", 0.05)
+    assert (await health._check_database()) == {"ok": False, "error": "TimeoutError"}
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.base import Base
+from app.db.session import build_engine
+from app.models.payment import Wallet, WalletSnapshot
+from app.models.scheduled_job import ScheduledJob
+from app.models.user import User
+from app.schemas.payment import RechargeRequest
+from app.services import reconciliation_service
+from app.services.payment_service import payment_service
+from app.services.task_cleanup_service import claim_job
+
+
+@pytest.mark.anyio
+async def test_reconciliation_only_scans_after_checkpoint(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'ledger.db'}")
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessionmaker() as session:
+            users = [User(email=f"audit{i}@example.com", full_name="audit", hashed_password="x") for i in range(3)]
+            session.add_all(users)
+            await session.commit()
+            for user in users:
+                await payment_service.recharge(session, user.id, RechargeRequest(amount=10))
+            await payment_service.pay_reward(session, users[0].id, 1, 4.0)
+            await session.commit()
+
+        def horizon() -> datetime:
+            return datetime.utcnow()
+
+        async with sessionmaker() as session:
+            user_ids, scanned, mismatches = await reconciliation_service.reconcile_chunk(session, 0, 2, horizon())
+            assert (len(user_ids), scanned, mismatches) == (2, 3, [])
+            user_ids, scanned, mismatches = await reconciliation_service.reconcile_chunk(
+                session, user_ids[-1], 2, horizon()
+            )
+            assert (len(user_ids), scanned, mismatches) == (1, 1, [])
+            snapshot = await session.get(WalletSnapshot, users[0].id)
+            assert snapshot.balance == 6.0
+
+        async with sessionmaker() as session:
+            await payment_service.recharge(session, users[0].id, RechargeRequest(amount=5))
+            await session.commit()
+            # 第二次只累加检查点之后的一条流水
+            _, scanned, mismatches = await reconciliation_service.reconcile_chunk(session, 0, 10, horizon())
+            assert (scanned, mismatches) == (1, [])
+
+            await session.execute(update(Wallet).where(Wallet.user_id == users[1].id).values(balance=99.0))
+            await session.commit()
+            _, _, mismatches = await reconciliation_service.reconcile_chunk(session, 0, 10, horizon())
+            assert [(m.user_id, m.wallet_balance, m.ledger_balance) for m in mismatches] == [(users[1].id, 99.0, 10.0)]
+            # 不一致的钱包不推进检查点
+            snapshot = (await session.execute(
+                select(WalletSnapshot).where(WalletSnapshot.user_id == users[1].id)
+            )).scalar_one()
+            assert snapshot.balance == 10.0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_scheduled_job_is_claimed_once_per_interval(db_session: AsyncSession):
+    # 多个 worker（含刚重启的）同时检查时只有一个领取到本周期的对账
+    claims = [await claim_job(db_session, "test_job", 3600) for _ in range(3)]
+    assert claims == [True, False, False]
+
+    await db_session.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.name == "test_job")
+        .values(next_run_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await db_session.commit()
+    assert await claim_job(db_session, "test_job", 3600) is True
@@ -0,0 +1,21 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.request_context import get_request_id
+
+
+@pytest.mark.anyio
+async def test_request_id_fills_response_envelopes(client: AsyncClient):
+    resp = await client.get("/api/tasks")
+    assert resp.json()["requestId"] == resp.headers["X-Request-ID"]
+
+    resp = await client.get("/api/tasks/999999")
+    assert resp.status_code == 404
+    # 错误响应沿用 snake_case 字段
+    assert resp.json()["request_id"] == resp.headers["X-Request-ID"]
+
+    resp = await client.get("/api/maps/places/autocomplete", params={"q": "驿站"})
+    assert resp.json()["requestId"] == resp.headers["X-Request-ID"]
+
+    # 请求结束后上下文被还原
+    assert get_request_id() is None
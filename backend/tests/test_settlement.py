@@ -0,0 +1,99 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.settlement import SettlementQueue
+from app.models.user import User
+from app.services import settlement_service
+
+
+async def _complete_task(client: AsyncClient, create_task, publisher: dict, courier: dict, reward: float) -> int:
+    task_id = (await create_task(publisher, rewardAmount=reward))["id"]
+    resp = await client.post(f"/api/tasks/{task_id}/accept", headers=courier)
+    assert resp.status_code == 200
+    for status in ("picked", "delivering", "confirming", "completed"):
+        resp = await client.post(f"/api/tasks/{task_id}/status", json={"status": status}, headers=courier)
+        assert resp.status_code == 200, resp.json()
+    return task_id
+
+
+@pytest.mark.anyio
+async def test_completed_tasks_are_settled_once_in_batches(
+    client: AsyncClient, db_session: AsyncSession, auth_headers, create_task
+):
+    publisher = await auth_headers("settle_publisher")
+    courier = await auth_headers("settle_courier")
+    task_ids = [await _complete_task(client, create_task, publisher, courier, reward) for reward in (3.0, 4.5, 2.5)]
+
+    queued = (await db_session.execute(
+        select(SettlementQueue).where(SettlementQueue.task_id.in_(task_ids))
+    )).scalars().all()
+    assert len(queued) == 3
+    assert all(item.settled_at is None for item in queued)
+
+    # 完成时不直接入账
+    resp = await client.get("/api/payment/balance", headers=courier)
+    assert resp.json()["data"]["balance"] == 0.0
+
+    assert await settlement_service.settle_batch(db_session, batch_size=2) == 2
+    assert await settlement_service.settle_batch(db_session, batch_size=2) == 1
+    assert await settlement_service.settle_batch(db_session, batch_size=2) == 0
+
+    resp = await client.get("/api/payment/balance", headers=courier)
+    assert resp.json()["data"]["balance"] == 10.0
+    resp = await client.get("/api/payment/transactions", headers=courier)
+    assert sorted(t["relatedId"] for t in resp.json()["data"]["items"]) == sorted(task_ids)
+
+    # 补登只对管理员开放，只写入结算队列，已结算的任务不会再次入账
+    resp = await client.post("/api/payment/settle", json={"taskId": task_ids[0]}, headers=courier)
+    assert resp.status_code == 403
+    admin_id = (await client.get("/api/users/me", headers=publisher)).json()["data"]["id"]
+    await db_session.execute(update(User).where(User.id == admin_id).values(role="admin"))
+    await db_session.commit()
+    resp = await client.post("/api/payment/settle", json={"taskId": task_ids[0]}, headers=publisher)
+    assert resp.json()["success"] is False
+
+    missed = await _complete_task(client, create_task, publisher, courier, 1.0)
+    await db_session.execute(delete(SettlementQueue).where(SettlementQueue.task_id == missed))
+    await db_session.commit()
+    for expected in (True, False):
+        resp = await client.post("/api/payment/settle", json={"taskId": missed}, headers=publisher)
+        assert resp.json()["success"] is expected
+    assert await settlement_service.settle_batch(db_session) == 1
+    resp = await client.get("/api/payment/balance", headers=courier)
+    assert resp.json()["data"]["balance"] == 11.0
+
+
+@pytest.mark.anyio
+async def test_failing_item_is_retried_alone_and_parked(
+    client: AsyncClient, db_session: AsyncSession, auth_headers, create_task, monkeypatch
+):
+    publisher = await auth_headers("poison_publisher")
+    courier = await auth_headers("poison_courier")
+    task_ids = [await _complete_task(client, create_task, publisher, courier, reward) for reward in (2.0, 7.0, 3.0)]
+
+    monthly_totals = settlement_service.monthly_totals
+
+    def failing_monthly_totals(rows):
+        rows = list(rows)
+        if any(amount == 7.0 for *_, amount in rows):
+            raise RuntimeError("bad row")
+        return monthly_totals(rows)
+
+    monkeypatch.setattr(settlement_service, "monthly_totals", failing_monthly_totals)
+    monkeypatch.setattr(settlement_service.settings, "settlement_max_attempts", 2)
+
+    # 整批失败后逐条结算，其余记录照常入账
+    assert await settlement_service.settle_batch(db_session) == 2
+    assert await settlement_service.settle_batch(db_session) == 0
+    # 达到重试上限后不再被选中
+    assert await settlement_service.settle_batch(db_session) == 0
+
+    row = (await db_session.execute(
+        select(SettlementQueue.attempts, SettlementQueue.last_error, SettlementQueue.settled_at)
+        .where(SettlementQueue.task_id == task_ids[1])
+    )).one()
+    assert row == (2, "bad row", None)
+    resp = await client.get("/api/payment/balance", headers=courier)
+    assert resp.json()["data"]["balance"] == 5.0
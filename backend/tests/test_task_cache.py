@@ -0,0 +1,40 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.cache import LRUCache
+
+
+def test_lru_cache_eviction_and_stats():
+    cache = LRUCache(maxsize=2, name="test")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a 变为最近使用
+    cache.set("c", 3)  # 淘汰 b
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+@pytest.mark.anyio
+async def test_task_list_cache_invalidated_by_writes(client: AsyncClient, auth_headers, create_task):
+    headers = await auth_headers("cache")
+
+    params = {"status": "pending", "category": "food"}
+    first = await client.get("/api/tasks", params=params)
+    assert first.status_code == 200
+    second = await client.get("/api/tasks", params=params)
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == {**first.json(), "requestId": second.json()["requestId"]}
+
+    # 写入后版本号变化，缓存不再命中，新任务出现在列表中
+    task_id = (await create_task(headers, title="Cached Task", category="food"))["id"]
+
+    third = await client.get("/api/tasks", params=params)
+    assert third.headers["x-cache"] == "MISS"
+    assert task_id in [task["id"] for task in third.json()["data"]]
+    assert third.json()["data"][0]["createdBy"]["fullName"] == "cache user"
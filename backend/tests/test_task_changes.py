@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import Task
+
+
+@pytest.mark.anyio
+async def test_task_changes_since_watermark(client: AsyncClient, auth_headers, create_task):
+    publisher = await auth_headers("sync_publisher")
+    acceptor = await auth_headers("sync_acceptor")
+
+    # 1. 首次同步拿到当前水位线
+    resp = await client.get("/api/tasks/changes", params={"status": "pending", "limit": 1000})
+    assert resp.status_code == 200
+    watermark = resp.json()["data"]["watermark"]
+
+    # 2. 发布任务后，增量同步应包含新任务
+    task_id = (await create_task(publisher, title="Sync Task", category="delivery"))["id"]
+
+    params = {"status": "pending"}
+    if watermark:
+        params["since"] = watermark
+    resp = await client.get("/api/tasks/changes", params=params)
+    data = resp.json()["data"]
+    assert task_id in [t["id"] for t in data["changed"]]
+    assert task_id not in [t["id"] for t in data["removed"]]
+    watermark = data["watermark"]
+    assert watermark is not None
+
+    # 3. 任务被接单后不再满足 status=pending，应以 tombstone 返回
+    resp_accept = await client.post(f"/api/tasks/{task_id}/accept", headers=acceptor)
+    assert resp_accept.status_code == 200
+
+    resp = await client.get("/api/tasks/changes", params={"status": "pending", "since": watermark})
+    data = resp.json()["data"]
+    assert task_id not in [t["id"] for t in data["changed"]]
+    tombstones = {t["id"]: t for t in data["removed"]}
+    assert tombstones[task_id]["status"] == "accepted"
+
+
+@pytest.mark.anyio
+async def test_task_changes_page_through_identical_timestamps(
+    client: AsyncClient, db_session: AsyncSession, auth_headers, create_task
+):
+    publisher = await auth_headers("sync_batch")
+    task_ids = [(await create_task(publisher))["id"] for _ in range(3)]
+    recent_id = (await create_task(publisher))["id"]
+    # 同一时刻修改的任务多于一页
+    await db_session.execute(
+        update(Task).where(Task.id.in_(task_ids)).values(updated_at=datetime(2000, 1, 1))
+    )
+    await db_session.commit()
+
+    seen = []
+    watermark = None
+    for _ in range(10):
+        params = {"limit": 2, **({"since": watermark} if watermark else {})}
+        data = (await client.get("/api/tasks/changes", params=params)).json()["data"]
+        seen.extend(t["id"] for t in data["changed"] + data["removed"])
+        watermark = data["watermark"]
+        if not data["hasMore"]:
+            break
+    assert seen[:3] == task_ids and recent_id in seen
+
+    # 水位线之前的任务不再重复返回；安全窗口内刚修改的任务下次同步会再次返回，
+    # 以免漏掉修改时间较早、提交较晚的事务
+    data = (await client.get("/api/tasks/changes", params={"since": watermark})).json()["data"]
+    resent = {t["id"] for t in data["changed"] + data["removed"]}
+    assert recent_id in resent and not resent & set(task_ids)
+
+    resp = await client.get("/api/tasks/changes", params={"since": "invalid"})
+    assert resp.status_code == 400
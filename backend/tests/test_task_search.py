@@ -0,0 +1,40 @@
+import pytest
+import uuid
+from httpx import AsyncClient
+
+from app.services.search_service import query_tokens, tokenize
+
+
+def test_tokenize_bigrams():
+    weights = tokenize("取快递", "帮忙取快递")
+    # 标题命中记 3 分，描述命中记 1 分
+    assert weights["取快"] == 4
+    assert weights["快递"] == 4
+    assert weights["帮忙"] == 1
+    assert query_tokens("快递 宿舍") == ["快递", "宿舍"]
+    # 单字关键词无法用二元索引表达
+    assert query_tokens("书") is None
+
+
+@pytest.mark.anyio
+async def test_keyword_search_ranked_and_follows_status(client: AsyncClient, auth_headers, create_task):
+    publisher = await auth_headers("search_publisher")
+    acceptor = await auth_headers("search_acceptor")
+    marker = uuid.uuid4().hex[:6]
+
+    async def create(title: str, description: str) -> int:
+        return (await create_task(publisher, title=title, description=description))["id"]
+
+    in_description = await create(f"帮忙跑腿{marker}", f"顺路带一下高数课本{marker}")
+    in_title = await create(f"高数课本{marker}", "放在图书馆三楼")
+    await create(f"取快递{marker}", "菜鸟驿站")
+
+    resp = await client.get("/api/tasks", params={"keyword": f"高数课本{marker}"})
+    ids = [task["id"] for task in resp.json()["data"]]
+    # 标题命中的任务排在前面，不相关的任务不返回
+    assert ids == [in_title, in_description]
+
+    # 接单后状态变化同步到索引，按 pending 搜索不再返回该任务
+    await client.post(f"/api/tasks/{in_title}/accept", headers=acceptor)
+    resp = await client.get("/api/tasks", params={"keyword": f"高数课本{marker}", "status": "pending"})
+    assert [task["id"] for task in resp.json()["data"]] == [in_description]
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+
+@contextmanager
+def count_queries(session):
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.anyio
+async def test_task_writes_do_not_reselect(client: AsyncClient, db_session, auth_headers, create_task):
+    publisher = await auth_headers("write_publisher")
+    acceptor = await auth_headers("write_acceptor")
+    # 先创建一次，地点字典已存在，后续创建不再插入地点
+    await create_task(publisher)
+
+    with count_queries(db_session) as statements:
+        task = await create_task(publisher)
+    assert task["createdBy"]["fullName"] == "write_publisher user"
+    assert task["assignedTo"] is None
+    # 认证 + 两次地点查询 + 插入任务 + 插入搜索索引，不再重新查询任务
+    assert len(statements) == 5
+    assert not any(statement.startswith("SELECT task") for statement in statements)
+
+    with count_queries(db_session) as statements:
+        resp = await client.post(f"/api/tasks/{task['id']}/accept", headers=acceptor)
+    assert resp.status_code == 200
+    assert resp.json()["data"]["assignedTo"]["fullName"] == "write_acceptor user"
+    # 最后执行的是写入语句，提交后不再重新查询
+    assert statements[-1].startswith("UPDATE")
+
+    with count_queries(db_session) as statements:
+        resp = await client.post(f"/api/tasks/{task['id']}/status", json={"status": "picked"}, headers=acceptor)
+    assert resp.status_code == 200
+    assert resp.json()["data"]["status"] == "picked"
+    assert sum(statement.startswith("SELECT task") for statement in statements) == 1
+    assert statements[-1].startswith("UPDATE")
+
+    with count_queries(db_session) as statements:
+        resp = await client.post(f"/api/tasks/{task['id']}/cancel", headers=publisher)
+    assert resp.status_code == 200
+    assert resp.json()["data"]["cancelledBy"] == "creator"
+    assert sum(statement.startswith("SELECT task") for statement in statements) == 1
+    assert statements[-1].startswith("UPDATE")
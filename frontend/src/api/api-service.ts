@@ -195,7 +195,7 @@ class ApiService {
   // Evaluation API
   evaluation = {
     submit: (payload: SubmitEvaluationPayload) => this.request(() => submitEvaluation(payload), '评价提交成功', '评价提交失败'),
-    user: (userId: number) => this.request(() => getUserEvaluations(userId), '获取用户评价成功', '获取用户评价失败'),
+    user: (userId: number, cursor?: string | null) => this.request(() => getUserEvaluations(userId, cursor), '获取用户评价成功', '获取用户评价失败'),
     task: (taskId: number) => this.request(() => getTaskEvaluations(taskId), '获取任务评价成功', '获取任务评价失败'),
   };
 
@@ -83,7 +83,11 @@ export function updateProfile(payload: UpdateProfilePayload): Promise<UserRespon
 
 export interface CreditInfoResponse {
   currentScore: number;
+  // rising / falling / stable，由信用分变化的指数加权平均判断
   scoreTrend: string;
+  // excellent / good / fair / poor
+  scoreLevel: string;
+  trendValue: number;
   completionRates: {
     publish: number;
     take: number;
@@ -102,4 +106,49 @@ export function fetchCreditInfo(): Promise<CreditInfoResponse> {
       console.error('获取信用信息失败:', error);
       throw error;
     });
-}
\ No newline at end of file
+}
+
+export interface CreditEvent {
+  id: number;
+  delta: number;
+  scoreAfter: number;
+  reason: string;
+  taskId: number | null;
+  createdAt: string;
+}
+
+export interface CreditEventPage {
+  items: CreditEvent[];
+  nextCursor: string | null;
+}
+
+// 信用分变动记录，按时间倒序分页
+export function fetchCreditHistory(cursor?: string | null, limit = 20): Promise<CreditEventPage> {
+  return http.get('/users/me/credit/history', { params: { limit, ...(cursor ? { cursor } : {}) } })
+    .then((res) => res.data.data)
+    .catch((error) => {
+      console.error('获取信用记录失败:', error);
+      throw error;
+    });
+}
+
+export interface UserSummary {
+  id: number;
+  fullName: string;
+  avatarUrl: string | null;
+  creditScore: number;
+  ratingAverage: number;
+  ratingCount: number;
+  completedPublished: number;
+  completedTaken: number;
+}
+
+// 一次请求获取多个用户的资料摘要（单次最多 100 个），用于任务卡片和聊天列表
+export function fetchUserSummaries(userIds: number[]): Promise<UserSummary[]> {
+  return http.post('/users/summaries', { userIds })
+    .then((res) => res.data.data)
+    .catch((error) => {
+      console.error('获取用户摘要失败:', error);
+      throw error;
+    });
+}
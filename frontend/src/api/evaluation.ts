@@ -29,6 +29,8 @@ export interface UserEvaluationStats {
   averageScore: number
   totalEvaluations: number
   evaluations: Evaluation[]
+  // 下一页评价的游标，没有更多评价时为 null
+  nextCursor: string | null
 }
 
 export interface TaskEvaluationInfo {
@@ -64,9 +66,11 @@ export async function submitEvaluation(payload: SubmitEvaluationPayload): Promis
   return result
 }
 
-// 获取用户评价列表及平均分
-export async function getUserEvaluations(userId: number): Promise<{ success: boolean; message: string; data?: UserEvaluationStats }> {
-  const response = await fetch(`/api/evaluation/user/${userId}`, {
+// 获取用户评价列表（分页）及平均分
+export async function getUserEvaluations(userId: number, cursor?: string | null, limit = 20): Promise<{ success: boolean; message: string; data?: UserEvaluationStats }> {
+  const params = new URLSearchParams({ limit: String(limit) })
+  if (cursor) params.set('cursor', cursor)
+  const response = await fetch(`/api/evaluation/user/${userId}?${params}`, {
     method: 'GET',
     headers: {
       'Authorization': `Bearer ${localStorage.getItem('token')}`
@@ -16,6 +16,22 @@ const REQUEST_RETRY_CONFIG = {
   retryableStatusCodes: [408, 409, 425, 429, 500, 502, 503, 504],
 }
 
+// 超时重试可能重复执行的写请求，首次发送时生成 Idempotency-Key，重试沿用同一个 key
+const IDEMPOTENT_POST_URLS = ['/payment/recharge', '/payment/pay', '/tasks']
+
+// crypto.randomUUID 只在安全上下文（HTTPS、localhost）中可用，
+// 通过 HTTP 访问局域网或开发机时改用 getRandomValues 生成 v4 UUID
+function newIdempotencyKey(): string {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID()
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16))
+  bytes[6] = (bytes[6] & 0x0f) | 0x40
+  bytes[8] = (bytes[8] & 0x3f) | 0x80
+  const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('')
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`
+}
+
 const http = axios.create({
   baseURL: import.meta.env.VITE_API_URL ?? 'http://localhost:9800/api',
   timeout: 30_000, // 增加超时时间到30秒
@@ -36,13 +52,18 @@ http.interceptors.request.use(
     
     // 添加请求ID用于追踪
     config.headers['X-Request-ID'] = `req-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`
-    
-    // 添加时间戳以避免缓存
-    if (config.method?.toLowerCase() === 'get') {
-      const separator = config.url?.includes('?') ? '&' : '?'
-      config.url = `${config.url}${separator}_t=${Date.now()}`
+
+    if (
+      config.method?.toLowerCase() === 'post' &&
+      IDEMPOTENT_POST_URLS.includes(config.url ?? '') &&
+      !config.headers['Idempotency-Key']
+    ) {
+      config.headers['Idempotency-Key'] = newIdempotencyKey()
     }
     
+    // GET 请求不再追加时间戳：后端返回 ETag/Last-Modified 且 Cache-Control 为 no-cache，
+    // 浏览器会带上 If-None-Match 重新校验，未变化时只返回 304
+    
     return config
   },
   (error) => {
@@ -1,6 +1,7 @@
 /**
  * Payment API 接口
  */
+import http from './http'
 
 export interface WalletInfo {
   userId: number
@@ -18,6 +19,18 @@ export interface Transaction {
   createdAt: string
 }
 
+export interface TransactionPage {
+  items: Transaction[]
+  nextCursor: string | null
+}
+
+export interface TransactionMonthlyTotal {
+  month: string
+  type: Transaction['type']
+  totalAmount: number
+  count: number
+}
+
 export interface RechargePayload {
   amount: number
   description?: string
@@ -30,7 +43,6 @@ export interface PaymentPayload {
 
 export interface SettlementPayload {
   taskId: number
-  amount: number
 }
 
 // 查询余额
@@ -51,29 +63,19 @@ export async function getBalance(): Promise<{ success: boolean; message: string;
   return result
 }
 
-// 模拟充值
+// 模拟充值：经 http 实例发送，自动带上 Idempotency-Key，超时重试不会重复入账
 export async function recharge(payload: RechargePayload): Promise<{ success: boolean; message: string; data?: WalletInfo }> {
-  const response = await fetch('/api/payment/recharge', {
-    method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-      'Authorization': `Bearer ${localStorage.getItem('token')}`
-    },
-    body: JSON.stringify(payload)
-  })
-
-  const result = await response.json()
-
-  if (!response.ok) {
-    throw new Error(result.message || '充值失败')
-  }
-
-  return result
+  const response = await http.post('/payment/recharge', payload)
+  return response.data
 }
 
-// 获取交易流水
-export async function getTransactions(): Promise<{ success: boolean; message: string; data?: Transaction[] }> {
-  const response = await fetch('/api/payment/transactions', {
+// 获取交易流水（按时间倒序分页，cursor 传上一页返回的 nextCursor）
+export async function getTransactions(cursor?: string | null, limit = 20): Promise<{ success: boolean; message: string; data?: TransactionPage }> {
+  const params = new URLSearchParams({ limit: String(limit) })
+  if (cursor) {
+    params.set('cursor', cursor)
+  }
+  const response = await fetch(`/api/payment/transactions?${params}`, {
     method: 'GET',
     headers: {
       'Authorization': `Bearer ${localStorage.getItem('token')}`
@@ -89,27 +91,32 @@ export async function getTransactions(): Promise<{ success: boolean; message: st
   return result
 }
 
-// 支付任务赏金
-export async function payForTask(payload: PaymentPayload): Promise<{ success: boolean; message: string; data?: Transaction }> {
-  const response = await fetch('/api/payment/pay', {
-    method: 'POST',
+// 按月、按类型汇总的流水金额
+export async function getMonthlyTotals(since?: string): Promise<{ success: boolean; message: string; data?: TransactionMonthlyTotal[] }> {
+  const query = since ? `?since=${encodeURIComponent(since)}` : ''
+  const response = await fetch(`/api/payment/transactions/monthly${query}`, {
+    method: 'GET',
     headers: {
-      'Content-Type': 'application/json',
       'Authorization': `Bearer ${localStorage.getItem('token')}`
-    },
-    body: JSON.stringify(payload)
+    }
   })
 
   const result = await response.json()
 
   if (!response.ok) {
-    throw new Error(result.message || '支付失败')
+    throw new Error(result.message || '获取流水汇总失败')
   }
 
   return result
 }
 
-// 结算赏金给接单人
+// 支付任务赏金：同样经 http 实例发送，重试沿用同一个 Idempotency-Key
+export async function payForTask(payload: PaymentPayload): Promise<{ success: boolean; message: string; data?: Transaction }> {
+  const response = await http.post('/payment/pay', payload)
+  return response.data
+}
+
+// 管理员为已完成的任务补登赏金结算，金额和接单人以任务为准
 export async function settlePayment(payload: SettlementPayload): Promise<{ success: boolean; message: string; data?: Transaction }> {
   const response = await fetch('/api/payment/settle', {
     method: 'POST',